@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tasker.settings')
+    # Тести мають окремий модуль налаштувань; --settings і DJANGO_SETTINGS_MODULE мають перевагу
+    default_settings = 'tasker.test_settings' if sys.argv[1:2] == ['test'] else 'tasker.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
@@ -0,0 +1,57 @@
+from django.db.models import Q
+
+from .models import Dashboard
+from .shards import current_shard
+
+
+# Атрибут запиту, у якому кешуються доступні дошки: окремий набір для кожного шарду
+ACCESS_CACHE_ATTR = "_accessible_dashboard_ids"
+
+
+# Дошки, які користувач створив або до яких його додали учасником, крім видалених.
+# UNION сам прибирає дублікати, тому DISTINCT не потрібен.
+def accessible_dashboards_query(user):
+    owned = Dashboard.objects.filter(created_by=user, deleted_at__isnull=True).values_list("id", flat=True)
+    shared = Dashboard.members.through.objects.filter(
+        user=user, dashboard__deleted_at__isnull=True,
+    ).values_list("dashboard_id", flat=True)
+    return owned.union(shared)
+
+
+def dashboard_ids_for_user(user):
+    return frozenset(accessible_dashboards_query(user))
+
+
+# Набір доступних дошок шарду рахується один раз на запит і кешується на ньому.
+# Сторінки з кількох шардів заповнюють кеш з потоків fan_out, тож словник створюється атомарно.
+def get_accessible_dashboard_ids(request):
+    cache = request.__dict__.setdefault(ACCESS_CACHE_ATTR, {})
+    alias = current_shard()
+    if alias not in cache:
+        cache[alias] = dashboard_ids_for_user(request.user)
+    return cache[alias]
+
+
+async def adashboard_ids_for_user(user):
+    return frozenset([pk async for pk in accessible_dashboards_query(user)])
+
+
+# Асинхронний варіант: після нього синхронні міксини беруть набір з кешу без запиту
+async def aget_accessible_dashboard_ids(request):
+    cache = request.__dict__.setdefault(ACCESS_CACHE_ATTR, {})
+    alias = current_shard()
+    if alias not in cache:
+        cache[alias] = await adashboard_ids_for_user(await request.auser())
+    return cache[alias]
+
+
+# Скидання кешу, якщо доступ змінився в межах того ж запиту
+def reset_accessible_dashboard_ids(request):
+    if hasattr(request, ACCESS_CACHE_ATTR):
+        delattr(request, ACCESS_CACHE_ATTR)
+
+
+# Перевірка доступу до однієї дошки для асинхронних view
+async def ahas_dashboard_access(user, dashboard_id):
+    return await Dashboard.objects.filter(Q(created_by=user) | Q(members=user), pk=dashboard_id,
+                                          deleted_at__isnull=True).aexists()
@@ -0,0 +1,30 @@
+from django.utils import timezone
+
+from .after_commit import deleting, transaction_state
+from .models import Dashboard
+
+
+# Dashboard.last_activity оновлюється при кожному записі в дереві дошки.
+# У межах транзакції кожна дошка чи список торкаються один раз:
+# усі зміни транзакції однаково стануть видимі разом.
+def _touch(marker, queryset):
+    touched = transaction_state("activity-touched", set)
+    if touched is not None:
+        if marker in touched:
+            return
+        touched.add(marker)
+    queryset.update(last_activity=timezone.now())
+
+
+def touch_dashboard(dashboard_id):
+    deleted = deleting("dashboard")
+    if deleted is None or dashboard_id not in deleted:
+        _touch(("dashboard", dashboard_id), Dashboard.objects.filter(pk=dashboard_id))
+
+
+def touch_todolist_dashboards(*todolist_ids):
+    deleted = deleting("todolist")
+    if deleted is not None:
+        todolist_ids = [pk for pk in todolist_ids if pk not in deleted]
+    if todolist_ids:
+        _touch(("todolists", frozenset(todolist_ids)), Dashboard.objects.filter(todolists__in=todolist_ids))
@@ -0,0 +1,42 @@
+from django.db import transaction
+
+from .shards import current_shard
+
+
+# Стан до кінця поточної транзакції на шарді. Обробники сигналів складають сюди ключі, події
+# чи id, а flush обробляє їх одним пакетом після коміту: каскадне видалення шле сигнал на
+# кожен рядок. Кожна можливість має свій стан під своїм ім'ям і свій колбек on_commit.
+class TransactionState:
+    def __init__(self, value, flush):
+        self.value = value
+        self.flush = flush
+        self.flushed = False
+
+    def __call__(self):
+        self.flushed = True
+        if self.flush is not None:
+            self.flush(self.value)
+
+
+# Поза транзакцією повертає None. Після відкату (зокрема до точки збереження) колбек зникає
+# з run_on_commit, тоді стан починається заново.
+def transaction_state(name, factory, flush=None, using=None):
+    using = using or current_shard()
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return None
+
+    states = getattr(connection, "_transaction_states", None)
+    if states is None:
+        states = connection._transaction_states = {}
+    state = states.get(name)
+    if state is None or state.flushed or not any(callback is state for _, callback, _ in connection.run_on_commit):
+        state = states[name] = TransactionState(factory(), flush)
+        transaction.on_commit(state, using)
+    return state.value
+
+
+# Що видаляється в цій транзакції: "dashboard", "todolist" чи "task" — id і id батька.
+# Обробники дочірніх рядків каскаду не оновлюють батьків, які все одно зникнуть.
+def deleting(kind, using=None):
+    return transaction_state(("deleting", kind), dict, using=using)
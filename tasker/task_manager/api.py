@@ -0,0 +1,384 @@
+import json
+from collections import defaultdict
+from itertools import chain
+from operator import itemgetter
+
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import View
+
+from .counters import counter_batch
+from .forms import DashboardCreateForm, TodoListCreateForm, TaskCreateForm, CommentCreateForm
+from .models import Dashboard, TodoList, Task, Comment
+from .pagination import DEFAULT_ORDERING, KeysetPage, KeysetPaginator
+from .purge import soft_delete
+from .shards import (ShardRoutingError, current_shard, fan_out, is_sharded, place_dashboard, route_to_objects,
+                     shard_selected, use_shard)
+from .signals import send_saved
+from .views import DashboardAccessMixin, TodoListAccessMixin, TaskAccessMixin, CommentAccessMixin
+
+
+API_VERSION = "v1"
+# Розмір сторінки за замовчуванням і найбільший дозволений
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 200
+# Найбільша кількість об'єктів в одній пакетній операції
+API_BULK_LIMIT = 500
+
+
+class ApiError(Exception):
+    def __init__(self, error, status=400, **extra):
+        super().__init__(error)
+        self.status = status
+        self.payload = {"success": False, "error": error, **extra}
+
+
+def _parse_pk(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    raise ApiError("invalid_id", value=value)
+
+
+# Спільна логіка ресурсів API. Доступ визначає міксина доступу конкретного ресурсу,
+# тож правила ті самі, що й у HTML-сторінок. Читання йде через values(), без об'єктів моделі.
+# Шард обирається за id з URL чи батьком зі фільтра списку (ShardMiddleware), а для пакетів —
+# за id з тіла запиту; список без батька збирається з усіх шардів.
+class ApiResourceMixin:
+    model = None
+    form_class = None
+    # Поля, які можна запросити через ?fields=
+    fields = ()
+    # Батьківський об'єкт: параметр фільтра і поле для створення
+    parent_field = None
+    parent_access_mixin = None
+    # Додаткові фільтри списку: параметр запиту -> поле
+    filter_fields = {}
+    # Поля, які вибираються для оновлення через only()
+    update_only = ()
+    update_select_related = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({"success": False, "error": "not_authenticated"}, status=401)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse(e.payload, status=e.status)
+        except ShardRoutingError as e:
+            return e.response()
+
+    @classmethod
+    def parent_model(cls):
+        return cls.model._meta.get_field(cls.parent_field).related_model
+
+    # Об'єкт з URL або батько зі фільтра списку (див. ShardMiddleware)
+    @classmethod
+    def shard_objects(cls, request, view_kwargs):
+        if view_kwargs.get("pk") is not None:
+            return cls.model, [view_kwargs["pk"]]
+        parent = cls.parent_field and request.GET.get(cls.parent_field, "")
+        if request.method == "GET" and parent and parent.isdigit():
+            return cls.parent_model(), [int(parent)]
+        return None
+
+    # Розбір запиту
+
+    def get_fields(self):
+        raw = self.request.GET.get("fields")
+        if not raw:
+            return list(self.fields)
+        fields = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = sorted(set(fields) - set(self.fields))
+        if unknown or not fields:
+            raise ApiError("invalid_fields", fields=unknown)
+        return list(dict.fromkeys(fields))
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get("limit", API_DEFAULT_LIMIT))
+        except ValueError:
+            raise ApiError("invalid_limit")
+        if not 1 <= limit <= API_MAX_LIMIT:
+            raise ApiError("invalid_limit")
+        return limit
+
+    def get_payload(self):
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise ApiError("invalid_json")
+
+    def get_items(self, payload):
+        items = payload.get("items") if isinstance(payload, dict) else None
+        if not isinstance(items, list) or not items or len(items) > API_BULK_LIMIT:
+            raise ApiError("invalid_items")
+        if not all(isinstance(item, dict) for item in items):
+            raise ApiError("invalid_items")
+        return items
+
+    def filter_list(self, qs):
+        filters = dict(self.filter_fields)
+        if self.parent_field:
+            filters[self.parent_field] = f"{self.parent_field}_id"
+        for param, field in filters.items():
+            value = self.request.GET.get(param)
+            if value:
+                qs = qs.filter(**{field: _parse_pk(value) if field.endswith("_id") else value})
+        return qs
+
+    # Серіалізація
+
+    def serialize(self, qs, fields=None):
+        return list(qs.values(*(fields or self.get_fields())))
+
+    def results(self, pks, status=200):
+        rows = self.serialize(self.get_queryset().filter(pk__in=pks).order_by("id"))
+        return JsonResponse({"success": True, "results": rows}, status=status)
+
+    # Читання
+
+    def shard_page(self, fields):
+        # Поля сортування потрібні для курсора, навіть якщо клієнт їх не просив
+        extra = [name for name in DEFAULT_ORDERING if name not in fields]
+        qs = self.filter_list(self.get_queryset()).values(*fields, *extra)
+        return KeysetPaginator(qs, self.get_limit()).page(self.request.GET.get("after") or None)
+
+    def list_page(self, fields):
+        if not is_sharded() or shard_selected():
+            return self.shard_page(fields)
+        pages = fan_out(lambda: self.shard_page(fields))
+        return KeysetPage.merged(pages, self.get_limit(), DEFAULT_ORDERING, self.request.GET.get("after") or None)
+
+    def get(self, request, *args, **kwargs):
+        fields = self.get_fields()
+        pk = kwargs.get("pk")
+        if pk is not None:
+            rows = self.serialize(self.get_queryset().filter(pk=pk), fields)
+            if not rows:
+                raise ApiError("not_found", status=404)
+            return JsonResponse(rows[0])
+
+        page = self.list_page(fields)
+        rows = [{name: row[name] for name in fields} for row in page.object_list]
+        return JsonResponse({"results": rows, "next": page.next_cursor})
+
+    # Створення
+
+    def model_defaults(self):
+        return {
+            field.name: field.get_default()
+            for field in self.model._meta.concrete_fields
+            if field.name in self.form_class.base_fields and field.has_default()
+        }
+
+    # Батьківські об'єкти, доступні користувачу, одним запитом
+    def get_parents(self, items):
+        if not self.parent_field:
+            return {}
+        try:
+            ids = {_parse_pk(item.get(self.parent_field)) for item in items}
+        except ApiError:
+            raise ApiError("invalid_parent", field=self.parent_field)
+        route_to_objects(self.parent_model(), ids, write=True)
+        parents = self.parent_access_mixin.get_queryset(self).in_bulk(ids)
+        missing = sorted(ids - set(parents))
+        if missing:
+            raise ApiError("not_found", status=404, field=self.parent_field, missing=missing)
+        return parents
+
+    def prepare_created(self, objects):
+        pass
+
+    # Перед записом змін; повертає поля, які треба записати
+    def prepare_updated(self, objects, changed):
+        return changed
+
+    def create_objects(self, objects):
+        with transaction.atomic(using=current_shard()), counter_batch():
+            created = self.model.objects.bulk_create(objects)
+            send_saved(self.model, created, created=True)
+        return created
+
+    # Пакетна зміна чи видалення — в межах одного шарду
+    def route_objects(self, ids):
+        route_to_objects(self.model, ids, write=True)
+
+    def post(self, request, *args, **kwargs):
+        if kwargs.get("pk") is not None:
+            raise ApiError("method_not_allowed", status=405)
+        items = self.get_items(self.get_payload())
+        parents = self.get_parents(items)
+        defaults = self.model_defaults()
+
+        objects, errors = [], {}
+        for index, item in enumerate(items):
+            form = self.form_class(data={**defaults, **item})
+            if not form.is_valid():
+                errors[index] = form.errors.get_json_data()
+                continue
+            obj = form.save(commit=False)
+            obj.created_by = request.user
+            if self.parent_field:
+                setattr(obj, self.parent_field, parents[_parse_pk(item[self.parent_field])])
+            objects.append(obj)
+        if errors:
+            raise ApiError("invalid", errors=errors)
+
+        self.prepare_created(objects)
+        created = self.create_objects(objects)
+        return self.results([obj.pk for obj in created], status=201)
+
+    # Оновлення
+
+    def patch(self, request, *args, **kwargs):
+        payload = self.get_payload()
+        if kwargs.get("pk") is not None:
+            if not isinstance(payload, dict):
+                raise ApiError("invalid_items")
+            items = [{**payload, "id": kwargs["pk"]}]
+        else:
+            items = self.get_items(payload)
+
+        form_fields = list(self.form_class.base_fields)
+        ids = [_parse_pk(item.get("id")) for item in items]
+        if len(set(ids)) != len(ids):
+            raise ApiError("duplicate_id")
+        if kwargs.get("pk") is None:
+            self.route_objects(ids)
+        qs = self.get_queryset().filter(pk__in=ids)
+        if self.update_select_related:
+            qs = qs.select_related(*self.update_select_related)
+        objects = qs.only(*self.update_only).in_bulk()
+        missing = sorted(set(ids) - set(objects))
+        if missing:
+            raise ApiError("not_found", status=404, missing=missing)
+
+        changed, errors = set(), {}
+        for index, (pk, item) in enumerate(zip(ids, items)):
+            fields = set(item) - {"id"}
+            unknown = sorted(fields - set(form_fields))
+            if unknown:
+                errors[index] = {name: [{"message": "Поле не можна змінювати.", "code": "read_only"}] for name in unknown}
+                continue
+            obj = objects[pk]
+            form = self.form_class(data={**model_to_dict(obj, fields=form_fields), **item}, instance=obj)
+            form.is_valid()
+            # Перевіряються лише змінені поля: старі значення могли стати недійсними (минулий дедлайн)
+            item_errors = {name: value for name, value in form.errors.get_json_data().items()
+                           if name in fields or name == "__all__"}
+            if item_errors:
+                errors[index] = item_errors
+            changed |= fields
+        if errors:
+            raise ApiError("invalid", errors=errors)
+        changed = self.prepare_updated(list(objects.values()), changed)
+
+        # bulk_update не заповнює auto_now, тож час оновлення ставиться вручну
+        now = timezone.now()
+        auto_now = [field.name for field in self.model._meta.concrete_fields if getattr(field, "auto_now", False)]
+        for obj in objects.values():
+            for name in auto_now:
+                setattr(obj, name, now)
+        with transaction.atomic(using=current_shard()), counter_batch():
+            self.model.objects.bulk_update(list(objects.values()), [*sorted(changed), *auto_now])
+            send_saved(self.model, objects.values(), created=False, update_fields=frozenset(changed))
+
+        if kwargs.get("pk") is not None:
+            return self.get(request, *args, **kwargs)
+        return self.results(ids)
+
+    # Видалення
+
+    def delete(self, request, *args, **kwargs):
+        if kwargs.get("pk") is not None:
+            ids = [kwargs["pk"]]
+        else:
+            payload = self.get_payload()
+            ids = payload.get("ids") if isinstance(payload, dict) else None
+            if not isinstance(ids, list) or not ids or len(ids) > API_BULK_LIMIT:
+                raise ApiError("invalid_ids")
+            ids = [_parse_pk(pk) for pk in ids]
+            self.route_objects(ids)
+
+        with transaction.atomic(using=current_shard()), counter_batch():
+            qs = self.get_queryset().filter(pk__in=ids)
+            missing = sorted(set(ids) - set(qs.values_list("pk", flat=True)))
+            if missing:
+                raise ApiError("not_found", status=404, missing=missing)
+            # Дошки і списки видаляються м'яко, їхні дерева прибирає purge_deleted
+            if hasattr(self.model, "soft_delete"):
+                deleted = {self.model._meta.label: soft_delete(qs)}
+            else:
+                _, deleted = qs.delete()
+        return JsonResponse({"success": True, "deleted": deleted})
+
+
+# Дошки розкладені по шардах (див. shards.py): результати створення збираються з усіх шардів
+class DashboardApiView(ApiResourceMixin, DashboardAccessMixin, View):
+    model = Dashboard
+    form_class = DashboardCreateForm
+    fields = ("id", "title", "description", "created_at", "updated_at", "last_activity", "created_by")
+    update_only = ("id", "title", "description")
+
+    # bulk_create не викликає Dashboard.save, тож id і шард кожній дошці видає каталог тут
+    def create_objects(self, objects):
+        placed = defaultdict(list)
+        for obj in objects:
+            obj.pk, alias = place_dashboard()
+            placed[alias].append(obj)
+        create, created = super().create_objects, []
+        for alias, group in placed.items():
+            with use_shard(alias):
+                created += create(group)
+        return created
+
+    def results(self, pks, status=200):
+        fields = self.get_fields()
+        shards = fan_out(lambda: list(self.get_queryset().filter(pk__in=pks).values(*dict.fromkeys(["id", *fields]))))
+        rows = [{name: row[name] for name in fields} for row in sorted(chain(*shards), key=itemgetter("id"))]
+        return JsonResponse({"success": True, "results": rows}, status=status)
+
+
+class TodoListApiView(ApiResourceMixin, TodoListAccessMixin, View):
+    model = TodoList
+    form_class = TodoListCreateForm
+    fields = ("id", "dashboard", "title", "description", "important", "created_at", "updated_at", "created_by")
+    parent_field = "dashboard"
+    parent_access_mixin = DashboardAccessMixin
+    update_only = ("id", "dashboard", "title", "description", "important")
+
+
+class TaskApiView(ApiResourceMixin, TaskAccessMixin, View):
+    model = Task
+    form_class = TaskCreateForm
+    fields = ("id", "todolist", "title", "content", "status", "priority", "deadline", "position",
+              "created_at", "updated_at", "created_by")
+    parent_field = "todolist"
+    parent_access_mixin = TodoListAccessMixin
+    filter_fields = {"status": "status", "priority": "priority"}
+    update_only = ("id", "todolist", "title", "content", "status", "priority", "deadline", "position")
+
+    # Нові картки стають у кінець своїх колонок, як і при звичайному save()
+    def prepare_created(self, objects):
+        Task.assign_end_positions(objects)
+
+    # Картка, що змінила колонку, стає в її кінець, як і при зміні статусу на дошці
+    def prepare_updated(self, objects, changed):
+        if "status" not in changed:
+            return changed
+        Task.assign_end_positions([task for task in objects if task.status != task._loaded_status])
+        return changed | {"position"}
+
+
+class CommentApiView(ApiResourceMixin, CommentAccessMixin, View):
+    model = Comment
+    form_class = CommentCreateForm
+    fields = ("id", "task", "content", "created_at", "updated_at", "created_by")
+    parent_field = "task"
+    parent_access_mixin = TaskAccessMixin
+    update_only = ("id", "content", "task", "task__todolist")
+    update_select_related = ("task",)
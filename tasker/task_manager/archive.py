@@ -0,0 +1,122 @@
+import datetime
+
+from django.db import connections, router, transaction
+from django.db.models import DateTimeField, IntegerField, Prefetch, Value
+from django.utils import timezone
+
+from . import flow
+from .activity import touch_todolist_dashboards
+from .counters import adjust, counter_batch
+from .events import queue_event
+from .fragments import bump_versions, version_key
+from .models import TodoList, Task, Comment, ArchivedTask, ArchivedComment, SearchDocument, status_count_field
+from .purge import delete_batch
+from .shards import current_shard
+from .signals import send_saved
+
+
+# Холодне сховище для завдань, що давно лежать в архівній колонці. Головна сторінка і колонки
+# читають лише гарячу таблицю Task, тож вона не росте разом з архівом. Кожен пакет переноситься
+# в одній транзакції: INSERT ... SELECT в архівні таблиці і пакетний DELETE з гарячих.
+
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_STATUSES = ("archived",)
+ARCHIVE_AFTER = datetime.timedelta(days=90)
+
+
+def _columns(model, exclude=()):
+    return [field.attname for field in model._meta.concrete_fields if field.name not in exclude]
+
+
+# Спільні стовпчики гарячих і архівних таблиць
+TASK_COLUMNS = _columns(ArchivedTask, exclude={"archived_at"})
+COMMENT_COLUMNS = _columns(ArchivedComment)
+
+
+# INSERT INTO model (columns, *values) SELECT ...: рядки копіюються в самій базі
+def copy_rows(queryset, model, columns, **values):
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    target = ", ".join(quote(model._meta.get_field(name).column) for name in [*columns, *values])
+    sql, params = queryset.order_by().annotate(**values).values_list(*columns, *values).query.get_compiler(using).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {quote(model._meta.db_table)} ({target}) {sql}", params)
+        return cursor.rowcount
+
+
+# Завдання, які не змінювалися довше за older_than
+def archivable_tasks(older_than=ARCHIVE_AFTER, statuses=ARCHIVE_STATUSES):
+    return Task.objects.filter(status__in=statuses, updated_at__lt=timezone.now() - older_than,
+                               todolist__deleted_at__isnull=True)
+
+
+# Переносить до batch_size завдань набору разом із коментарями; повертає (завдань, коментарів).
+# Сигнали не шлються, тож лічильники колонок, журнал переходів, кеш фрагментів і живі дошки
+# оновлюються тут.
+def archive_batch(queryset, batch_size=ARCHIVE_BATCH_SIZE):
+    with transaction.atomic(using=current_shard()), counter_batch():
+        rows = list(queryset.select_for_update(of=("self",)).order_by()
+                    .values_list("pk", "todolist_id", "status")[:batch_size])
+        if not rows:
+            return 0, 0
+        ids = [pk for pk, _, _ in rows]
+        tasks = Task.objects.filter(pk__in=ids)
+        copy_rows(tasks, ArchivedTask, TASK_COLUMNS, archived_at=Value(timezone.now(), DateTimeField()))
+        comments = copy_rows(Comment.objects.filter(task_id__in=ids), ArchivedComment, COMMENT_COLUMNS)
+        delete_batch(SearchDocument.objects.filter(task_id__in=ids))
+        delete_batch(Comment.objects.filter(task_id__in=ids))
+        delete_batch(tasks)
+
+        todolist_ids = {todolist_id for _, todolist_id, _ in rows}
+        bump_versions(*(version_key("todolist", pk) for pk in todolist_ids))
+        for pk, todolist_id, status in rows:
+            adjust(TodoList, todolist_id, **{status_count_field(status): -1})
+            flow.record(todolist_id, pk, status, None)
+            queue_event(todolist_id, "task.deleted", task_id=pk)
+        touch_todolist_dashboards(*todolist_ids)
+    return len(rows), comments
+
+
+def archive(queryset, batch_size=ARCHIVE_BATCH_SIZE, log=None):
+    tasks = comments = 0
+    while True:
+        batch_tasks, batch_comments = archive_batch(queryset, batch_size)
+        tasks += batch_tasks
+        comments += batch_comments
+        if log and batch_tasks:
+            log(f"завдань: {tasks}, коментарів: {comments}")
+        if batch_tasks < batch_size:
+            return tasks, comments
+
+
+# Повертає завдання з архіву в їхні списки під тими самими id, з коментарями.
+# post_save оновлює лічильники, кеш, пошуковий індекс і живі дошки, як для нових завдань;
+# час оновлення стає поточним, щоб наступний запуск archive_tasks не забрав їх одразу.
+def restore_tasks(task_ids):
+    with transaction.atomic(using=current_shard()), counter_batch():
+        ids = list(ArchivedTask.objects.filter(pk__in=task_ids, todolist__deleted_at__isnull=True)
+                   .values_list("pk", flat=True))
+        if not ids:
+            return 0
+        copy_rows(ArchivedTask.objects.filter(pk__in=ids), Task, TASK_COLUMNS,
+                  comment_count=Value(0, IntegerField()))
+        copy_rows(ArchivedComment.objects.filter(task_id__in=ids), Comment, COMMENT_COLUMNS)
+        delete_batch(ArchivedComment.objects.filter(task_id__in=ids))
+        delete_batch(ArchivedTask.objects.filter(pk__in=ids))
+
+        Task.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+        send_saved(Task, Task.objects.filter(pk__in=ids), created=True)
+        send_saved(Comment, Comment.objects.filter(task_id__in=ids), created=True)
+    return len(ids)
+
+
+# Архів списку для сторінки перегляду: від нещодавно заархівованих
+def archived_tasks(todolist):
+    return (
+        ArchivedTask.objects.filter(todolist=todolist)
+        .select_related("created_by")
+        .prefetch_related(Prefetch("comments", queryset=ArchivedComment.objects.select_related("created_by")
+                                   .order_by("created_at", "id")))
+        .order_by("-archived_at", "-id")
+    )
@@ -0,0 +1,201 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import path
+from django.views.generic import View
+from django.views.generic.detail import SingleObjectMixin, SingleObjectTemplateResponseMixin
+
+from .access import aget_accessible_dashboard_ids
+from .conditional import AsyncConditionalGetMixin
+from .models import Dashboard, TodoList, Task, Comment
+from .pagination import KeysetPaginationMixin
+from .views import (DashboardAccessMixin, TodoListAccessMixin, TaskAccessMixin, CommentAccessMixin, MainPageView,
+                    TASK_STATUSES, TaskStatusUpdateView)
+
+
+# Асинхронні варіанти сторінок для читання і зміни статусу для запуску під ASGI.
+# Запити view йдуть через async ORM; шаблон Django рендерить уже в синхронному
+# потоці, тож ліниві фрагменти головної сторінки працюють так само, як і раніше.
+
+
+# Користувач завантажується через async ORM; далі синхронні перевірки беруть його з запиту
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+# Набір доступних дошок вибирається асинхронно і кешується на запиті,
+# тому get_queryset() синхронних міксин далі будує запити без звернень до БД
+class AsyncDashboardAccessMixin(DashboardAccessMixin):
+    async def dispatch(self, request, *args, **kwargs):
+        await aget_accessible_dashboard_ids(request)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncTodoListAccessMixin(AsyncDashboardAccessMixin, TodoListAccessMixin):
+    pass
+
+
+class AsyncTaskAccessMixin(AsyncDashboardAccessMixin, TaskAccessMixin):
+    pass
+
+
+class AsyncCommentAccessMixin(AsyncDashboardAccessMixin, CommentAccessMixin):
+    pass
+
+
+class AsyncDetailView(SingleObjectTemplateResponseMixin, SingleObjectMixin, View):
+    # Зв'язки, які читає шаблон
+    select_related = ()
+    prefetch_related = ()
+
+    async def aget_object(self):
+        qs = self.get_queryset().select_related(*self.select_related).prefetch_related(*self.prefetch_related)
+        try:
+            return await qs.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except self.model.DoesNotExist:
+            raise Http404("Об'єкт не знайдено.")
+
+    async def aget_context_data(self, **kwargs):
+        return self.get_context_data(**kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        return self.render_to_response(await self.aget_context_data(object=self.object))
+
+
+class AsyncDashboardDetailView(AsyncLoginRequiredMixin, AsyncDashboardAccessMixin, AsyncConditionalGetMixin,
+                               KeysetPaginationMixin, AsyncDetailView):
+    model = Dashboard
+    template_name = "dashboard/dashboard_detail.html"
+    context_object_name = "dashboard"
+    pk_url_kwarg = "dashboard_pk"
+    select_related = ("created_by",)
+    query_budget = 6
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        _, context["page_obj"] = await self.apaginate_keyset(
+            self.object.todolists.filter(deleted_at__isnull=True).select_related("created_by")
+        )
+        context["todolists"] = context["page_obj"].object_list
+        return context
+
+
+class AsyncTodoListDetailView(AsyncLoginRequiredMixin, AsyncTodoListAccessMixin, AsyncConditionalGetMixin,
+                              KeysetPaginationMixin, AsyncDetailView):
+    model = TodoList
+    template_name = "todolist/todolist_detail.html"
+    context_object_name = "todolist"
+    pk_url_kwarg = "todolist_pk"
+    last_activity_lookup = "dashboard__last_activity"
+    select_related = ("dashboard", "created_by")
+    query_budget = 6
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context["dashboard"] = self.object.dashboard
+        _, context["page_obj"] = await self.apaginate_keyset(self.object.tasks.select_related("created_by"))
+        context["tasks"] = context["page_obj"].object_list
+        return context
+
+
+class AsyncTaskDetailView(AsyncLoginRequiredMixin, AsyncTaskAccessMixin, AsyncConditionalGetMixin, AsyncDetailView):
+    model = Task
+    template_name = "task/task_detail.html"
+    context_object_name = "task"
+    pk_url_kwarg = "task_pk"
+    last_activity_lookup = "todolist__dashboard__last_activity"
+    select_related = ("todolist__dashboard", "created_by")
+    prefetch_related = (Prefetch("comments", queryset=Comment.objects.select_related("created_by")),)
+    query_budget = 6
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context["todolist"] = self.object.todolist
+        context["dashboard"] = self.object.todolist.dashboard
+        return context
+
+
+class AsyncCommentDetailView(AsyncLoginRequiredMixin, AsyncCommentAccessMixin, AsyncConditionalGetMixin,
+                             AsyncDetailView):
+    model = Comment
+    template_name = "comment/comment_detail.html"
+    context_object_name = "comment"
+    pk_url_kwarg = "comment_pk"
+    last_activity_lookup = "task__todolist__dashboard__last_activity"
+    select_related = ("task__todolist__dashboard", "created_by")
+    query_budget = 5
+
+    async def aget_context_data(self, **kwargs):
+        context = self.get_context_data(**kwargs)
+        context["task"] = self.object.task
+        context["todolist"] = self.object.task.todolist
+        context["dashboard"] = self.object.task.todolist.dashboard
+        return context
+
+
+# Головна сторінка: обрані дошка, список і картка вибираються асинхронно,
+# бічна панель і колонки лишаються лінивими і читаються лише при промаху кешу фрагментів
+class AsyncMainPageView(AsyncLoginRequiredMixin, AsyncTaskAccessMixin, MainPageView):
+    async def aget_selection(self):
+        dashboard_pk = self.request.GET.get("dashboard")
+        todolist_pk = self.request.GET.get("todolist")
+        card_pk = self.get_card_pk()
+        return {
+            "dashboard": await aget_object_or_404(DashboardAccessMixin.get_queryset(self), pk=dashboard_pk) if dashboard_pk else None,
+            "todolist": await aget_object_or_404(TodoListAccessMixin.get_queryset(self), pk=todolist_pk) if todolist_pk else None,
+            "card": await aget_object_or_404(self.object_list, pk=card_pk) if card_pk else None,
+        }
+
+    def get_selection(self):
+        return self.selection
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        self.selection = await self.aget_selection()
+        return self.render_to_response(self.get_context_data())
+
+
+class AsyncTaskStatusUpdateView(AsyncLoginRequiredMixin, AsyncTaskAccessMixin, View):
+    query_budget = 10
+    shard_objects = TaskStatusUpdateView.shard_objects
+
+    async def post(self, request, *args, **kwargs):
+        task_id = request.POST.get("task_id")
+        new_status = request.POST.get("status")
+
+        if not task_id or new_status is None:
+            return JsonResponse({"success": False, "error": "missing_params"}, status=400)
+        if new_status not in TASK_STATUSES:
+            return JsonResponse({"success": False, "error": "invalid_status"}, status=400)
+
+        task = await aget_object_or_404(self.get_queryset(), pk=task_id)
+        # Транзакції в async ORM немає, тож переміщення йде в синхронному потоці
+        await sync_to_async(task.move_to_end)(new_status)
+        return JsonResponse({"success": True, "task_id": task.id, "status": task.status})
+
+
+# Назва маршруту -> асинхронний варіант його view
+ASYNC_VARIANTS = {
+    "main": AsyncMainPageView,
+    "dashboard_detail": AsyncDashboardDetailView,
+    "todolist_detail": AsyncTodoListDetailView,
+    "task_detail": AsyncTaskDetailView,
+    "comment_detail": AsyncCommentDetailView,
+    "task_update_status": AsyncTaskStatusUpdateView,
+}
+
+
+# Ті самі маршрути, де сторінки з ASYNC_VARIANTS обслуговуються асинхронними view
+def use_async_views(urlpatterns):
+    return [
+        path(str(pattern.pattern), ASYNC_VARIANTS[pattern.name].as_view(), name=pattern.name)
+        if pattern.name in ASYNC_VARIANTS else pattern
+        for pattern in urlpatterns
+    ]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+# Користувач сесії з кешу: без нього AuthenticationMiddleware читає auth_user у кожному запиті.
+# Запис скидають сигнали збереження й видалення користувача (signals.py); зміна пароля теж
+# зберігає користувача, тож хеш сесії далі звіряється вже з новим паролем.
+
+def user_cache():
+    return caches[getattr(settings, "USER_CACHE_ALIAS", "default")]
+
+
+def user_cache_timeout():
+    return getattr(settings, "USER_CACHE_TIMEOUT", 300)
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def forget_user(user_id):
+    user_cache().delete(user_cache_key(user_id))
+
+
+# Кешуються лише користувачі, яким дозволено вхід: решту ModelBackend і так не повертає
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache().set(key, user, user_cache_timeout())
+        return user
+
+    async def aget_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = await user_cache().aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await user_cache().aset(key, user, user_cache_timeout())
+        return user
@@ -0,0 +1,198 @@
+import itertools
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.template.base import Template
+from django.test.utils import CaptureQueriesContext
+
+from .counters import recount
+from .models import Dashboard, TodoList, Task, Comment
+
+
+# Тимчасова база для бенчмарків, щоб не чіпати робочу
+@contextmanager
+def scratch_database(verbosity=0):
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+# Штучний словник для текстів завдань і коментарів
+SYLLABLES = ["ка", "ро", "ні", "ма", "ле", "ту", "ві", "зо", "ря", "де", "по", "лу", "се", "ти", "бо", "ха"]
+
+
+def vocabulary(size, rnd):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Наповнення бази даними через bulk_create
+def seed(users=50, dashboards=100, members=2, todolists=300, tasks=10000, comments=10000,
+         batch_size=5000, random_seed=0, words=0, log=None):
+    rnd = random.Random(random_seed)
+
+    # words > 0: тексти з випадкових слів із частотами за законом Ципфа
+    if words:
+        dictionary = vocabulary(5000, rnd)
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(dictionary) + 1)))
+
+        def text(fallback):
+            return " ".join(rnd.choices(dictionary, cum_weights=cum_weights, k=words))
+    else:
+        def text(fallback):
+            return fallback
+
+    statuses = [value for value, _ in Task._meta.get_field("status").choices]
+    priorities = [value for value, _ in Task._meta.get_field("priority").choices]
+
+    def report(message):
+        if log:
+            log(message)
+
+    user_ids = []
+    for batch in _batched((User(username=f"bench_user_{i}", password="!") for i in range(users)), batch_size):
+        user_ids += [user.pk for user in User.objects.bulk_create(batch)]
+    report(f"users: {len(user_ids)}")
+
+    dashboard_ids = []
+    for batch in _batched(
+        (Dashboard(title=f"Дошка {i}", description="bench", created_by_id=rnd.choice(user_ids)) for i in range(dashboards)),
+        batch_size,
+    ):
+        dashboard_ids += [dashboard.pk for dashboard in Dashboard.objects.bulk_create(batch)]
+
+    Membership = Dashboard.members.through
+    memberships = (
+        Membership(dashboard_id=dashboard_id, user_id=user_id)
+        for dashboard_id in dashboard_ids
+        for user_id in rnd.sample(user_ids, min(members, len(user_ids)))
+    )
+    for batch in _batched(memberships, batch_size):
+        Membership.objects.bulk_create(batch, ignore_conflicts=True)
+    report(f"dashboards: {len(dashboard_ids)}")
+
+    todolist_ids = []
+    for batch in _batched(
+        (TodoList(title=f"Список {i}", description="bench", dashboard_id=dashboard_ids[i % len(dashboard_ids)],
+                  created_by_id=rnd.choice(user_ids)) for i in range(todolists)),
+        batch_size,
+    ):
+        todolist_ids += [todolist.pk for todolist in TodoList.objects.bulk_create(batch)]
+    report(f"todolists: {len(todolist_ids)}")
+
+    task_ids = []
+    for batch in _batched(
+        (Task(title=f"Завдання {i}", content=text("bench"), todolist_id=rnd.choice(todolist_ids),
+              status=rnd.choice(statuses), priority=rnd.choice(priorities),
+              created_by_id=rnd.choice(user_ids)) for i in range(tasks)),
+        batch_size,
+    ):
+        task_ids += [task.pk for task in Task.objects.bulk_create(batch)]
+    report(f"tasks: {len(task_ids)}")
+
+    for batch in _batched(
+        (Comment(content=text(f"Коментар {i}"), task_id=rnd.choice(task_ids), created_by_id=rnd.choice(user_ids))
+         for i in range(comments)),
+        batch_size,
+    ):
+        Comment.objects.bulk_create(batch)
+    report(f"comments: {comments}")
+
+    # bulk_create оминає сигнали, тож лічильники заповнюються одним перерахунком
+    recount()
+
+    return {
+        "users": user_ids,
+        "dashboards": dashboard_ids,
+        "todolists": todolist_ids,
+        "tasks": task_ids,
+    }
+
+
+# Кількість запитів за один виклик і час за кілька повторів
+def measure(func, repeat=20):
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "queries": len(queries),
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+# Кількість і сумарний час SQL-запитів; CaptureQueriesContext округлює час до мілісекунд
+@contextmanager
+def query_timer(using=connection):
+    state = {"count": 0, "ms": 0.0}
+
+    def wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            state["count"] += 1
+            state["ms"] += (time.perf_counter() - start) * 1000
+
+    with using.execute_wrapper(wrapper):
+        yield state
+
+
+# Час рендерингу шаблонів: рахуються лише зовнішні виклики, вкладені include уже входять у них.
+# Запити, які шаблон робить лінивими об'єктами (фрагменти при промаху кешу), теж потрапляють сюди.
+@contextmanager
+def template_render_timer():
+    original = Template.render
+    state = {"depth": 0, "ms": 0.0}
+
+    def render(self, context):
+        state["depth"] += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            state["depth"] -= 1
+            if not state["depth"]:
+                state["ms"] += (time.perf_counter() - start) * 1000
+
+    Template.render = render
+    try:
+        yield state
+    finally:
+        Template.render = original
+
+
+# Найбільший обсяг пам'яті, виділеної Python під час виклику, у КіБ
+def peak_memory_kib(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
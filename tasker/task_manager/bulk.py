@@ -0,0 +1,44 @@
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+
+# Багаторядковий INSERT ... RETURNING id пакетами, які дозволяє база. Дешевший за bulk_create,
+# бо значення вже підготовлені і не проходять через get_db_prep_save кожного поля моделі.
+# Повертає id у порядку рядків, як і bulk_create у SQLite і PostgreSQL.
+# Без using — база, куди роутер пише модель (шард поточної дошки).
+def insert_rows(model, columns, rows, returning=True, using=None):
+    connection = connections[using or router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in columns]
+    target = ", ".join(quote(field.column) for field in fields)
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+    suffix = f" RETURNING {quote(model._meta.pk.column)}" if returning else ""
+    size = connection.ops.bulk_batch_size(fields, rows)
+    ids = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            cursor.execute(
+                f"INSERT INTO {quote(model._meta.db_table)} ({target}) "
+                f"VALUES {', '.join([placeholder] * len(chunk))}{suffix}",
+                [value for row in chunk for value in row],
+            )
+            if returning:
+                ids.extend(pk for pk, in cursor.fetchall())
+    return ids
+
+
+# Наступний автоматичний id моделі буде більшим за value. Лічильник лише зростає:
+# AUTOINCREMENT у SQLite і так не видає id, менші за наявні.
+def advance_sequence(model, value, using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    table, pk = model._meta.db_table, model._meta.pk.column
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(%s, nextval(pg_get_serial_sequence(%s, %s))))",
+                           [table, pk, value, table, pk])
+        elif connection.vendor == "sqlite":
+            cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s", [value, table])
+            if not cursor.rowcount:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, value])
+        else:
+            raise NotImplementedError(connection.vendor)
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+LOCAL_CACHE_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+CACHED_SESSION_ENGINES = {
+    "task_manager.sessions",
+    "django.contrib.sessions.backends.cache",
+    "django.contrib.sessions.backends.cached_db",
+}
+
+
+# Кеші, які мають бачити всі процеси: вихід із системи, зміна пароля, is_active=False
+# чи нова версія фрагментів, записані одним процесом, інакше не доходять до решти
+def shared_cache_aliases():
+    aliases = {}
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        aliases.setdefault(settings.SESSION_CACHE_ALIAS, []).append("SESSION_CACHE_ALIAS")
+    if "task_manager.auth.CachedModelBackend" in settings.AUTHENTICATION_BACKENDS:
+        aliases.setdefault(getattr(settings, "USER_CACHE_ALIAS", "default"), []).append("USER_CACHE_ALIAS")
+    # Піднята версія фрагментів має скинути кеш сторінок у всіх процесах
+    aliases.setdefault(getattr(settings, "FRAGMENT_CACHE_ALIAS", "default"), []).append("FRAGMENT_CACHE_ALIAS")
+    return aliases
+
+
+# Кеш у пам'яті процесу годиться лише для одного процесу: runserver (DEBUG) чи тести.
+# CACHE_SINGLE_PROCESS каже, що інших процесів немає.
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    if getattr(settings, "CACHE_SINGLE_PROCESS", settings.DEBUG):
+        return []
+    errors = []
+    for alias, names in shared_cache_aliases().items():
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in LOCAL_CACHE_BACKENDS:
+            errors.append(Error(
+                f"Cache '{alias}' ({backend}) is local to one process, but {', '.join(names)} "
+                "needs a cache shared by all workers.",
+                hint="Set TASKER_CACHE_DIR or configure a shared cache (Redis, Memcached), "
+                     "or set CACHE_SINGLE_PROCESS = True if only one process serves requests.",
+                id="task_manager.E001",
+            ))
+    return errors
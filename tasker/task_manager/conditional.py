@@ -0,0 +1,70 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .fragments import request_variant
+
+
+# Умовний GET для детальних сторінок. Валідатор — Dashboard.last_activity дошки,
+# до якої належить об'єкт: вона змінюється при будь-якому записі в її дереві.
+# Відповідь 304 віддається до вибірки об'єкта і рендерингу шаблону.
+class BaseConditionalGetMixin:
+    last_activity_lookup = "last_activity"
+
+    def last_activity_queryset(self):
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        return self.get_queryset().filter(pk=pk).values_list(self.last_activity_lookup, flat=True)
+
+    # Сильний ETag: сторінка, стан дерева з точністю до мікросекунд, користувач і його CSRF-секрет
+    def get_etag(self, last_activity):
+        parts = (type(self).__name__, self.request.get_full_path(), last_activity.isoformat(),
+                 *request_variant(self.request))
+        return quote_etag(hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest())
+
+    # Валідатори сторінки і готова відповідь 304, якщо клієнт уже має актуальну версію
+    def check_conditions(self, last_activity):
+        etag = self.get_etag(last_activity)
+        last_modified = int(last_activity.timestamp())
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        return response, (etag, last_modified)
+
+    def set_validators(self, response, validators):
+        etag, last_modified = validators
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        # Браузер зберігає сторінку, але щоразу перевіряє її на сервері
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ConditionalGetMixin(BaseConditionalGetMixin):
+    def get_last_activity(self):
+        return self.last_activity_queryset().first()
+
+    def get(self, request, *args, **kwargs):
+        last_activity = self.get_last_activity()
+        if last_activity is None:
+            # Немає доступу або об'єкта: звичайний шлях поверне 404
+            return super().get(request, *args, **kwargs)
+
+        response, validators = self.check_conditions(last_activity)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.set_validators(response, validators)
+
+
+# Те саме для асинхронних view
+class AsyncConditionalGetMixin(BaseConditionalGetMixin):
+    async def aget_last_activity(self):
+        return await self.last_activity_queryset().afirst()
+
+    async def get(self, request, *args, **kwargs):
+        last_activity = await self.aget_last_activity()
+        if last_activity is None:
+            return await super().get(request, *args, **kwargs)
+
+        response, validators = self.check_conditions(last_activity)
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        return self.set_validators(response, validators)
@@ -0,0 +1,145 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .after_commit import deleting
+from .flow import transition_batch
+from .models import Dashboard, TodoList, Task, Comment, status_count_field
+from .shards import current_shard
+
+
+# Денормалізовані лічильники: списки дошки, завдання списку по колонках, коментарі завдання.
+# Кожна зміна — UPDATE ... SET n = n + 1 через F() в тій самій транзакції, що й запис,
+# тож паралельні запити не затирають одне одного. Розбіжність виправляє команда recount.
+
+
+# Пакет: зміни накопичуються і записуються по одному UPDATE на кожен набір приростів,
+# а не по одному на об'єкт. Потрібен для пакетних операцій; викликати всередині транзакції.
+# Заодно групує записи журналу переходів (flow.transition_batch).
+@contextmanager
+def counter_batch(using=None):
+    connection = connections[using or current_shard()]
+    if getattr(connection, "_counter_batch", None) is not None:
+        yield
+        return
+
+    deltas = connection._counter_batch = defaultdict(Counter)
+    try:
+        with transition_batch(connection.alias):
+            yield
+    finally:
+        connection._counter_batch = None
+    _apply(deltas)
+
+
+def _update(model, pks, deltas):
+    model.objects.filter(pk__in=pks).update(**{name: F(name) + delta for name, delta in deltas})
+
+
+def _apply(deltas):
+    groups = defaultdict(list)
+    for (model, pk), counter in deltas.items():
+        changes = tuple(sorted((name, delta) for name, delta in counter.items() if delta))
+        if changes:
+            groups[model, changes].append(pk)
+    for (model, changes), pks in groups.items():
+        _update(model, pks, changes)
+
+
+def adjust(model, pk, **deltas):
+    batch = getattr(connections[current_shard()], "_counter_batch", None)
+    if batch is None:
+        _update(model, [pk], deltas.items())
+    else:
+        batch[model, pk].update(deltas)
+
+
+# Зміни, які викликають обробники сигналів і пакетні шляхи
+
+def todolist_added(todolist):
+    adjust(Dashboard, todolist.dashboard_id, todolist_count=1)
+
+
+def todolist_removed(todolist):
+    deleted = deleting("dashboard")
+    # Лічильник дошки, що сама видаляється в цьому каскаді, оновлювати нема чого
+    if deleted is None or todolist.dashboard_id not in deleted:
+        adjust(Dashboard, todolist.dashboard_id, todolist_count=-1)
+
+
+def task_added(task):
+    adjust(TodoList, task.todolist_id, **{status_count_field(task.status): 1})
+    task._loaded_status = task.status
+
+
+def task_removed(task):
+    deleted = deleting("todolist")
+    if deleted is None or task.todolist_id not in deleted:
+        adjust(TodoList, task.todolist_id, **{status_count_field(task.status): -1})
+
+
+# Картка перейшла в іншу колонку відтоді, як її прочитали з БД
+def task_moved(task):
+    old_status = getattr(task, "_loaded_status", None)
+    if old_status is not None and old_status != task.status:
+        adjust(TodoList, task.todolist_id, **{status_count_field(old_status): -1, status_count_field(task.status): 1})
+    task._loaded_status = task.status
+
+
+def comment_added(comment):
+    adjust(Task, comment.task_id, comment_count=1)
+
+
+def comment_removed(comment):
+    deleted = deleting("task")
+    if deleted is None or comment.task_id not in deleted:
+        adjust(Task, comment.task_id, comment_count=-1)
+
+
+# Перерахунок з нуля
+
+def _count(queryset, parent_field):
+    counts = queryset.filter(**{parent_field: OuterRef("pk")}).order_by().values(parent_field)
+    return Coalesce(Subquery(counts.annotate(n=Count("pk")).values("n")), Value(0))
+
+
+def counter_expressions():
+    statuses = [value for value, _ in Task._meta.get_field("status").choices]
+    return {
+        Dashboard: {"todolist_count": _count(TodoList.objects.filter(deleted_at__isnull=True), "dashboard")},
+        TodoList: {
+            status_count_field(status): _count(Task.objects.filter(status=status), "todolist")
+            for status in statuses
+        },
+        Task: {"comment_count": _count(Comment.objects.all(), "task")},
+    }
+
+
+# Виправляє рядки, де збережені лічильники розходяться з фактичними, діапазонами id
+# по batch_size рядків, щоб не тримати довгу транзакцію. Межі діапазонів беруться з самих id:
+# на шарді вони не починаються з 1 і можуть мати великі прогалини (див. shards.py).
+# Повертає кількість виправлених рядків.
+def recount(models=(Dashboard, TodoList, Task), batch_size=10000):
+    fixed = {}
+    for model, expressions in counter_expressions().items():
+        if model not in models:
+            continue
+        fixed[model._meta.model_name] = 0
+        drift = Q()
+        for name, expression in expressions.items():
+            drift |= ~Q(**{name: F(f"actual_{name}")})
+        last_pk = 0
+        while pks := list(model.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size]):
+            rows = model.objects.filter(pk__gt=last_pk, pk__lte=pks[-1])
+            last_pk = pks[-1]
+            with transaction.atomic(using=current_shard()):
+                drifted = list(
+                    rows.annotate(**{f"actual_{name}": expression for name, expression in expressions.items()})
+                    .filter(drift).values_list("pk", flat=True)
+                )
+                if drifted:
+                    fixed[model._meta.model_name] += model.objects.filter(pk__in=drifted).update(**expressions)
+    return fixed
@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import json
+import secrets
+import threading
+from collections import deque
+
+from .after_commit import transaction_state
+from .models import TodoList
+
+
+# Скільки подій може чекати в черзі одного клієнта; повільний клієнт отримує "reload"
+EVENT_QUEUE_SIZE = 256
+# Скільки останніх подій дошки зберігається для повторної відправки після перепідключення
+EVENT_BACKLOG = 200
+# Інтервал коментаря-пінга, щоб проксі не закривали тихе з'єднання
+HEARTBEAT_SECONDS = 20
+# Затримка перепідключення EventSource, мс
+RETRY_MS = 3000
+
+
+def format_event(event_id, event_type, data):
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+RELOAD_EVENT = "event: reload\ndata: {}\n\n"
+
+
+# Підписка одного клієнта: черга в циклі подій, з якого клієнт підписався
+class Subscription:
+    def __init__(self, dashboard_id, loop):
+        self.dashboard_id = dashboard_id
+        self.loop = loop
+        self.queue = asyncio.Queue(EVENT_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Пропущені події не відновити, тож клієнт отримає команду перезавантажитись
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RELOAD_EVENT)
+
+
+class Channel:
+    def __init__(self, since):
+        self.subscribers = set()
+        self.backlog = deque(maxlen=EVENT_BACKLOG)
+        # Події з номером після since є в backlog, якщо їх не витіснено
+        self.since = since
+
+
+# Розсилка подій у межах процесу. Клієнти — корутини в циклі подій ASGI-сервера,
+# тож тисячі відкритих з'єднань не займають потоків. Публікують події синхронні
+# view після коміту, з будь-якого потоку: доставка йде через call_soon_threadsafe.
+# Повідомлення форматується один раз і однаковий рядок іде всім підписникам дошки.
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._counter = itertools.count(1)
+        self._last = 0
+        # Номери подій діють лише в межах процесу; після перезапуску клієнт перезавантажується
+        self.epoch = secrets.token_hex(4)
+
+    def has_subscribers(self):
+        return bool(self._channels)
+
+    # Повертає підписку і пропущені події; None замість подій — пропущене не відновити
+    def subscribe(self, dashboard_id, last_event_id=None):
+        subscription = Subscription(dashboard_id, asyncio.get_running_loop())
+        with self._lock:
+            channel = self._channels.get(dashboard_id)
+            if channel is None:
+                channel = self._channels[dashboard_id] = Channel(since=self._last)
+            channel.subscribers.add(subscription)
+            missed = self._missed(channel, last_event_id)
+        return subscription, missed
+
+    def _missed(self, channel, last_event_id):
+        if not last_event_id:
+            return []
+        epoch, _, number = last_event_id.partition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        number = int(number)
+        if number < channel.since:
+            return None
+        return [message for event_number, message in channel.backlog if event_number > number]
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            channel = self._channels.get(subscription.dashboard_id)
+            if channel is None:
+                return
+            channel.subscribers.discard(subscription)
+            if not channel.subscribers:
+                del self._channels[subscription.dashboard_id]
+
+    def publish(self, dashboard_id, event_type, data):
+        with self._lock:
+            channel = self._channels.get(dashboard_id)
+            number = self._last = next(self._counter)
+            if channel is None:
+                return
+            message = format_event(f"{self.epoch}-{number}", event_type, data)
+            if len(channel.backlog) == channel.backlog.maxlen:
+                channel.since = channel.backlog[0][0]
+            channel.backlog.append((number, message))
+            subscribers = list(channel.subscribers)
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+
+
+broker = EventBroker()
+
+
+# Потік повідомлень SSE для однієї дошки. Закінчується, коли клієнт відключається
+# (сервер скасовує генератор) або не встигає читати.
+async def event_stream(dashboard_id, last_event_id=None):
+    subscription, missed = broker.subscribe(dashboard_id, last_event_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if missed is None:
+            yield RELOAD_EVENT
+            return
+        for message in missed:
+            yield message
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield message
+            if message is RELOAD_EVENT:
+                return
+    finally:
+        broker.unsubscribe(subscription)
+
+
+# Публікація зі збереження моделей. Події прив'язані до списку; дошки списків
+# визначаються одним запитом на транзакцію. Без жодного підписника нічого не робиться.
+def _publish(events):
+    todolist_ids = {todolist_id for todolist_id, _, _ in events}
+    dashboards = dict(TodoList.objects.filter(pk__in=todolist_ids).values_list("id", "dashboard_id"))
+    for todolist_id, event_type, data in events:
+        if todolist_id in dashboards:
+            broker.publish(dashboards[todolist_id], event_type, {"todolist_id": todolist_id, **data})
+
+
+def _publish_pending(events):
+    if events and broker.has_subscribers():
+        _publish(events)
+
+
+# Колбеки після коміту йдуть у порядку реєстрації: викликати після bump_versions,
+# щоб клієнт, який за подією перечитає фрагмент, не отримав його зі старою версією
+def queue_event(todolist_id, event_type, **data):
+    if not broker.has_subscribers():
+        return
+    events = transaction_state("live-events", list, _publish_pending)
+    if events is None:
+        _publish([(todolist_id, event_type, data)])
+        return
+    events.append((todolist_id, event_type, data))
+
+
+def task_event_data(task):
+    return {"task_id": task.pk, "status": task.status, "position": task.position}
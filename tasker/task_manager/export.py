@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import TodoList, Task, Comment
+
+
+# Вивантаження дошки: списки, завдання і коментарі одним потоком рядків, у CSV або NDJSON.
+# Рядки читаються через values_list().iterator(chunk_size), тож у пам'яті лише один пакет,
+# а вихідний текст віддається шматками по пакету, а не по рядку.
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+# Спільні стовпчики для всіх типів записів; parent_id — дошка, список або завдання
+EXPORT_COLUMNS = ("type", "id", "parent_id", "title", "content", "status", "priority", "deadline", "important",
+                  "position", "created_by", "created_at", "updated_at")
+
+
+# (тип, набір, стовпчик -> поле). Стовпчики, яких немає в типі, лишаються порожніми
+def export_sources(dashboard_id):
+    return [
+        ("todolist", TodoList.objects.filter(dashboard_id=dashboard_id, deleted_at__isnull=True), {
+            "parent_id": "dashboard_id", "title": "title", "content": "description", "important": "important",
+        }),
+        ("task", Task.objects.filter(todolist__dashboard_id=dashboard_id, todolist__deleted_at__isnull=True), {
+            "parent_id": "todolist_id", "title": "title", "content": "content", "status": "status",
+            "priority": "priority", "deadline": "deadline", "position": "position",
+        }),
+        ("comment", Comment.objects.filter(task__todolist__dashboard_id=dashboard_id,
+                                           task__todolist__deleted_at__isnull=True), {
+            "parent_id": "task_id", "content": "content",
+        }),
+    ]
+
+
+def export_rows(dashboard_id, chunk_size=EXPORT_CHUNK_SIZE):
+    for kind, queryset, fields in export_sources(dashboard_id):
+        fields = {"id": "id", **fields, "created_by": "created_by__username",
+                  "created_at": "created_at", "updated_at": "updated_at"}
+        lookups = list(fields.values())
+        positions = [lookups.index(fields[column]) if column in fields else None for column in EXPORT_COLUMNS[1:]]
+        rows = queryset.order_by("id").values_list(*lookups).iterator(chunk_size=chunk_size)
+        for values in rows:
+            yield (kind, *(None if index is None else values[index] for index in positions))
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Дати в ISO 8601, як і в NDJSON
+def _csv_value(value):
+    if value is None:
+        return ""
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _csv_chunks(rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunked(rows, chunk_size):
+        writer.writerows([_csv_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows, chunk_size):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for chunk in _chunked(rows, chunk_size):
+        yield "".join(encoder.encode(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in chunk)
+
+
+# Текст вивантаження шматками для StreamingHttpResponse або файлу
+def export_dashboard(dashboard_id, export_format="csv", chunk_size=EXPORT_CHUNK_SIZE):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(export_format)
+    rows = export_rows(dashboard_id, chunk_size)
+    return (_csv_chunks if export_format == "csv" else _ndjson_chunks)(rows, chunk_size)
@@ -0,0 +1,254 @@
+import datetime
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+from django.db import connections, transaction
+from django.db.models import Min, Q, Sum
+from django.utils import timezone
+
+from .after_commit import deleting
+from .bulk import insert_rows
+from .models import Task, TaskTransition, FlowDaily, CycleTime, FlowRollupState
+from .shards import current_shard
+
+
+# Аналітика потоку робіт дошки. Кожна зміна статусу завдання дописує рядок у журнал
+# TaskTransition; rollup() інкрементально, лише за новими рядками журналу, оновлює щоденні
+# зведення FlowDaily (входи і виходи з колонок) і CycleTime (час циклу кожного завершення).
+# Сторінка аналітики читає тільки зведення і рахує накопичувальний потік і перцентилі
+# векторно в NumPy, не переглядаючи історію.
+
+STATUSES = [value for value, _ in Task._meta.get_field("status").choices]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES, 1)}
+# Цикл завдання — від першого входу в START_STATUS до входу в DONE_STATUS
+START_STATUS = "in_progress"
+DONE_STATUS = "completed"
+CYCLE_PERCENTILES = (50, 85, 95)
+FLOW_DAYS = 30
+ROLLUP_BATCH_SIZE = 10000
+
+
+# Журнал переходів
+
+TRANSITION_COLUMNS = ("todolist", "task_id", "from_status", "to_status", "at")
+
+
+# Пакет: переходи накопичуються і записуються наприкінці багаторядковими INSERT, як і лічильники
+# у counter_batch (який відкриває і цей пакет). Викликати всередині транзакції.
+@contextmanager
+def transition_batch(using=None):
+    connection = connections[using or current_shard()]
+    if getattr(connection, "_transition_batch", None) is not None:
+        yield
+        return
+
+    rows = connection._transition_batch = []
+    try:
+        yield
+    finally:
+        connection._transition_batch = None
+    if rows:
+        insert_rows(TaskTransition, TRANSITION_COLUMNS, rows, returning=False, using=connection.alias)
+
+
+def record(todolist_id, task_id, from_status, to_status, at=None):
+    connection = connections[current_shard()]
+    from_status, to_status, at = STATUS_CODES.get(from_status), STATUS_CODES.get(to_status), at or timezone.now()
+    batch = getattr(connection, "_transition_batch", None)
+    if batch is None:
+        TaskTransition.objects.create(todolist_id=todolist_id, task_id=task_id, from_status=from_status,
+                                      to_status=to_status, at=at)
+    else:
+        batch.append((todolist_id, task_id, from_status, to_status, connection.ops.adapt_datetimefield_value(at)))
+
+
+# Обробники сигналів і пакетні шляхи. Старий статус — _loaded_status, тож task_moved
+# викликається раніше за counters.task_moved, який його оновлює.
+
+def task_added(task):
+    record(task.todolist_id, task.pk, None, task.status)
+
+
+def task_moved(task):
+    old_status = getattr(task, "_loaded_status", None)
+    if old_status is not None and old_status != task.status:
+        record(task.todolist_id, task.pk, old_status, task.status)
+
+
+def task_removed(task):
+    deleted = deleting("todolist")
+    # Переходи видаленого списку зникають разом із ним
+    if deleted is None or task.todolist_id not in deleted:
+        record(task.todolist_id, task.pk, task.status, None)
+
+
+# Завдання м'яко видаленого списку зникають з дошки
+def todolist_removed(todolist):
+    with transition_batch():
+        for pk, status in Task.objects.filter(todolist=todolist).values_list("pk", "status"):
+            record(todolist.pk, pk, status, None)
+
+
+# Зведення
+
+# Зводить до batch_size ще не зведених переходів; повертає їхню кількість. Рядок стану
+# блокується, тож паралельні запуски не врахують той самий перехід двічі. Зведені рядки
+# позначаються rolled_up, а не позицією в журналі: у PostgreSQL id видається під час INSERT,
+# тож транзакція з меншим id може закомітитись уже після зведення більших.
+def rollup_batch(batch_size=ROLLUP_BATCH_SIZE):
+    with transaction.atomic(using=current_shard()):
+        FlowRollupState.objects.select_for_update().get_or_create(pk=1)
+        rows = list(
+            TaskTransition.objects.filter(rolled_up=False).order_by("pk")
+            .values_list("pk", "todolist__dashboard_id", "task_id", "from_status", "to_status", "at")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        deltas = defaultdict(Counter)
+        completions = []
+        for _, dashboard_id, task_id, from_status, to_status, at in rows:
+            day = timezone.localdate(at)
+            if from_status:
+                deltas[dashboard_id, day, from_status]["exited"] += 1
+            if to_status:
+                deltas[dashboard_id, day, to_status]["entered"] += 1
+            if to_status == STATUS_CODES[DONE_STATUS]:
+                completions.append((dashboard_id, day, task_id, at))
+        _add_daily(deltas)
+        _add_cycle_times(completions)
+
+        # Саме ці рядки: за межею id могли з'явитися закомічені вже після читання
+        TaskTransition.objects.filter(pk__in=[row[0] for row in rows]).update(rolled_up=True)
+    return len(rows)
+
+
+# Чи є в журналі ще не зведені переходи: один запит без транзакції і блокувань
+def has_pending():
+    return TaskTransition.objects.filter(rolled_up=False).exists()
+
+
+def rollup(batch_size=ROLLUP_BATCH_SIZE, log=None):
+    if not has_pending():
+        return 0
+    total = 0
+    while True:
+        count = rollup_batch(batch_size)
+        total += count
+        if log and count:
+            log(f"переходів: {total}")
+        if count < batch_size:
+            return total
+
+
+def _add_daily(deltas):
+    existing = FlowDaily.objects.filter(
+        dashboard_id__in={dashboard_id for dashboard_id, _, _ in deltas},
+        day__in={day for _, day, _ in deltas},
+    )
+    totals = {(row.dashboard_id, row.day, row.status): row for row in existing}
+    rows = []
+    for key, delta in deltas.items():
+        row = totals.get(key) or FlowDaily(dashboard_id=key[0], day=key[1], status=key[2])
+        row.entered += delta["entered"]
+        row.exited += delta["exited"]
+        rows.append(row)
+    FlowDaily.objects.bulk_create(rows, update_conflicts=True, unique_fields=["dashboard", "day", "status"],
+                                  update_fields=["entered", "exited"])
+
+
+# Початок циклу — перший вхід у роботу до завершення; завдання, що минуло цю колонку,
+# рахується від появи на дошці
+def _add_cycle_times(completions):
+    if not completions:
+        return
+    starts = {
+        row["task_id"]: row
+        for row in TaskTransition.objects.filter(task_id__in={task_id for _, _, task_id, _ in completions})
+        .values("task_id").annotate(first=Min("at"),
+                                    started=Min("at", filter=Q(to_status=STATUS_CODES[START_STATUS])))
+        .order_by()
+    }
+    cycle_times = []
+    for dashboard_id, day, task_id, at in completions:
+        start = starts[task_id]
+        started = start["started"] if start["started"] is not None and start["started"] <= at else start["first"]
+        cycle_times.append(CycleTime(dashboard_id=dashboard_id, day=day, task_id=task_id,
+                                     seconds=int((at - started).total_seconds())))
+    CycleTime.objects.bulk_create(cycle_times)
+
+
+# Аналітика
+
+# Потік дошки за останні days днів: накопичувальна кількість завдань у кожній колонці
+# на кінець дня, кількість завершених за день і перцентилі часу циклу в днях
+def dashboard_flow(dashboard_id, days=FLOW_DAYS, today=None):
+    today = today or timezone.localdate()
+    start = today - datetime.timedelta(days=days - 1)
+    daily = FlowDaily.objects.filter(dashboard_id=dashboard_id)
+
+    # Усе до початку вікна — один підсумок на колонку
+    baseline = np.zeros(len(STATUSES), dtype=np.int64)
+    for row in daily.filter(day__lt=start).values("status").annotate(entered=Sum("entered"), exited=Sum("exited")):
+        baseline[row["status"] - 1] = row["entered"] - row["exited"]
+
+    entered = np.zeros((days, len(STATUSES)), dtype=np.int64)
+    exited = np.zeros_like(entered)
+    window = list(daily.filter(day__gte=start, day__lte=today).values_list("day", "status", "entered", "exited"))
+    if window:
+        day, status, entered_count, exited_count = (np.array(column) for column in zip(*window))
+        index = (np.array([(value - start).days for value in day]), status - 1)
+        entered[index] = entered_count
+        exited[index] = exited_count
+    cumulative = baseline + np.cumsum(entered - exited, axis=0)
+    throughput = entered[:, STATUSES.index(DONE_STATUS)]
+
+    seconds = np.fromiter(
+        CycleTime.objects.filter(dashboard_id=dashboard_id, day__gte=start, day__lte=today)
+        .values_list("seconds", flat=True),
+        dtype=np.float64,
+    )
+    percentiles = np.percentile(seconds, CYCLE_PERCENTILES) / 86400 if seconds.size else [None] * len(CYCLE_PERCENTILES)
+
+    return {
+        "days": [start + datetime.timedelta(days=offset) for offset in range(days)],
+        "statuses": STATUSES,
+        "cumulative": {status: cumulative[:, index].tolist() for index, status in enumerate(STATUSES)},
+        "throughput": throughput.tolist(),
+        "completed": int(throughput.sum()),
+        "throughput_per_day": float(throughput.mean()),
+        "cycle_time": {
+            percentile: None if value is None else round(float(value), 1)
+            for percentile, value in zip(CYCLE_PERCENTILES, percentiles)
+        },
+        "cycle_time_count": int(seconds.size),
+    }
+
+
+# Смуги діаграми накопичувального потоку для SVG: колонки складаються знизу вгору
+# у порядку STATUSES, кожна смуга — многокутник між своєю нижньою і верхньою межею
+def cumulative_flow_bands(flow, width=600, height=200):
+    stacked = np.cumsum(np.array([flow["cumulative"][status] for status in STATUSES], dtype=np.float64), axis=0)
+    top = stacked[-1].max() if stacked.size else 0
+    scale = height / top if top else 0
+    x = np.linspace(0, width, stacked.shape[1]) if stacked.shape[1] > 1 else np.zeros(1)
+    lower = np.zeros(stacked.shape[1])
+    bands = []
+    for status, upper in zip(STATUSES, stacked):
+        points = [*zip(x, height - upper * scale), *zip(x[::-1], (height - lower * scale)[::-1])]
+        bands.append((status, " ".join(f"{px:.1f},{py:.1f}" for px, py in points)))
+        lower = upper
+    return bands
+
+
+# Стовпчики завершених за день для SVG: (день, кількість, x, y, ширина, висота)
+def throughput_bars(flow, width=600, height=120):
+    counts = np.array(flow["throughput"], dtype=np.float64)
+    scale = height / counts.max() if counts.size and counts.max() else 0
+    step = width / len(counts) if counts.size else 0
+    return [
+        (day, int(count), round(index * step + 1, 1), round(height - count * scale, 1),
+         round(max(step - 2, 1), 1), round(count * scale, 1))
+        for index, (day, count) in enumerate(zip(flow["days"], counts))
+    ]
@@ -161,3 +161,22 @@ class CommentCreateForm(forms.ModelForm):
         if not content or len(content.strip()) == 0:
             raise forms.ValidationError("Коментар не може бути порожнім.")
         return content
+
+
+# Завантаження файлу для імпорту в дошку (див. importer.py)
+class DashboardImportForm(forms.Form):
+    file = forms.FileField(
+        label="Файл",
+        widget=forms.ClearableFileInput(attrs={
+            "class": "form-control-custom",
+            "accept": ".csv,.ndjson,.jsonl,.gz",
+        })
+    )
+    import_format = forms.ChoiceField(
+        label="Формат",
+        required=False,
+        choices=[("", "За розширенням"), ("csv", "CSV"), ("ndjson", "NDJSON")],
+        widget=forms.Select(attrs={
+            "class": "form-control-custom",
+        })
+    )
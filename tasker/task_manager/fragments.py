@@ -0,0 +1,100 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.middleware.csrf import get_token
+
+from .after_commit import transaction_state
+
+
+FRAGMENT_KEY_PREFIX = "fragment"
+VERSION_KEY_PREFIX = "fragment-version"
+
+
+def get_fragment_cache():
+    return caches[getattr(settings, "FRAGMENT_CACHE_ALIAS", "default")]
+
+
+def get_fragment_timeout():
+    return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 3600)
+
+
+# Лічильник версії для дошки, списку чи користувача
+def version_key(kind, pk):
+    return f"{VERSION_KEY_PREFIX}:{kind}:{pk}"
+
+
+# Нова версія — поточний час у наносекундах: навіть якщо кеш витіснив лічильник,
+# він не повернеться до старого значення і не оживить застарілі фрагменти
+def _new_version():
+    return time.time_ns()
+
+
+def get_versions(*keys):
+    cache = get_fragment_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def _bump(keys):
+    if keys:
+        version = _new_version()
+        get_fragment_cache().set_many({key: version for key in keys}, timeout=None)
+
+
+# Поза транзакцією версії піднімаються одразу, інакше — після коміту, щоб паралельний запит
+# не закешував ще старі дані під новою версією. Ключі транзакції збираються в множину
+# і записуються в кеш один раз.
+def bump_versions(*keys):
+    pending = transaction_state("fragment-versions", set, _bump)
+    if pending is None:
+        _bump(set(keys))
+    else:
+        pending.update(keys)
+
+
+# Лічильники влучань і промахів по фрагментах у межах процесу
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def record_fragment_lookup(name, hit):
+    with _stats_lock:
+        _stats.setdefault(name, Counter())["hits" if hit else "misses"] += 1
+
+
+def fragment_stats():
+    with _stats_lock:
+        fragments = {name: {"hits": counter["hits"], "misses": counter["misses"]} for name, counter in _stats.items()}
+    return {
+        "hits": sum(item["hits"] for item in fragments.values()),
+        "misses": sum(item["misses"] for item in fragments.values()),
+        "fragments": fragments,
+    }
+
+
+def reset_fragment_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# Сторінки містять CSRF-токени форм видалення, тому кешований HTML залежить від
+# користувача і від його CSRF-секрету, а не лише від даних
+def request_variant(request):
+    get_token(request)
+    return request.user.pk, request.META.get("CSRF_COOKIE", "")
+
+
+def fragment_key(request, name, vary_on):
+    parts = (*request_variant(request), *vary_on)
+    digest = hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f"{FRAGMENT_KEY_PREFIX}:{name}:{digest}"
@@ -0,0 +1,335 @@
+import csv
+import gzip
+import io
+import json
+import time
+from collections import Counter
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import flow
+from .activity import touch_dashboard
+from .bulk import insert_rows
+from .counters import adjust, counter_batch
+from .forms import TodoListCreateForm, TaskCreateForm, CommentCreateForm
+from .fragments import bump_versions, version_key
+from .models import TodoList, Task, Comment, SearchDocument, status_count_field
+from .shards import current_shard
+from .signals import send_saved
+
+
+# Імпорт списків, завдань і коментарів у дошку з CSV або NDJSON у форматі export.py
+# (type, id, parent_id, title, content, ...). Файл читається потоково, рядки перевіряються
+# правилами форм створення, а записуються пакетами багаторядкових INSERT, кожен у своїй транзакції.
+# parent_id вказує на id з того ж файлу або на наявний список чи завдання цієї дошки;
+# рядок без type вважається завданням.
+
+IMPORT_BATCH_SIZE = 5000
+IMPORT_FORMATS = ("csv", "ndjson")
+# Скільки помилок рядків потрапляє у звіт; рахуються всі
+IMPORT_ERROR_LIMIT = 1000
+# Поле форми -> стовпчик файлу, якщо назви різняться (опис списку вивантажується як content)
+IMPORT_COLUMNS = {"todolist": {"description": "content"}}
+
+
+class ImportRowError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+# Формат за розширенням файлу (.csv, .ndjson, .jsonl, також стиснені .gz); None — невідомий
+def import_format_for(name):
+    name = name.lower().removesuffix(".gz")
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return None
+
+
+# Текстовий потік над двійковим файлом: .gz розпаковується на льоту, BOM з Excel відкидається
+def open_import(binary, name):
+    if name.lower().endswith(".gz"):
+        binary = gzip.GzipFile(fileobj=binary)
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+# (номер рядка, запис, помилка) для кожного рядка файлу
+def parse_rows(stream, import_format):
+    if import_format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, None, ImportRowError({"__all__": ["Некоректний JSON"]})
+            continue
+        if isinstance(record, dict):
+            yield line_no, record, None
+        else:
+            yield line_no, None, ImportRowError({"__all__": ["Очікується об'єкт JSON"]})
+
+
+# Перевірка рядка тими самими полями і методами clean_<поле>, що й у формі, але без
+# створення форми на кожен рядок. Порожні поля зі значенням за замовчуванням у моделі
+# отримують його, як і в API. У полів вибору, дат і прапорців різних значень небагато,
+# тож результат їхньої перевірки запам'ятовується за сирим значенням.
+class RowValidator:
+    cached_fields = (forms.ChoiceField, forms.DateField, forms.BooleanField)
+    cache_limit = 10000
+
+    def __init__(self, form_class, columns=None):
+        self.form = form_class()
+        columns = columns or {}
+        self.fields = [
+            (name, columns.get(name, name), field, getattr(self.form, f"clean_{name}", None),
+             {} if isinstance(field, self.cached_fields) else None)
+            for name, field in self.form.fields.items()
+        ]
+        self.defaults = {
+            field.name: field.get_default()
+            for field in form_class._meta.model._meta.concrete_fields
+            if field.name in self.form.fields and field.has_default()
+        }
+
+    def clean_field(self, name, field, clean_method, value):
+        cleaned = self.form.cleaned_data[name] = field.clean(value)
+        return clean_method() if clean_method else cleaned
+
+    def clean(self, record):
+        self.form.cleaned_data = cleaned = {}
+        errors = {}
+        for name, column, field, clean_method, cache in self.fields:
+            value = record.get(name, record.get(column))
+            if value in (None, "") and name in self.defaults:
+                value = self.defaults[name]
+            key = value if cache is not None and isinstance(value, (str, bool, type(None))) else None
+            if key is not None and key in cache:
+                result, messages = cache[key]
+            else:
+                try:
+                    result, messages = self.clean_field(name, field, clean_method, value), None
+                except ValidationError as e:
+                    result, messages = None, e.messages
+                if key is not None and len(cache) < self.cache_limit:
+                    cache[key] = result, messages
+            if messages:
+                errors[name] = messages
+            else:
+                cleaned[name] = result
+        if errors:
+            raise ImportRowError(errors)
+        return cleaned
+
+
+def _file_id(value):
+    return "" if value is None else str(value).strip()
+
+
+TASK_COLUMNS = ("todolist", "title", "content", "status", "priority", "deadline", "position",
+                "comment_count", "created_by", "created_at", "updated_at")
+COMMENT_COLUMNS = ("task", "content", "created_by", "created_at", "updated_at")
+SEARCH_COLUMNS = ("kind", "object_id", "dashboard", "todolist", "task", "comment", "title", "body")
+
+
+class BoardImporter:
+    def __init__(self, dashboard, user, batch_size=IMPORT_BATCH_SIZE, todolist=None):
+        self.dashboard = dashboard
+        self.user = user
+        self.batch_size = batch_size
+        # Список для завдань без parent_id
+        self.default_todolist_id = todolist.pk if todolist else None
+        self.validators = {
+            "todolist": RowValidator(TodoListCreateForm, IMPORT_COLUMNS["todolist"]),
+            "task": RowValidator(TaskCreateForm),
+            "comment": RowValidator(CommentCreateForm),
+        }
+        self.pending = {"todolist": [], "task": [], "comment": []}
+        # id з файлу, що ще чекають на запис, і вже записані: id з файлу -> id списку
+        # або (id завдання, id списку)
+        self.pending_ids = {"todolist": set(), "task": set()}
+        self.todolists = {}
+        self.tasks = {}
+        self.existing_todolists = set(
+            TodoList.objects.filter(dashboard=dashboard, deleted_at__isnull=True).values_list("pk", flat=True)
+        )
+        self.existing_tasks = {}
+        self.created = Counter()
+        self.rows = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, line_no, errors):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_ERROR_LIMIT:
+            self.errors.append({"line": line_no, "errors": errors})
+
+    def add(self, line_no, record):
+        self.rows += 1
+        kind = (record.get("type") or "task").strip()
+        validator = self.validators.get(kind)
+        try:
+            if validator is None:
+                raise ImportRowError({"type": [f"Невідомий тип запису: {kind}"]})
+            data = validator.clean(record)
+            item = getattr(self, f"build_{kind}")(data, _file_id(record.get("parent_id")))
+        except ImportRowError as e:
+            self.error(line_no, e.errors)
+            return
+
+        file_id = _file_id(record.get("id"))
+        if kind in self.pending_ids and file_id:
+            self.pending_ids[kind].add(file_id)
+        self.pending[kind].append((file_id, item))
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    # Рядки для запису і пошук батьківських об'єктів
+
+    def build_todolist(self, data, parent_id):
+        return TodoList(dashboard=self.dashboard, created_by=self.user, **data)
+
+    def build_task(self, data, parent_id):
+        todolist_id = self.resolve_todolist(parent_id) if parent_id else self.default_todolist_id
+        if todolist_id is None:
+            raise ImportRowError({"parent_id": ["Не вказано список завдання"]})
+        return todolist_id, data
+
+    def build_comment(self, data, parent_id):
+        return (*self.resolve_task(parent_id), data["content"])
+
+    def resolve_todolist(self, parent_id):
+        if parent_id in self.pending_ids["todolist"]:
+            self.flush("todolist")
+        todolist_id = self.todolists.get(parent_id)
+        if todolist_id is None and parent_id.isdigit() and int(parent_id) in self.existing_todolists:
+            todolist_id = int(parent_id)
+        if todolist_id is None:
+            raise ImportRowError({"parent_id": [f"Список {parent_id} не знайдено"]})
+        return todolist_id
+
+    def resolve_task(self, parent_id):
+        if parent_id in self.pending_ids["task"]:
+            self.flush("task")
+        task = self.tasks.get(parent_id)
+        if task is None and parent_id.isdigit():
+            task = self.existing_task(int(parent_id))
+        if task is None:
+            raise ImportRowError({"parent_id": [f"Завдання {parent_id} не знайдено"]})
+        return task
+
+    def existing_task(self, pk):
+        if pk not in self.existing_tasks:
+            todolist_id = Task.objects.filter(
+                pk=pk, todolist__dashboard=self.dashboard, todolist__deleted_at__isnull=True,
+            ).values_list("todolist_id", flat=True).first()
+            self.existing_tasks[pk] = (pk, todolist_id) if todolist_id is not None else None
+        return self.existing_tasks[pk]
+
+    # Запис пакетами, кожен у своїй транзакції. Сигнали не шлються, тож лічильники, журнал
+    # переходів, пошуковий індекс і кеш фрагментів оновлюються по пакету; списків мало, для них —
+    # звичайні bulk_create і post_save.
+
+    def flush(self, kind):
+        batch = self.pending[kind]
+        if not batch:
+            return
+        if kind == "task":
+            self.flush("todolist")
+        elif kind == "comment":
+            self.flush("task")
+        self.pending[kind] = []
+        with transaction.atomic(using=current_shard()), counter_batch():
+            ids = getattr(self, f"save_{kind}s")([item for _, item in batch])
+            touch_dashboard(self.dashboard.pk)
+        self.created[kind] += len(batch)
+
+        if kind in self.pending_ids:
+            self.pending_ids[kind].clear()
+            registry = self.todolists if kind == "todolist" else self.tasks
+            for (file_id, item), pk in zip(batch, ids):
+                if file_id:
+                    registry[file_id] = pk if kind == "todolist" else (pk, item[0])
+
+    def save_todolists(self, todolists):
+        TodoList.objects.bulk_create(todolists)
+        send_saved(TodoList, todolists, created=True)
+        ids = [todolist.pk for todolist in todolists]
+        self.existing_todolists.update(ids)
+        return ids
+
+    def save_tasks(self, tasks):
+        ops = connections[current_shard()].ops
+        now = ops.adapt_datetimefield_value(timezone.now())
+        positions = Task.end_positions([(todolist_id, data["status"]) for todolist_id, data in tasks])
+        ids = insert_rows(Task, TASK_COLUMNS, [
+            (todolist_id, data["title"], data["content"], data["status"], data["priority"],
+             ops.adapt_datefield_value(data["deadline"]), position, 0, self.user.pk, now, now)
+            for (todolist_id, data), position in zip(tasks, positions)
+        ])
+
+        at = timezone.now()
+        for pk, (todolist_id, data) in zip(ids, tasks):
+            flow.record(todolist_id, pk, None, data["status"], at)
+        columns = Counter((todolist_id, data["status"]) for todolist_id, data in tasks)
+        for (todolist_id, status), count in columns.items():
+            adjust(TodoList, todolist_id, **{status_count_field(status): count})
+        insert_rows(SearchDocument, SEARCH_COLUMNS, [
+            ("task", pk, self.dashboard.pk, todolist_id, pk, None, data["title"], data["content"])
+            for pk, (todolist_id, data) in zip(ids, tasks)
+        ], returning=False)
+        bump_versions(*{version_key("todolist", todolist_id) for todolist_id, _ in columns})
+        return ids
+
+    def save_comments(self, comments):
+        now = connections[current_shard()].ops.adapt_datetimefield_value(timezone.now())
+        ids = insert_rows(Comment, COMMENT_COLUMNS, [
+            (task_id, content, self.user.pk, now, now) for task_id, _, content in comments
+        ])
+
+        for task_id, count in Counter(task_id for task_id, _, _ in comments).items():
+            adjust(Task, task_id, comment_count=count)
+        insert_rows(SearchDocument, SEARCH_COLUMNS, [
+            ("comment", pk, self.dashboard.pk, todolist_id, task_id, pk, "", content)
+            for pk, (task_id, todolist_id, content) in zip(ids, comments)
+        ], returning=False)
+        bump_versions(*{version_key("todolist", todolist_id) for _, todolist_id, _ in comments})
+        return ids
+
+    def finish(self):
+        for kind in ("todolist", "task", "comment"):
+            self.flush(kind)
+        return self.report()
+
+    def report(self):
+        seconds = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "created": {kind: self.created[kind] for kind in ("todolist", "task", "comment")},
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds) if seconds else None,
+        }
+
+
+def import_board(stream, import_format, dashboard, user, batch_size=IMPORT_BATCH_SIZE, todolist=None):
+    importer = BoardImporter(dashboard, user, batch_size=batch_size, todolist=todolist)
+    for line_no, record, error in parse_rows(stream, import_format):
+        if error is not None:
+            importer.rows += 1
+            importer.error(line_no, error.errors)
+        else:
+            importer.add(line_no, record)
+    return importer.finish()
@@ -0,0 +1,45 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.archive import ARCHIVE_BATCH_SIZE, ARCHIVE_STATUSES, archivable_tasks, archive, restore_tasks
+from task_manager.models import Task
+from task_manager.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = ("Переносить завдання, що давно лежать в архівній колонці, разом із коментарями в архівні таблиці; "
+            "запускається за розкладом (cron). З --restore повертає завдання з архіву")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=90,
+                            help="Скільки днів завдання не змінювалося")
+        parser.add_argument("--status", default=",".join(ARCHIVE_STATUSES),
+                            help="Статуси завдань, що переносяться, через кому")
+        parser.add_argument("--todolist", type=int, help="Лише завдання цього списку")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--restore", type=int, nargs="+", metavar="TASK_ID",
+                            help="Повернути ці завдання з архіву")
+
+    def handle(self, *args, **options):
+        if options["restore"]:
+            # Завдання шукаються на всіх шардах: id між шардами не повторюються
+            restored = sum(restore_tasks(options["restore"]) for _ in each_shard())
+            self.stdout.write(self.style.SUCCESS(f"Відновлено завдань: {restored}"))
+            return
+
+        statuses = [status.strip() for status in options["status"].split(",") if status.strip()]
+        known = {value for value, _ in Task._meta.get_field("status").choices}
+        if not statuses or not known.issuperset(statuses):
+            raise CommandError(f"Невідомі статуси: {', '.join(sorted(set(statuses) - known)) or '(порожньо)'}")
+
+        queryset = archivable_tasks(datetime.timedelta(days=options["older_than_days"]), statuses)
+        if options["todolist"]:
+            queryset = queryset.filter(todolist_id=options["todolist"])
+        tasks = comments = 0
+        for alias in each_shard():
+            shard_tasks, shard_comments = archive(queryset, options["batch_size"],
+                                                  log=lambda message: self.stdout.write(f"  {alias}: {message}"))
+            tasks += shard_tasks
+            comments += shard_comments
+        self.stdout.write(self.style.SUCCESS(f"Заархівовано завдань: {tasks}, коментарів: {comments}"))
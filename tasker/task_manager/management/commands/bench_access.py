@@ -0,0 +1,93 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.test import RequestFactory
+
+from task_manager.bench import scratch_database, seed, measure
+from task_manager.models import Dashboard, TodoList, Task, Comment
+from task_manager.views import DashboardAccessMixin, TodoListAccessMixin, TaskAccessMixin, CommentAccessMixin
+
+
+# Старі міксини з вкладеними підзапитами та DISTINCT, для порівняння
+def legacy_dashboards(user):
+    return Dashboard.objects.filter(Q(created_by=user) | Q(members=user)).distinct()
+
+
+def legacy_todolists(user):
+    return TodoList.objects.filter(dashboard__in=legacy_dashboards(user)).distinct()
+
+
+def legacy_tasks(user):
+    return Task.objects.filter(todolist__in=legacy_todolists(user)).distinct()
+
+
+def legacy_comments(user):
+    return Comment.objects.filter(task__in=legacy_tasks(user)).distinct()
+
+
+class Command(BaseCommand):
+    help = "Порівнює старі та нові міксини доступу на тимчасовій базі з тестовими даними"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--dashboards", type=int, default=10_000)
+        parser.add_argument("--todolists", type=int, default=30_000)
+        parser.add_argument("--tasks", type=int, default=1_000_000)
+        parser.add_argument("--comments", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.stdout.write("Наповнення бази...")
+            seed(
+                users=options["users"],
+                dashboards=options["dashboards"],
+                todolists=options["todolists"],
+                tasks=options["tasks"],
+                comments=options["comments"],
+                log=lambda message: self.stdout.write(f"  {message}"),
+            )
+            self.run_benchmark(options["repeat"])
+
+    def run_benchmark(self, repeat):
+        factory = RequestFactory()
+        comment = Comment.objects.select_related("task__todolist__dashboard").order_by("?").first()
+        task = comment.task
+        todolist = task.todolist
+        dashboard = todolist.dashboard
+        user = User.objects.get(pk=dashboard.created_by_id)
+
+        # Кожен виклик отримує новий запит, тож вартість визначення доступу теж входить у вимір
+        def mixin(mixin_class):
+            view = mixin_class()
+            view.request = factory.get("/")
+            view.request.user = user
+            return view
+
+        cases = [
+            ("dashboard",
+             lambda: legacy_dashboards(user).get(pk=dashboard.pk),
+             lambda: DashboardAccessMixin.get_queryset(mixin(DashboardAccessMixin)).get(pk=dashboard.pk)),
+            ("todolist",
+             lambda: legacy_todolists(user).get(pk=todolist.pk),
+             lambda: mixin(TodoListAccessMixin).get_queryset().get(pk=todolist.pk)),
+            ("task",
+             lambda: legacy_tasks(user).get(pk=task.pk),
+             lambda: mixin(TaskAccessMixin).get_queryset().get(pk=task.pk)),
+            ("comment",
+             lambda: legacy_comments(user).get(pk=comment.pk),
+             lambda: mixin(CommentAccessMixin).get_queryset().get(pk=comment.pk)),
+            ("board",
+             lambda: list(legacy_tasks(user).filter(todolist_id=todolist.pk)),
+             lambda: list(mixin(TaskAccessMixin).get_queryset().filter(todolist_id=todolist.pk))),
+        ]
+
+        header = f"{'case':<10} {'old q':>6} {'old p50':>9} {'old p95':>9} {'new q':>6} {'new p50':>9} {'new p95':>9}"
+        self.stdout.write(header)
+        for name, old, new in cases:
+            before = measure(old, repeat)
+            after = measure(new, repeat)
+            self.stdout.write(
+                f"{name:<10} {before['queries']:>6} {before['median_ms']:>8.2f}ms {before['p95_ms']:>8.2f}ms "
+                f"{after['queries']:>6} {after['median_ms']:>8.2f}ms {after['p95_ms']:>8.2f}ms"
+            )
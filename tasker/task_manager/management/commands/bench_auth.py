@@ -0,0 +1,92 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from task_manager.bench import query_timer, scratch_database, seed
+from task_manager.models import Task
+
+
+# Сесії в таблиці і користувач з бази в кожному запиті, як до кешованих сесій
+DATABASE_AUTH = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+    "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+}
+
+
+class Command(BaseCommand):
+    help = ("Порівнює кількість і час SQL-запитів на запит залогіненого користувача до дошки "
+            "з сесіями в базі і з кешованими сесіями та користувачем, на тимчасовій базі")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--dashboards", type=int, default=200)
+        parser.add_argument("--todolists", type=int, default=600)
+        parser.add_argument("--tasks", type=int, default=20_000)
+        parser.add_argument("--comments", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.stdout.write("Наповнення бази...")
+            seed(users=options["users"], dashboards=options["dashboards"], todolists=options["todolists"],
+                 tasks=options["tasks"], comments=options["comments"],
+                 log=lambda message: self.stdout.write(f"  {message}"))
+            self.run_benchmark(options["repeat"])
+
+    # Типовий потік дошки: сторінка, перетягування картки і пакет переміщень
+    def cases(self):
+        task = Task.objects.select_related("todolist__dashboard").order_by("-id").first()
+        todolist = task.todolist
+        dashboard = todolist.dashboard
+        moves = [{"task_id": task.pk, "status": "in_progress", "prev_id": None, "next_id": None}]
+        return User.objects.get(pk=dashboard.created_by_id), [
+            ("board", "get", reverse("main"), {"dashboard": dashboard.pk, "todolist": todolist.pk}, None),
+            ("dashboard", "get", reverse("dashboard_detail", kwargs={"dashboard_pk": dashboard.pk}), None, None),
+            ("drag", "post", reverse("task_update_status"), {"task_id": task.pk, "status": "completed"}, None),
+            ("move", "post", reverse("task_batch_move") + f"?dashboard={dashboard.pk}",
+             json.dumps({"moves": moves}), "application/json"),
+        ]
+
+    # Запит у транзакції, яку потім відкочуємо, щоб записи не накопичувались між повторами
+    def send(self, client, method, path, data, content_type):
+        kwargs = {"content_type": content_type} if content_type else {}
+        with transaction.atomic():
+            with query_timer() as queries:
+                start = time.perf_counter()
+                getattr(client, method)(path, data, **kwargs)
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        return queries["count"], elapsed
+
+    # Новий клієнт для кожного варіанта: SessionMiddleware запам'ятовує рушій сесій при першому запиті
+    def measure(self, user, cases, repeat):
+        cache.clear()
+        # Порожній ALLOWED_HOSTS у режимі DEBUG пропускає localhost
+        host = next((host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")), "localhost")
+        client = Client(SERVER_NAME=host)
+        client.force_login(user)
+        results = {}
+        for name, method, path, data, content_type in cases:
+            self.send(client, method, path, data, content_type)
+            runs = [self.send(client, method, path, data, content_type) for _ in range(repeat)]
+            results[name] = (runs[-1][0], statistics.median(elapsed for _, elapsed in runs))
+        return results
+
+    def run_benchmark(self, repeat):
+        user, cases = self.cases()
+        with override_settings(**DATABASE_AUTH):
+            before = self.measure(user, cases, repeat)
+        after = self.measure(user, cases, repeat)
+
+        self.stdout.write(f"{'case':<10} {'old q':>6} {'old p50':>9} {'new q':>6} {'new p50':>9}")
+        for name, *_ in cases:
+            self.stdout.write(f"{name:<10} {before[name][0]:>6} {before[name][1]:>8.2f}ms "
+                              f"{after[name][0]:>6} {after[name][1]:>8.2f}ms")
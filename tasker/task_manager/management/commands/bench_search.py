@@ -0,0 +1,82 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from task_manager.access import dashboard_ids_for_user
+from task_manager.bench import scratch_database, seed, measure, vocabulary
+from task_manager.models import Dashboard
+from task_manager.search import PREFIX_MAX_LENGTH, search
+
+
+class Command(BaseCommand):
+    help = "Вимірює час пошуку на тимчасовій базі з тестовими даними і падає, якщо p95 перевищує бюджет"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--dashboards", type=int, default=10_000)
+        parser.add_argument("--todolists", type=int, default=30_000)
+        parser.add_argument("--tasks", type=int, default=1_000_000)
+        parser.add_argument("--comments", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=30)
+        parser.add_argument("--budget-ms", type=float, default=50.0)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.stdout.write("Наповнення бази...")
+            ids = seed(
+                users=options["users"],
+                dashboards=options["dashboards"],
+                todolists=options["todolists"],
+                tasks=options["tasks"],
+                comments=options["comments"],
+                words=8,
+                log=lambda message: self.stdout.write(f"  {message}"),
+            )
+            call_command("rebuild_search_index", stdout=self.stdout)
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            failures = self.run_benchmark(ids, options["repeat"], options["budget_ms"])
+
+        if failures:
+            raise CommandError("Перевищено бюджет: " + ", ".join(failures))
+
+    def run_benchmark(self, ids, repeat, budget_ms):
+        # Той самий словник, що й у seed з random_seed=0: часті слова на початку, рідкісні в кінці
+        dictionary = vocabulary(5000, random.Random(0))
+        long_word = next(word for word in dictionary if len(word) > PREFIX_MAX_LENGTH)
+        queries = {
+            "часте слово": dictionary[0],
+            "рідкісне слово": dictionary[-1],
+            "два слова": f"{dictionary[1]} {dictionary[50]}",
+            "префікс": dictionary[10][:3],
+            "довгий префікс": long_word[:PREFIX_MAX_LENGTH],
+            "довге слово": long_word,
+        }
+
+        # Звичайний користувач і учасник усіх дошок (обмеження через підзапит доступу)
+        owner = User.objects.get(pk=Dashboard.objects.values_list("created_by_id", flat=True).first())
+        member = User.objects.create(username="bench_member_all", password="!")
+        Dashboard.members.through.objects.bulk_create(
+            [Dashboard.members.through(dashboard_id=pk, user_id=member.pk) for pk in ids["dashboards"]],
+            batch_size=5000,
+        )
+
+        failures = []
+        for user in (owner, member):
+            dashboard_ids = dashboard_ids_for_user(user)
+            for name, query in queries.items():
+                result = measure(lambda: search(user, query, dashboard_ids), repeat)
+                found = len(search(user, query, dashboard_ids))
+                label = f"{user.username} ({len(dashboard_ids)} дошок), {name}"
+                over = result["p95_ms"] > budget_ms
+                status = self.style.ERROR("FAIL") if over else self.style.SUCCESS("ok")
+                self.stdout.write(
+                    f"{label:<52} знайдено {found:>3}  median {result['median_ms']:7.2f} ms  "
+                    f"p95 {result['p95_ms']:7.2f} ms  {status}"
+                )
+                if over:
+                    failures.append(label)
+        return failures
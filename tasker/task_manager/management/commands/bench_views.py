@@ -0,0 +1,269 @@
+import json
+import platform
+import statistics
+import time
+from http.cookies import SimpleCookie
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import URLPattern, reverse
+
+from task_manager import urls
+from task_manager.bench import peak_memory_kib, query_timer, scratch_database, seed, template_render_timer
+from task_manager.models import Comment
+
+
+REPORT_VERSION = 1
+
+# Потік подій не завершується сам, тож через тестовий клієнт його не виміряти
+SKIPPED = {"dashboard_events": "нескінченний потік SSE"}
+
+FORM_DATA = {
+    "dashboard": {"title": "Бенчмарк", "description": "Опис"},
+    "todolist": {"title": "Бенчмарк", "description": "Опис"},
+    "task": {"title": "Бенчмарк", "content": "Текст", "status": "draft", "priority": "low"},
+    "comment": {"content": "Бенчмарк"},
+}
+
+# Метрики, які порівнюються з базовим звітом, і найменша різниця, яку вважаємо шумом
+TIMED_METRICS = {"time_ms": 5.0, "query_ms": 2.0, "render_ms": 2.0, "peak_kib": 256.0}
+COUNTED_METRICS = ("queries", "queries_warm")
+
+
+class Command(BaseCommand):
+    help = ("Проходить усі маршрути task_manager/urls.py тестовим клієнтом на засіяній базі і записує "
+            "для кожного кількість і час запитів, час рендерингу шаблонів і пік пам'яті у JSON-звіт; "
+            "з --baseline порівнює з попереднім звітом і падає на регресіях")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--dashboards", type=int, default=200)
+        parser.add_argument("--todolists", type=int, default=600)
+        parser.add_argument("--tasks", type=int, default=20_000)
+        parser.add_argument("--comments", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--only", help="Лише маршрути з цими назвами, через кому")
+        parser.add_argument("--no-seed", action="store_true",
+                            help="Виміряти на поточній базі (наприклад, після seed_bench) без тимчасової")
+        parser.add_argument("--output", help="Куди записати JSON-звіт")
+        parser.add_argument("--baseline", help="Попередній звіт для порівняння")
+        parser.add_argument("--tolerance", type=float, default=0.5,
+                            help="Допустиме відносне зростання часу і пам'яті (0.5 — на 50%%)")
+        parser.add_argument("--strict-timing", action="store_true",
+                            help="Падати і на зростанні часу та пам'яті, а не лише попереджати")
+
+    def handle(self, *args, **options):
+        if options["no_seed"]:
+            report = self.run(options)
+        else:
+            with scratch_database():
+                self.stdout.write("Наповнення бази...")
+                seed(users=options["users"], dashboards=options["dashboards"], todolists=options["todolists"],
+                     tasks=options["tasks"], comments=options["comments"], words=4,
+                     log=lambda message: self.stdout.write(f"  {message}"))
+                call_command("rebuild_search_index", stdout=self.stdout)
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                report = self.run(options)
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True) + "\n")
+        if options["baseline"]:
+            regressions, slowdowns = self.compare(json.loads(Path(options["baseline"]).read_text()), report,
+                                                  options["tolerance"])
+            for line in slowdowns:
+                self.stdout.write(self.style.WARNING(f"  {line}"))
+            if options["strict_timing"]:
+                regressions += slowdowns
+            if regressions:
+                raise CommandError(f"Регресії відносно {options['baseline']}:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Регресій немає"))
+
+    # Дані для запитів
+
+    def fixtures(self, no_seed):
+        comment = Comment.objects.select_related("task__todolist__dashboard").order_by("-id").first()
+        if comment is None:
+            raise CommandError("У базі немає коментарів; наповніть її через seed_bench")
+        task = comment.task
+        todolist = task.todolist
+        dashboard = todolist.dashboard
+        user = User.objects.get(pk=dashboard.created_by_id)
+        if not no_seed:
+            # Статистика кешу фрагментів доступна лише персоналу
+            User.objects.filter(pk=user.pk).update(is_staff=True)
+            user.is_staff = True
+        member = dashboard.members.first() or User.objects.exclude(pk=user.pk).first()
+        outsider = User.objects.exclude(pk__in=[user.pk, member.pk]).exclude(shared_dashboards=dashboard).first()
+        return {
+            "user": user,
+            "member": member,
+            "outsider": outsider,
+            "kwargs": {
+                "dashboard_pk": dashboard.pk,
+                "todolist_pk": todolist.pk,
+                "task_pk": task.pk,
+                "comment_pk": comment.pk,
+                "user_pk": member.pk,
+            },
+            # Ресурси API мають один аргумент pk
+            "api_pks": {"dashboard": dashboard.pk, "todolist": todolist.pk, "task": task.pk, "comment": comment.pk},
+            "query": {"main": {"dashboard": dashboard.pk, "todolist": todolist.pk}, "search": {"q": "завдання"}},
+        }
+
+    # (мітка, метод, шлях, дані, content_type) для кожного маршруту
+    def cases(self, fixtures, only):
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or (only and pattern.name not in only):
+                continue
+            name = pattern.name
+            if name in SKIPPED:
+                self.stdout.write(f"  {name}: пропущено ({SKIPPED[name]})")
+                continue
+
+            if name.startswith("api_"):
+                resource = name.removeprefix("api_").removesuffix("s")
+                kwargs = {"pk": fixtures["api_pks"][resource]} if "pk" in pattern.pattern.converters else {}
+            else:
+                kwargs = {key: fixtures["kwargs"][key] for key in pattern.pattern.converters}
+            path = reverse(name, kwargs=kwargs)
+            yield from self.requests_for(name, path, fixtures)
+
+    def requests_for(self, name, path, fixtures):
+        kwargs = fixtures["kwargs"]
+        model, _, action = name.rpartition("_")
+
+        if action in ("delete", "restore"):
+            yield name, "post", path, {}, None
+        elif action in ("create", "edit") and model in FORM_DATA:
+            yield name, "get", path, fixtures["query"].get(name), None
+            yield f"{name}:post", "post", path, FORM_DATA[model], None
+        elif name == "dashboard_members":
+            yield name, "get", path, None, None
+            if fixtures["outsider"]:
+                yield f"{name}:post", "post", path, {"username": fixtures["outsider"].username}, None
+        elif name == "task_update_status":
+            yield name, "post", path, {"task_id": kwargs["task_pk"], "status": "completed"}, None
+        elif name == "task_batch_move":
+            moves = [{"task_id": kwargs["task_pk"], "status": "in_progress", "prev_id": None, "next_id": None}]
+            yield name, "post", path, json.dumps({"moves": moves}), "application/json"
+        elif name == "logout":
+            yield name, "post", path, {}, None
+        elif name == "api_tasks":
+            yield name, "get", path, {"todolist": kwargs["todolist_pk"]}, None
+            items = [{"todolist": kwargs["todolist_pk"], **FORM_DATA["task"]} for _ in range(50)]
+            yield f"{name}:post", "post", path, json.dumps({"items": items}), "application/json"
+        elif name == "api_task":
+            yield name, "get", path, None, None
+            yield f"{name}:patch", "patch", path, json.dumps({"status": "completed"}), "application/json"
+            yield f"{name}:delete", "delete", path, None, None
+        else:
+            yield name, "get", path, fixtures["query"].get(name), None
+
+    # Вимірювання
+
+    def run(self, options):
+        only = {name.strip() for name in options["only"].split(",")} if options["only"] else None
+        fixtures = self.fixtures(options["no_seed"])
+        # Порожній ALLOWED_HOSTS у режимі DEBUG пропускає localhost
+        host = next((host for host in settings.ALLOWED_HOSTS if host != "*" and not host.startswith(".")), "localhost")
+        client = Client(SERVER_NAME=host)
+        client.force_login(fixtures["user"])
+
+        results = {}
+        for label, method, path, data, content_type in self.cases(fixtures, only):
+            results[label] = self.measure(client, method, path, data, content_type, options["repeat"])
+            row = results[label]
+            self.stdout.write(
+                f"{label:<26} {row['status']:>3}  {row['queries']:>3} q ({row['queries_warm']:>3} warm)  "
+                f"{row['time_ms']:7.1f} ms  sql {row['query_ms']:6.1f} ms  render {row['render_ms']:6.1f} ms  "
+                f"{row['peak_kib']:8.0f} KiB"
+            )
+
+        return {
+            "version": REPORT_VERSION,
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+                "seeded": not options["no_seed"],
+                "sizes": {name: options[name] for name in ("users", "dashboards", "todolists", "tasks", "comments")},
+            },
+            "views": results,
+        }
+
+    # Один запит у транзакції, яку потім відкочуємо: записи не змінюють базу між повторами.
+    # Наявні куки відновлюються (вихід із системи не розлогінює наступні запити),
+    # нові, як-от CSRF, лишаються — від CSRF-секрету залежать ключі кешу фрагментів.
+    def send(self, client, method, path, data, content_type):
+        cookies = {key: morsel.value for key, morsel in client.cookies.items()}
+        kwargs = {"content_type": content_type} if content_type else {}
+        with transaction.atomic():
+            with query_timer() as queries, template_render_timer() as render:
+                start = time.perf_counter()
+                response = getattr(client, method)(path, data, **kwargs)
+                body = b"".join(response.streaming_content) if response.streaming else response.content
+                elapsed = (time.perf_counter() - start) * 1000
+            transaction.set_rollback(True)
+        client.cookies = SimpleCookie({
+            **{key: morsel.value for key, morsel in client.cookies.items()}, **cookies,
+        })
+        return {
+            "status": response.status_code,
+            "bytes": len(body),
+            "time_ms": elapsed,
+            "queries": queries["count"],
+            "query_ms": queries["ms"],
+            "render_ms": render["ms"],
+        }
+
+    def measure(self, client, method, path, data, content_type, repeat):
+        # Перший запит — з порожнім кешем фрагментів, решта — з теплим
+        cache.clear()
+        cold = self.send(client, method, path, data, content_type)
+        warm = [self.send(client, method, path, data, content_type) for _ in range(repeat)]
+        times = sorted(run["time_ms"] for run in warm)
+        return {
+            "method": method.upper(),
+            "path": path,
+            "status": cold["status"],
+            "bytes": cold["bytes"],
+            "queries": cold["queries"],
+            "queries_warm": warm[-1]["queries"],
+            "cold_ms": cold["time_ms"],
+            "time_ms": statistics.median(times),
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "query_ms": statistics.median(run["query_ms"] for run in warm),
+            "render_ms": statistics.median(run["render_ms"] for run in warm),
+            "peak_kib": peak_memory_kib(lambda: self.send(client, method, path, data, content_type)),
+        }
+
+    # Порівняння з базовим звітом. Кількість запитів і статус детерміновані і мають не погіршуватись;
+    # час і пам'ять шумлять, тож повертаються окремо — лише вихід за допуск і поріг шуму
+    def compare(self, baseline, report, tolerance):
+        regressions, slowdowns = [], []
+        old_views, new_views = baseline.get("views", {}), report["views"]
+        for label in sorted(set(old_views) - set(new_views)):
+            self.stdout.write(f"  {label}: зник зі звіту")
+        for label in sorted(set(new_views) - set(old_views)):
+            self.stdout.write(f"  {label}: новий маршрут")
+
+        for label in sorted(set(old_views) & set(new_views)):
+            old, new = old_views[label], new_views[label]
+            if old["status"] != new["status"]:
+                regressions.append(f"{label}: статус {old['status']} -> {new['status']}")
+            for metric in COUNTED_METRICS:
+                if new[metric] > old[metric]:
+                    regressions.append(f"{label}: {metric} {old[metric]} -> {new[metric]}")
+            for metric, noise in TIMED_METRICS.items():
+                if new[metric] > old[metric] * (1 + tolerance) and new[metric] - old[metric] > noise:
+                    slowdowns.append(f"{label}: {metric} {old[metric]:.1f} -> {new[metric]:.1f}")
+        return regressions, slowdowns
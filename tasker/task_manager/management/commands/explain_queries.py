@@ -0,0 +1,175 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.urls import URLPattern
+from django.views.generic import ListView
+
+from task_manager import urls
+from task_manager.api import API_DEFAULT_LIMIT, ApiResourceMixin
+from task_manager.access import accessible_dashboards_query
+from task_manager.bench import scratch_database, seed
+from task_manager.models import Dashboard, TodoList, Task, Comment
+from task_manager.pagination import DEFAULT_ORDERING, KeysetPaginationMixin, order_by_expressions
+from task_manager.views import (
+    DashboardAccessMixin, DashboardDetailView, TodoListDetailView, MainPageView,
+    BOARD_COLUMN_LIMIT, BOARD_COLUMN_ORDERING, SIDEBAR_LIMIT,
+)
+
+
+# Таблиці застосунку, повний прохід по яких вважаємо помилкою
+MODEL_TABLES = {model._meta.db_table for model in (Dashboard, Dashboard.members.through)} | {
+    "task_manager_todolist", "task_manager_task", "task_manager_comment",
+}
+
+SQLITE_SCAN = re.compile(r"\bSCAN (\w+)")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+# QuerySet.explain() ламається на запитах із фільтром по Window, тому EXPLAIN додаємо до готового SQL
+def explain(qs):
+    sql, params = qs.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+
+# Аналог enable_seqscan = off для SQLite: на малій тестовій базі повний прохід дешевший за пошук
+# за індексом, і план залежить від розміру даних. Статистика ANALYZE збільшується так, ніби
+# кожна таблиця в STATS_SCALE разів більша, зі збереженням рядків на ключ індексу;
+# до справжньої статистики повертає відкат транзакції і повторне читання sqlite_stat1.
+STATS_SCALE = 1000
+
+
+def scale_sqlite_stats(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    if not cursor.fetchone():
+        return
+    cursor.execute("SELECT tbl, idx, stat FROM sqlite_stat1")
+    for table, index, stat in cursor.fetchall():
+        rows, *rest = stat.split(" ")
+        cursor.execute("UPDATE sqlite_stat1 SET stat = %s WHERE tbl = %s AND idx IS %s",
+                       [" ".join([str(int(rows) * STATS_SCALE), *rest]), table, index])
+    cursor.execute("ANALYZE sqlite_master")
+
+
+def first_page(qs, ordering, per_page):
+    return qs.order_by(*order_by_expressions(ordering))[:per_page + 1]
+
+
+def sequential_scans(plan):
+    pattern = POSTGRES_SCAN if connection.vendor == "postgresql" else SQLITE_SCAN
+    return sorted({table for table in pattern.findall(plan) if table in MODEL_TABLES})
+
+
+class Command(BaseCommand):
+    help = "Запускає EXPLAIN для querysets усіх сторінок на тестових даних і падає, якщо є послідовний прохід по таблиці"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dashboards", type=int, default=200)
+        parser.add_argument("--tasks", type=int, default=20_000)
+        parser.add_argument("--verbose-plans", action="store_true")
+        parser.add_argument("--no-seed", action="store_true",
+                            help="Перевірити поточну базу (наприклад, у тестах) без тимчасової")
+
+    def handle(self, *args, **options):
+        if options["no_seed"]:
+            failures = self.check_plans(options["verbose_plans"])
+        else:
+            with scratch_database():
+                seed(users=50, dashboards=options["dashboards"], todolists=options["dashboards"] * 3,
+                     tasks=options["tasks"], comments=options["tasks"])
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                failures = self.check_plans(options["verbose_plans"])
+
+        if failures:
+            raise CommandError("Послідовний прохід у: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Усі запити використовують індекси"))
+
+    def querysets(self):
+        comment = Comment.objects.select_related("task__todolist__dashboard").order_by("-id").first()
+        task = comment.task
+        todolist = task.todolist
+        dashboard = todolist.dashboard
+        user = User.objects.get(pk=dashboard.created_by_id)
+        kwargs = {
+            "dashboard_pk": dashboard.pk,
+            "todolist_pk": todolist.pk,
+            "task_pk": task.pk,
+            "comment_pk": comment.pk,
+            "user_pk": user.pk,
+        }
+        # Ресурси API мають один аргумент pk для будь-якої моделі
+        model_pks = {Dashboard: dashboard.pk, TodoList: todolist.pk, Task: task.pk, Comment: comment.pk}
+        factory = RequestFactory()
+
+        yield "access", accessible_dashboards_query(user)
+
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not hasattr(pattern.callback, "view_class"):
+                continue
+            view_class = pattern.callback.view_class
+            if not issubclass(view_class, DashboardAccessMixin):
+                continue
+
+            view = view_class()
+            request = factory.get("/", {"dashboard": dashboard.pk, "todolist": todolist.pk})
+            request.user = user
+            view.setup(request, **{
+                name: model_pks[view_class.model] if name == "pk" else kwargs[name]
+                for name in pattern.pattern.converters
+            })
+
+            qs = view.get_queryset()
+            pk_kwarg = getattr(view_class, "pk_url_kwarg", "pk")
+            if pk_kwarg in view.kwargs:
+                qs = qs.filter(pk=view.kwargs[pk_kwarg])
+            yield pattern.name, qs
+
+            # Сторінки зі списками читають одну сторінку курсорної пагінації
+            if isinstance(view, KeysetPaginationMixin) and isinstance(view, ListView) and view.paginate_by:
+                yield f"{pattern.name}:page", first_page(qs, view.keyset_ordering, view.paginate_by)
+            if isinstance(view, ApiResourceMixin) and "pk" not in view.kwargs:
+                yield f"{pattern.name}:page", first_page(view.filter_list(qs), DEFAULT_ORDERING, API_DEFAULT_LIMIT)
+            if isinstance(view, DashboardDetailView):
+                yield f"{pattern.name}:todolists", first_page(dashboard.todolists.filter(deleted_at__isnull=True), DEFAULT_ORDERING,
+                                                                 view.paginate_by)
+            if isinstance(view, TodoListDetailView):
+                yield f"{pattern.name}:tasks", first_page(todolist.tasks.all(), DEFAULT_ORDERING, view.paginate_by)
+
+            if isinstance(view, MainPageView):
+                sidebar = DashboardAccessMixin.get_queryset(view)
+                yield f"{pattern.name}:sidebar", first_page(sidebar, DEFAULT_ORDERING, SIDEBAR_LIMIT)
+                todolists = dashboard.todolists.filter(deleted_at__isnull=True)
+                yield f"{pattern.name}:todolists", first_page(todolists, DEFAULT_ORDERING, SIDEBAR_LIMIT)
+                view.object_list = qs
+                yield f"{pattern.name}:board", view.get_board_queryset()
+                column = qs.filter(status="archived").order_by(*order_by_expressions(BOARD_COLUMN_ORDERING))
+                yield f"{pattern.name}:column", column[:BOARD_COLUMN_LIMIT + 1]
+
+    def check_plans(self, verbose):
+        failures = []
+        for name, qs in self.querysets():
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if connection.vendor == "postgresql":
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                    else:
+                        scale_sqlite_stats(cursor)
+                plan = explain(qs)
+                transaction.set_rollback(True)
+            if connection.vendor == "sqlite":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE sqlite_master")
+
+            scans = sequential_scans(plan)
+            status = self.style.ERROR("SCAN " + ", ".join(scans)) if scans else self.style.SUCCESS("ok")
+            self.stdout.write(f"{name:<28} {status}")
+            if verbose or scans:
+                self.stdout.write("    " + plan.replace("\n", "\n    "))
+            if scans:
+                failures.append(name)
+        return failures
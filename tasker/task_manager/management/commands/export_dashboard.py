@@ -0,0 +1,40 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_dashboard
+from task_manager.models import Dashboard
+from task_manager.shards import shard_for_dashboard, use_shard
+
+
+class Command(BaseCommand):
+    help = ("Вивантажує списки, завдання і коментарі дошки у CSV або NDJSON потоком, "
+            "не тримаючи дошку в пам'яті; файл з розширенням .gz стискається")
+
+    def add_arguments(self, parser):
+        parser.add_argument("dashboard_id", type=int)
+        parser.add_argument("--format", dest="export_format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", help="Файл замість stdout")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        alias, _ = shard_for_dashboard(options["dashboard_id"])
+        with use_shard(alias):
+            self.export(options)
+
+    def export(self, options):
+        if not Dashboard.objects.filter(pk=options["dashboard_id"], deleted_at__isnull=True).exists():
+            raise CommandError(f"Дошки {options['dashboard_id']} немає")
+
+        chunks = export_dashboard(options["dashboard_id"], options["export_format"], options["chunk_size"])
+        path = options["output"]
+        if not path:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8", newline="") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Дошку вивантажено в {path}"))
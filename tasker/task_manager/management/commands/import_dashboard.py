@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, import_board, import_format_for, open_import
+from task_manager.models import Dashboard, TodoList
+from task_manager.shards import shard_for_dashboard, use_shard
+
+
+class Command(BaseCommand):
+    help = ("Імпортує списки, завдання і коментарі з CSV або NDJSON (формат export_dashboard) у дошку: "
+            "файл читається потоково, рядки пишуться пакетами по --batch-size, помилкові пропускаються")
+
+    def add_arguments(self, parser):
+        parser.add_argument("dashboard_id", type=int)
+        parser.add_argument("file", help="Файл .csv, .ndjson або .jsonl, також стиснений .gz")
+        parser.add_argument("--format", dest="import_format", choices=IMPORT_FORMATS,
+                            help="Формат, якщо його не видно з розширення")
+        parser.add_argument("--user", help="Автор створених об'єктів; типово автор дошки")
+        parser.add_argument("--todolist", type=int, help="Список для завдань без parent_id")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        alias, _ = shard_for_dashboard(options["dashboard_id"])
+        with use_shard(alias):
+            self.import_file(options)
+
+    def import_file(self, options):
+        dashboard = Dashboard.objects.filter(pk=options["dashboard_id"], deleted_at__isnull=True).first()
+        if dashboard is None:
+            raise CommandError(f"Дошки {options['dashboard_id']} немає")
+        user = dashboard.created_by
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"Користувача {options['user']} немає")
+        todolist = None
+        if options["todolist"]:
+            todolist = TodoList.objects.filter(pk=options["todolist"], dashboard=dashboard,
+                                               deleted_at__isnull=True).first()
+            if todolist is None:
+                raise CommandError(f"Списку {options['todolist']} у дошці немає")
+        path = options["file"]
+        import_format = options["import_format"] or import_format_for(path)
+        if import_format is None:
+            raise CommandError("Не вдалося визначити формат файлу, вкажіть --format")
+
+        with open(path, "rb") as binary:
+            report = import_board(open_import(binary, path), import_format, dashboard, user,
+                                  batch_size=options["batch_size"], todolist=todolist)
+
+        for error in report["errors"]:
+            messages = "; ".join(f"{field}: {' '.join(texts)}" for field, texts in error["errors"].items())
+            self.stderr.write(f"  рядок {error['line']}: {messages}")
+        created = report["created"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Створено списків: {created['todolist']}, завдань: {created['task']}, коментарів: {created['comment']}; "
+            f"пропущено рядків: {report['error_count']}; {report['rows']} рядків за {report['seconds']} с "
+            f"({report['rows_per_second']} рядків/с)"
+        ))
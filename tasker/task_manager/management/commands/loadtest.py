@@ -0,0 +1,267 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_SECRET_LENGTH
+from django.test import Client
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from task_manager.bench import seed
+from task_manager.models import Dashboard
+
+
+HOST = "127.0.0.1"
+
+# Сервер -> команда запуску і чи вмикати асинхронні view
+SERVERS = {
+    "wsgi": (["-m", "gunicorn", "tasker.wsgi:application", "--bind", "{host}:{port}", "--workers", "{workers}",
+              "--log-level", "warning"], "0"),
+    "asgi": (["-m", "uvicorn", "tasker.asgi:application", "--host", "{host}", "--port", "{port}", "--workers", "{workers}",
+              "--log-level", "warning", "--no-access-log"], "1"),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+# Мінімальний HTTP/1.1 клієнт поверх asyncio: keep-alive, Content-Length і chunked.
+# Повертає статус і чи закрив сервер з'єднання (синхронні воркери gunicorn закривають завжди).
+async def http_request(reader, writer, method, target, headers, body=b""):
+    head = [f"{method} {target} HTTP/1.1", f"Host: {HOST}", f"Content-Length: {len(body)}"]
+    head += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length, chunked, close = None, False, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding":
+            chunked = "chunked" in value
+        elif name == "connection":
+            close = value == "close"
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        close = True
+    return status, close
+
+
+class Command(BaseCommand):
+    help = ("Навантажувальний тест: WSGI (gunicorn) проти ASGI (uvicorn з асинхронними view) "
+            "на одній засіяній базі; звітує запити за секунду і p50/p99 затримки")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", default="wsgi,asgi")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=15.0)
+        parser.add_argument("--warmup", type=float, default=3.0)
+        parser.add_argument("--port", type=int, default=8700)
+        # Частка запитів, що змінюють статус картки
+        parser.add_argument("--write-ratio", type=float, default=0.05)
+        parser.add_argument("--clients", type=int, default=20, help="Скільки різних користувачів шлють запити")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--dashboards", type=int, default=200)
+        parser.add_argument("--todolists", type=int, default=600)
+        parser.add_argument("--tasks", type=int, default=20_000)
+        parser.add_argument("--comments", type=int, default=20_000)
+        parser.add_argument("--json", dest="json_path", help="Куди записати результати у JSON")
+        # Внутрішній крок: наповнення бази в дочірньому процесі з TASKER_DB_PATH
+        parser.add_argument("--prepare", help="Шлях для файлу сценарію")
+
+    def handle(self, *args, **options):
+        if options["prepare"]:
+            self.prepare(options)
+            return
+
+        servers = [name.strip() for name in options["servers"].split(",") if name.strip()]
+        unknown = sorted(set(servers) - set(SERVERS))
+        if unknown:
+            raise CommandError(f"Невідомі сервери: {', '.join(unknown)}")
+
+        with tempfile.TemporaryDirectory() as workdir:
+            env = {**os.environ, "TASKER_DB_PATH": str(Path(workdir) / "loadtest.sqlite3")}
+            scenario_path = Path(workdir) / "scenario.json"
+            self.stdout.write("Наповнення бази...")
+            self.run_child(["loadtest", "--prepare", str(scenario_path), *self.seed_args(options)], env)
+            scenario = json.loads(scenario_path.read_text())
+
+            results = {}
+            for name in servers:
+                self.stdout.write(f"{name}: {options['workers']} воркерів, {options['concurrency']} з'єднань...")
+                with self.server(name, options, env):
+                    results[name] = asyncio.run(self.run_load(scenario, options))
+                self.report(name, results[name])
+
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps(results, indent=2))
+
+    # Підготовка
+
+    def seed_args(self, options):
+        names = ("users", "dashboards", "todolists", "tasks", "comments", "clients")
+        return [arg for name in names for arg in (f"--{name}", str(options[name]))]
+
+    def run_child(self, args, env):
+        subprocess.run([sys.executable, "manage.py", *args], cwd=settings.BASE_DIR, env=env, check=True)
+
+    def prepare(self, options):
+        call_command("migrate", verbosity=0)
+        seed(users=options["users"], dashboards=options["dashboards"], todolists=options["todolists"],
+             tasks=options["tasks"], comments=options["comments"])
+
+        # Користувачі з дошкою, списком і завданням; сесія і CSRF-секрет для кожного
+        clients = []
+        for user in User.objects.filter(dashboards__todolists__tasks__isnull=False).distinct()[:options["clients"]]:
+            dashboard = Dashboard.objects.filter(created_by=user, todolists__tasks__isnull=False).first()
+            todolist = dashboard.todolists.filter(tasks__isnull=False).first()
+            task = todolist.tasks.first()
+            session = Client()
+            session.force_login(user)
+            kwargs = {"dashboard_pk": dashboard.pk, "todolist_pk": todolist.pk}
+            clients.append({
+                "session": session.cookies[settings.SESSION_COOKIE_NAME].value,
+                "csrf": get_random_string(CSRF_SECRET_LENGTH, CSRF_ALLOWED_CHARS),
+                "task_id": task.pk,
+                "pages": {
+                    "main": reverse("main") + "?" + urlencode({"dashboard": dashboard.pk, "todolist": todolist.pk}),
+                    "dashboard_detail": reverse("dashboard_detail", kwargs={"dashboard_pk": dashboard.pk}),
+                    "todolist_detail": reverse("todolist_detail", kwargs=kwargs),
+                    "task_detail": reverse("task_detail", kwargs={**kwargs, "task_pk": task.pk}),
+                },
+                "status_url": reverse("task_update_status"),
+            })
+        if not clients:
+            raise CommandError("У засіяній базі немає користувачів із завданнями")
+        Path(options["prepare"]).write_text(json.dumps({"clients": clients}))
+
+    # Сервер
+
+    @contextmanager
+    def server(self, name, options, env):
+        command, async_views = SERVERS[name]
+        args = [part.format(host=HOST, port=options["port"], workers=options["workers"]) for part in command]
+        process = subprocess.Popen([sys.executable, *args], cwd=settings.BASE_DIR,
+                                   env={**env, "TASKER_ASYNC_VIEWS": async_views})
+        try:
+            self.wait_for_port(process, options["port"])
+            yield process
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def wait_for_port(self, process, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError("Сервер завершився під час запуску")
+            try:
+                socket.create_connection((HOST, port), timeout=0.5).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError("Сервер не відповів вчасно")
+
+    # Навантаження
+
+    def pick_request(self, client, rnd, write_ratio):
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client['session']}; {settings.CSRF_COOKIE_NAME}={client['csrf']}"
+        if rnd.random() < write_ratio:
+            body = urlencode({"task_id": client["task_id"], "status": rnd.choice(["draft", "archived"])}).encode()
+            headers = {"Cookie": cookie, "X-CSRFToken": client["csrf"],
+                       "Content-Type": "application/x-www-form-urlencoded"}
+            return "task_update_status", "POST", client["status_url"], headers, body
+        kind = rnd.choice(list(client["pages"]))
+        return kind, "GET", client["pages"][kind], {"Cookie": cookie}, b""
+
+    async def connection_loop(self, scenario, options, warmup_until, deadline, samples, errors, seed_value):
+        rnd = random.Random(seed_value)
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            kind, method, target, headers, body = self.pick_request(
+                rnd.choice(scenario["clients"]), rnd, options["write_ratio"])
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(HOST, options["port"])
+                status, close = await http_request(reader, writer, method, target, headers, body)
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+                status, close = None, True
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if start >= warmup_until:
+                if status is None or status >= 400:
+                    errors[kind] = errors.get(kind, 0) + 1
+                else:
+                    samples.setdefault(kind, []).append(elapsed)
+            if close and writer is not None:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    async def run_load(self, scenario, options):
+        samples, errors = {}, {}
+        warmup_until = time.perf_counter() + options["warmup"]
+        deadline = warmup_until + options["duration"]
+        await asyncio.gather(*(
+            self.connection_loop(scenario, options, warmup_until, deadline, samples, errors, i)
+            for i in range(options["concurrency"])
+        ))
+
+        result = {}
+        everything = []
+        for kind in sorted(set(samples) | set(errors)):
+            latencies = sorted(samples.get(kind, []))
+            everything += latencies
+            result[kind] = self.summarize(latencies, errors.get(kind, 0), options["duration"])
+        result["total"] = self.summarize(sorted(everything), sum(errors.values()), options["duration"])
+        return result
+
+    def summarize(self, latencies, errors, duration):
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": len(latencies) / duration,
+            "p50_ms": percentile(latencies, 0.50),
+            "p99_ms": percentile(latencies, 0.99),
+        }
+
+    def report(self, name, result):
+        for kind, row in result.items():
+            self.stdout.write(
+                f"  {name:<5} {kind:<20} {row['rps']:8.1f} rps  p50 {row['p50_ms']:7.1f} ms  "
+                f"p99 {row['p99_ms']:7.1f} ms  помилок {row['errors']}"
+            )
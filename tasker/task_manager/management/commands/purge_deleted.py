@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from task_manager.purge import PURGE_BATCH_SIZE, purge
+from task_manager.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = ("Остаточно видаляє м'яко видалені дошки і списки з їхніми завданнями та коментарями "
+            "пакетами по --batch-size рядків; з --interval працює як фоновий процес")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=0.0, help="Секунд між пакетами")
+        parser.add_argument("--interval", type=float,
+                            help="Повторювати прохід кожні N секунд замість одного проходу")
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            for alias in each_shard():
+                deleted = purge(options["batch_size"], options["pause"],
+                                log=lambda message: self.stdout.write(f"  {alias}: {message}"))
+                total += sum(deleted.values())
+            self.stdout.write(self.style.SUCCESS(f"Видалено рядків: {total}"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Length
+
+from task_manager.models import Task
+from task_manager.ranking import rank_sequence
+from task_manager.shards import current_shard, each_shard
+
+
+class Command(BaseCommand):
+    help = "Перераховує ключі порядку карток у колонках, де ключі задовгі або відсутні (запускати періодично)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-length", type=int, default=12,
+                            help="Колонки з довшими ключами перебалансовуються")
+        parser.add_argument("--all", action="store_true", help="Перебалансувати всі колонки")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        if not options["all"]:
+            tasks = tasks.annotate(key_length=Length("position")).filter(
+                Q(key_length__gt=options["max_length"]) | Q(position="")
+            )
+        columns = tasks.order_by().values_list("todolist_id", "status").annotate(count=Count("id"))
+
+        rebalanced = 0
+        for _ in each_shard():
+            for todolist_id, status, _ in columns.iterator():
+                rebalanced += self.rebalance(todolist_id, status, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Оновлено ключів: {rebalanced}"))
+
+    def rebalance(self, todolist_id, status, batch_size):
+        with transaction.atomic(using=current_shard()):
+            ids = list(
+                Task.objects.select_for_update()
+                .filter(todolist_id=todolist_id, status=status)
+                .order_by("position", "id")
+                .values_list("id", flat=True)
+            )
+            updates = [Task(id=task_id, position=position) for task_id, position in zip(ids, rank_sequence(len(ids)))]
+            Task.objects.bulk_update(updates, ["position"], batch_size=batch_size)
+        return len(updates)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.models import DashboardShard
+from task_manager.rebalance import MAX_MOVES, MOVE_BATCH_SIZE, MOVE_GRACE, dashboard_weights, move_dashboard, plan_moves
+from task_manager.shards import shard_aliases
+
+
+class Command(BaseCommand):
+    help = ("Вирівнює кількість завдань між шардами, переносячи дошки з найважчого шарду на найлегший "
+            "без зупинки сервісу; з --dashboard і --to переносить одну дошку")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dashboard", type=int, help="Перенести лише цю дошку")
+        parser.add_argument("--to", help="Шард для --dashboard")
+        parser.add_argument("--dry-run", action="store_true", help="Лише показати план")
+        parser.add_argument("--max-moves", type=int, default=MAX_MOVES)
+        parser.add_argument("--grace", type=float, default=MOVE_GRACE,
+                            help="Секунд між закриттям запису в дошку і початком копіювання")
+        parser.add_argument("--batch-size", type=int, default=MOVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        aliases = shard_aliases()
+        if options["dashboard"]:
+            if options["to"] not in aliases:
+                raise CommandError(f"Вкажіть --to, один із шардів: {', '.join(aliases)}")
+            source = DashboardShard.objects.filter(pk=options["dashboard"]).values_list("shard", flat=True).first()
+            if source is None:
+                raise CommandError(f"Дошки {options['dashboard']} немає")
+            moves = [(options["dashboard"], source, options["to"], None)]
+        else:
+            if len(aliases) < 2:
+                raise CommandError("Шард лише один, переносити нікуди")
+            moves = plan_moves(dashboard_weights(), options["max_moves"])
+
+        for dashboard_id, source, target, weight in moves:
+            self.stdout.write(f"Дошка {dashboard_id}: {source} -> {target}" + (f" ({weight} завдань)" if weight else ""))
+            if not options["dry_run"]:
+                move_dashboard(dashboard_id, target, options["batch_size"], options["grace"],
+                               log=lambda message: self.stdout.write(f"  {message}"))
+        self.stdout.write(self.style.SUCCESS(f"Перенесено дошок: {0 if options['dry_run'] else len(moves)}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from task_manager.models import Task, Comment, SearchDocument
+from task_manager.search import INDEX_BATCH_SIZE, comment_rows, index_comment_rows, index_task_rows, task_rows
+from task_manager.shards import each_shard
+
+
+# Прохід по таблиці пакетами за первинним ключем
+def batches(model, rows, batch_size):
+    last_pk = 0
+    while True:
+        batch = list(rows(model.objects.filter(pk__gt=last_pk).order_by("pk"))[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1][0]
+
+
+class Command(BaseCommand):
+    help = "Заповнює пошуковий індекс для всіх завдань і коментарів (далі його підтримують сигнали)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Спершу видалити всі документи")
+        parser.add_argument("--batch-size", type=int, default=INDEX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for _ in each_shard():
+            if options["clear"]:
+                SearchDocument.objects.all().delete()
+
+            for model, rows, index in ((Task, task_rows, index_task_rows), (Comment, comment_rows, index_comment_rows)):
+                total = 0
+                for batch in batches(model, rows, options["batch_size"]):
+                    index(batch)
+                    total += len(batch)
+                self.stdout.write(f"{model._meta.verbose_name_plural}: {total}")
+        self.stdout.write(self.style.SUCCESS("Індекс оновлено"))
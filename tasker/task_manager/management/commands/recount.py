@@ -0,0 +1,26 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from task_manager.counters import recount
+from task_manager.models import Dashboard, TodoList, Task
+from task_manager.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = "Перераховує денормалізовані лічильники і виправляє ті, що розійшлися з даними"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--models", default="dashboard,todolist,task",
+                            help="Які лічильники перевіряти: dashboard, todolist, task")
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        names = {name.strip() for name in options["models"].split(",")}
+        models = [model for model in (Dashboard, TodoList, Task) if model._meta.model_name in names]
+        fixed = Counter()
+        for _ in each_shard():
+            fixed.update(recount(models, batch_size=options["batch_size"]))
+        for name, count in fixed.items():
+            self.stdout.write(f"{name}: виправлено {count}")
+        self.stdout.write(self.style.SUCCESS("Лічильники перераховано"))
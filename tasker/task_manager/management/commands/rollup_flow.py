@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from task_manager.flow import ROLLUP_BATCH_SIZE, rollup
+from task_manager.shards import each_shard
+
+
+class Command(BaseCommand):
+    help = ("Зводить нові рядки журналу переходів завдань у щоденні зведення аналітики дошок "
+            "пакетами по --batch-size; з --interval працює як фоновий процес")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=ROLLUP_BATCH_SIZE)
+        parser.add_argument("--interval", type=float,
+                            help="Повторювати зведення кожні N секунд замість одного проходу")
+
+    def handle(self, *args, **options):
+        while True:
+            total = sum(rollup(options["batch_size"], log=lambda message: self.stdout.write(f"  {alias}: {message}"))
+                        for alias in each_shard())
+            self.stdout.write(self.style.SUCCESS(f"Зведено переходів: {total}"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
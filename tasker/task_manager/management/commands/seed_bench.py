@@ -0,0 +1,50 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from task_manager.bench import seed
+
+
+class Command(BaseCommand):
+    help = ("Наповнює поточну базу (або TASKER_DB_PATH) тестовими даними через bulk_create: "
+            "користувачі, дошки з учасниками, списки, завдання, коментарі")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--dashboards", type=int, default=100)
+        parser.add_argument("--members", type=int, default=2, help="Учасників на дошку")
+        parser.add_argument("--todolists", type=int, default=300)
+        parser.add_argument("--tasks", type=int, default=10_000)
+        parser.add_argument("--comments", type=int, default=10_000)
+        parser.add_argument("--words", type=int, default=0, help="Слів у тексті завдань і коментарів (0 — короткі тексти)")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--random-seed", type=int, default=0)
+        parser.add_argument("--password", help="Пароль для входу під користувачами bench_user_N")
+        parser.add_argument("--search-index", action="store_true", help="Заповнити пошуковий індекс")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith="bench_user_").exists():
+            raise CommandError("У базі вже є користувачі bench_user_*; візьміть порожню базу (TASKER_DB_PATH)")
+
+        with transaction.atomic():
+            ids = seed(
+                users=options["users"],
+                dashboards=options["dashboards"],
+                members=options["members"],
+                todolists=options["todolists"],
+                tasks=options["tasks"],
+                comments=options["comments"],
+                batch_size=options["batch_size"],
+                random_seed=options["random_seed"],
+                words=options["words"],
+                log=lambda message: self.stdout.write(f"  {message}"),
+            )
+            # Один хеш на всіх: хешування повільне, а паролі однакові
+            if options["password"]:
+                User.objects.filter(pk__in=ids["users"]).update(password=make_password(options["password"]))
+
+        if options["search_index"]:
+            call_command("rebuild_search_index", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS("Базу наповнено"))
@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from task_manager.replicas import replica_aliases
+
+
+class Command(BaseCommand):
+    help = ("Копіює основну базу SQLite у файли реплік із REPLICA_DATABASES, імітуючи реплікацію "
+            "для локальної перевірки читання з реплік; з --interval працює як фоновий процес")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float,
+                            help="Повторювати копіювання кожні N секунд, імітуючи відставання реплік")
+
+    def handle(self, *args, **options):
+        aliases = replica_aliases()
+        if not aliases:
+            raise CommandError("Репліки не налаштовані: задайте TASKER_REPLICA_DB_PATHS")
+        for alias in (DEFAULT_DB_ALIAS, *aliases):
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias}: копіювання підтримується лише для SQLite")
+
+        while True:
+            primary = connections[DEFAULT_DB_ALIAS]
+            primary.ensure_connection()
+            for alias in aliases:
+                # Відкриті з'єднання репліки бачили б файл, замінений під ними
+                connections[alias].close()
+                with sqlite3.connect(connections[alias].settings_dict["NAME"]) as replica:
+                    primary.connection.backup(replica)
+                replica.close()
+                self.stdout.write(f"  {alias}: {connections[alias].settings_dict['NAME']}")
+            self.stdout.write(self.style.SUCCESS(f"Синхронізовано реплік: {len(aliases)}"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,200 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template as BackendTemplate, reraise
+
+
+logger = logging.getLogger("task_manager.perf")
+
+# Скільки виконань одного SQL за запит вважаємо ознакою N+1
+DUPLICATE_THRESHOLD = 5
+# Скільки повторюваних запитів і символів SQL потрапляє в журнал
+DUPLICATE_LOG_LIMIT = 5
+SQL_LOG_LENGTH = 300
+
+_current = ContextVar("perf_request_stats", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# Статистика одного запиту: SQL і час рендерингу шаблонів
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.slowest = (0.0, "")
+        # SQL до підстановки параметрів: однаковий текст — той самий запит у циклі
+        self.statements = Counter()
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.queries += 1
+            self.sql_ms += elapsed
+            self.statements[sql] += 1
+            if elapsed > self.slowest[0]:
+                self.slowest = (elapsed, sql)
+
+    def duplicates(self):
+        return [(sql, count) for sql, count in self.statements.most_common() if count > 1]
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+# Обгортка execute_wrapper на кожному з'єднанні. З'єднання в Django свої в кожному потоці,
+# а запити асинхронних view виконуються в потоках sync_to_async, тож обгортка ставиться
+# при підключенні, а статистику поточного запиту знаходить через contextvar.
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.execute(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+# Час шаблонів міряє рушій TimedDjangoTemplates (TEMPLATES у settings), а не заміна
+# Template.render: через бекенд проходять лише зовнішні виклики (render, render_to_string),
+# include і extends рендеряться всередині них. render_to_string зсередини шаблону вкладений,
+# тож рахується лише найзовнішній виклик.
+class TimedTemplate(BackendTemplate):
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_ms += (time.perf_counter() - start) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def view_query_budget(request):
+    match = request.resolver_match
+    view_class = getattr(match.func, "view_class", None) if match else None
+    return getattr(view_class, "query_budget", None)
+
+
+# Інструментування запитів: кількість і час SQL, найповільніший запит, повтори (N+1),
+# час шаблонів і назва view. Результат — заголовок Server-Timing і JSON-рядок у журналі
+# task_manager.perf. Бюджет запитів оголошується на класі view атрибутом query_budget.
+class PerformanceMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # З'єднання, відкриті ще до завантаження middleware
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        record = self.build_record(request, response, stats)
+        if getattr(settings, "PERF_SERVER_TIMING", False):
+            response["Server-Timing"] = server_timing(record)
+
+        level = logging.WARNING if record["n_plus_one"] else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False))
+        self.check_budget(request, record)
+        return response
+
+    def build_record(self, request, response, stats):
+        match = request.resolver_match
+        duplicates = stats.duplicates()
+        slowest_ms, slowest_sql = stats.slowest
+        return {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "route": match.view_name if match else None,
+            "view": match._func_path if match else None,
+            "total_ms": round(stats.total_ms(), 2),
+            "queries": stats.queries,
+            "sql_ms": round(stats.sql_ms, 2),
+            "slowest_ms": round(slowest_ms, 2),
+            "slowest_sql": slowest_sql[:SQL_LOG_LENGTH],
+            "duplicate_queries": sum(count - 1 for _, count in duplicates),
+            "duplicates": [{"sql": sql[:SQL_LOG_LENGTH], "count": count} for sql, count in duplicates[:DUPLICATE_LOG_LIMIT]],
+            "n_plus_one": any(count >= DUPLICATE_THRESHOLD for _, count in duplicates),
+            "template_ms": round(stats.template_ms, 2),
+            "query_budget": view_query_budget(request),
+        }
+
+    # QUERY_BUDGET_ACTION: None — не перевіряти, "warn" — попередження в журналі, "raise" — виняток (у тестах)
+    def check_budget(self, request, record):
+        action = getattr(settings, "QUERY_BUDGET_ACTION", None)
+        budget = record["query_budget"]
+        if not action or budget is None or record["queries"] <= budget:
+            return
+        message = f"{record['view']}: {record['queries']} SQL-запитів при бюджеті {budget} ({request.method} {request.path})"
+        if action == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+def server_timing(record):
+    return ", ".join((
+        f'db;dur={record["sql_ms"]:.2f};desc="{record["queries"]} queries"',
+        f'tpl;dur={record["template_ms"]:.2f}',
+        f'app;dur={record["total_ms"]:.2f}',
+    ))
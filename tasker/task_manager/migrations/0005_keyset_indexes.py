@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0004_dashboard_members_alter_dashboard_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['task', 'created_at', 'id'], name='comment_task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dashboard',
+            index=models.Index(fields=['created_at', 'id'], name='dashboard_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['todolist', 'created_at', 'id'], name='task_todolist_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todolist',
+            index=models.Index(fields=['dashboard', 'created_at', 'id'], name='todolist_dashboard_created_idx'),
+        ),
+    ]
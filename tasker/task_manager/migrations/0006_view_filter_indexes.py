@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0005_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dashboard',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='dashboard_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['todolist', 'status', 'priority', 'deadline'], name='task_column_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'archived'), _negated=True), fields=['todolist', 'status', 'deadline'], name='task_active_column_idx'),
+        ),
+    ]
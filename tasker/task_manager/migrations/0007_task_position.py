@@ -0,0 +1,63 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:30
+
+from django.conf import settings
+from itertools import groupby
+
+from django.db import migrations, models
+
+
+PRIORITY_RANK = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+
+# Копія ranking.rank_sequence на момент міграції: зміни формату ключів у ranking.py
+# не повинні змінювати, як ця міграція відтворюється на новій базі
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_WIDTH = 6
+
+
+def rank_sequence(count):
+    base = len(DIGITS)
+    step = base ** RANK_WIDTH // (count + 1)
+    positions = []
+    for i in range(count):
+        value, digits = step * (i + 1), []
+        for _ in range(RANK_WIDTH):
+            value, digit = divmod(value, base)
+            digits.append(DIGITS[digit])
+        positions.append("".join(reversed(digits)))
+    return positions
+
+
+# Початковий порядок колонок такий самий, як був на дошці: пріоритет, дедлайн, id
+def assign_positions(apps, schema_editor):
+    Task = apps.get_model("task_manager", "Task")
+    rows = Task.objects.order_by("todolist_id", "status").values_list("id", "todolist_id", "status", "priority", "deadline")
+    updates = []
+    for _, column in groupby(rows.iterator(chunk_size=2000), key=lambda row: (row[1], row[2])):
+        column = sorted(column, key=lambda row: (PRIORITY_RANK.get(row[3], 4), row[4] is None, row[4] or 0, row[0]))
+        for (task_id, *_), position in zip(column, rank_sequence(len(column))):
+            updates.append(Task(id=task_id, position=position))
+        if len(updates) >= 1000:
+            Task.objects.bulk_update(updates, ["position"])
+            updates = []
+    Task.objects.bulk_update(updates, ["position"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0006_view_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='position',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255, verbose_name='Позиція'),
+        ),
+        migrations.RunPython(assign_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['todolist', 'status', 'position', 'id'], name='task_column_rank_idx'),
+        ),
+    ]
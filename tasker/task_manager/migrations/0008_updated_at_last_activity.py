@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+# Для наявних рядків час оновлення дорівнює часу створення
+def fill_from_created_at(apps, schema_editor):
+    apps.get_model("task_manager", "Dashboard").objects.update(updated_at=F("created_at"), last_activity=F("created_at"))
+    apps.get_model("task_manager", "TodoList").objects.update(updated_at=F("created_at"))
+    apps.get_model("task_manager", "Comment").objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0007_task_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Оновлено в'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='dashboard',
+            name='last_activity',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Остання активність'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Оновлено в'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Оновлено в'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_from_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Індекс поверх task_manager_searchdocument. У SQLite — таблиця FTS5, яку синхронізують тригери;
+# стовпчик scope містить токен дошки ("d42"), щоб обмежувати пошук доступними дошками в самому MATCH.
+# Префіксні індекси 2–6 символів (search.PREFIX_MAX_LENGTH): без них запит "сло"* зливає списки документів усіх слів із цим префіксом.
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE task_manager_search_fts USING fts5(
+        title, body, scope, prefix = '2 3 4 5 6', tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER task_manager_search_ai AFTER INSERT ON task_manager_searchdocument BEGIN
+        INSERT INTO task_manager_search_fts(rowid, title, body, scope)
+        VALUES (new.id, new.title, new.body, 'd' || new.dashboard_id);
+    END""",
+    """CREATE TRIGGER task_manager_search_ad AFTER DELETE ON task_manager_searchdocument BEGIN
+        DELETE FROM task_manager_search_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER task_manager_search_au AFTER UPDATE ON task_manager_searchdocument BEGIN
+        DELETE FROM task_manager_search_fts WHERE rowid = old.id;
+        INSERT INTO task_manager_search_fts(rowid, title, body, scope)
+        VALUES (new.id, new.title, new.body, 'd' || new.dashboard_id);
+    END""",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS task_manager_search_au",
+    "DROP TRIGGER IF EXISTS task_manager_search_ad",
+    "DROP TRIGGER IF EXISTS task_manager_search_ai",
+    "DROP TABLE IF EXISTS task_manager_search_fts",
+]
+
+# У PostgreSQL — згенерований стовпчик tsvector і GIN-індекс на ньому
+POSTGRESQL_FORWARD = [
+    """ALTER TABLE task_manager_searchdocument ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(body, '')), 'B')
+    ) STORED""",
+    "CREATE INDEX search_document_vector_idx ON task_manager_searchdocument USING gin (vector)",
+]
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS search_document_vector_idx",
+    "ALTER TABLE task_manager_searchdocument DROP COLUMN IF EXISTS vector",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD})
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRESQL_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0008_updated_at_last_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task', 'Завдання'), ('comment', 'Коментар')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.comment')),
+                ('dashboard', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.dashboard')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.task')),
+                ('todolist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.todolist')),
+            ],
+            options={
+                'verbose_name': 'Пошуковий документ',
+                'verbose_name_plural': 'Пошукові документи',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, parent_field):
+    counts = queryset.filter(**{parent_field: OuterRef("pk")}).order_by().values(parent_field)
+    return Coalesce(Subquery(counts.annotate(n=Count("pk")).values("n")), Value(0))
+
+
+# Лічильники для наявних рядків
+def fill_counters(apps, schema_editor):
+    Dashboard = apps.get_model("task_manager", "Dashboard")
+    TodoList = apps.get_model("task_manager", "TodoList")
+    Task = apps.get_model("task_manager", "Task")
+    Comment = apps.get_model("task_manager", "Comment")
+    Dashboard.objects.update(todolist_count=_count(TodoList.objects.all(), "dashboard"))
+    TodoList.objects.update(**{
+        f"{status}_count": _count(Task.objects.filter(status=status), "todolist")
+        for status in ("draft", "in_progress", "completed", "archived")
+    })
+    Task.objects.update(comment_count=_count(Comment.objects.all(), "task"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0009_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboard',
+            name='todolist_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кількість списків'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Кількість коментарів'),
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='archived_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='completed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='draft_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='in_progress_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
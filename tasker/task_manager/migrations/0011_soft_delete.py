@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0010_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboard',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Видалено в'),
+        ),
+        migrations.AddField(
+            model_name='todolist',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Видалено в'),
+        ),
+        migrations.AddIndex(
+            model_name='dashboard',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='dashboard_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todolist',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='todolist_deleted_idx'),
+        ),
+    ]
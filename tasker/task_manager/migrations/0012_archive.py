@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0011_soft_delete'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200, verbose_name='Назва')),
+                ('content', models.TextField(blank=True, verbose_name='Контент')),
+                ('status', models.CharField(choices=[('draft', 'Чернетка'), ('in_progress', 'В процесі'), ('completed', 'Завершено'), ('archived', 'Архів')], max_length=20, verbose_name='Статус')),
+                ('priority', models.CharField(choices=[('low', 'Низький'), ('medium', 'Середній'), ('high', 'Високий'), ('urgent', 'Терміновий')], max_length=10, verbose_name='Приорітет')),
+                ('deadline', models.DateField(blank=True, null=True, verbose_name='Дедлайн')),
+                ('created_at', models.DateTimeField(verbose_name='Створено в')),
+                ('updated_at', models.DateTimeField(verbose_name='Оновлено в')),
+                ('position', models.CharField(blank=True, default='', max_length=255, verbose_name='Позиція')),
+                ('archived_at', models.DateTimeField(verbose_name='Архівовано в')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('todolist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='task_manager.todolist', verbose_name='Список завдань')),
+            ],
+            options={
+                'verbose_name': 'Архівне завдання',
+                'verbose_name_plural': 'Архівні завдання',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField(blank=True, verbose_name='Контент')),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(verbose_name='Оновлено в')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='task_manager.archivedtask', verbose_name='Завдання')),
+            ],
+            options={
+                'verbose_name': 'Архівний коментар',
+                'verbose_name_plural': 'Архівні коментарі',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['todolist', 'archived_at', 'id'], name='archived_task_todolist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['task', 'created_at', 'id'], name='archived_comment_task_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Наявні завдання потрапляють у журнал як такі, що з'явилися у своїй поточній колонці
+# в момент створення; коди статусів — як у flow.STATUS_CODES
+SEED_TRANSITIONS = """
+    INSERT INTO task_manager_tasktransition (todolist_id, task_id, from_status, to_status, at)
+    SELECT todolist_id, id, NULL,
+           CASE status WHEN 'draft' THEN 1 WHEN 'in_progress' THEN 2 WHEN 'completed' THEN 3 ELSE 4 END,
+           created_at
+    FROM task_manager_task
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlowRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_transition_id', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CycleTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('task_id', models.PositiveBigIntegerField()),
+                ('seconds', models.PositiveIntegerField()),
+                ('dashboard', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.dashboard')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dashboard', 'day'], name='cycle_time_dashboard_day_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FlowDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.PositiveSmallIntegerField()),
+                ('entered', models.PositiveIntegerField(default=0)),
+                ('exited', models.PositiveIntegerField(default=0)),
+                ('dashboard', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.dashboard')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dashboard', 'day', 'status'), name='flow_daily_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.PositiveBigIntegerField()),
+                ('from_status', models.PositiveSmallIntegerField(null=True)),
+                ('to_status', models.PositiveSmallIntegerField(null=True)),
+                ('at', models.DateTimeField()),
+                ('todolist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task_manager.todolist')),
+            ],
+            options={
+                'verbose_name': 'Перехід завдання',
+                'verbose_name_plural': 'Переходи завдань',
+                'indexes': [models.Index(fields=['task_id', 'at'], name='transition_task_idx')],
+            },
+        ),
+        migrations.RunSQL(SEED_TRANSITIONS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+from task_manager.bulk import advance_sequence
+
+
+# Наявні дошки лишаються в default. Лічильник id каталогу продовжує лічильник дошок,
+# бо далі id нових дошок видає саме каталог.
+def fill_catalog(apps, schema_editor):
+    Dashboard = apps.get_model("task_manager", "Dashboard")
+    DashboardShard = apps.get_model("task_manager", "DashboardShard")
+    using = schema_editor.connection.alias
+    DashboardShard.objects.using(using).bulk_create(
+        [DashboardShard(id=pk, shard="default") for pk in Dashboard.objects.using(using).values_list("pk", flat=True)],
+        batch_size=1000,
+    )
+    last = Dashboard.objects.using(using).order_by("-pk").values_list("pk", flat=True).first()
+    if last:
+        advance_sequence(DashboardShard, last, using)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0013_flow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.CharField(max_length=100)),
+                ('moving', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.RunPython(fill_catalog, migrations.RunPython.noop, hints={"model_name": "dashboardshard"}),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0014_dashboard_shard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='dashboard',
+            name='dashboard_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='todolist',
+            name='todolist_dashboard_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='dashboard',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at', 'id'], name='dashboard_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todolist',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['dashboard', 'created_at', 'id'], name='todolist_live_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+# Переходи до збереженої позиції вже у зведеннях
+def mark_rolled_up(apps, schema_editor):
+    FlowRollupState = apps.get_model("task_manager", "FlowRollupState")
+    TaskTransition = apps.get_model("task_manager", "TaskTransition")
+    using = schema_editor.connection.alias
+    last = FlowRollupState.objects.using(using).filter(pk=1).values_list("last_transition_id", flat=True).first()
+    if last:
+        TaskTransition.objects.using(using).filter(pk__lte=last).update(rolled_up=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0015_live_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasktransition',
+            name='rolled_up',
+            field=models.BooleanField(db_default=False, default=False),
+        ),
+        migrations.RunPython(mark_rolled_up, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='flowrollupstate',
+            name='last_transition_id',
+        ),
+        migrations.AddIndex(
+            model_name='tasktransition',
+            index=models.Index(condition=models.Q(('rolled_up', False)), fields=['id'], name='transition_pending_idx'),
+        ),
+    ]
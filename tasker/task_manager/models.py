@@ -1,37 +1,116 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .ranking import rank_between
 
-class Dashboard(models.Model):
+
+# Лічильники підтримуються оновленнями через F() (див. counters.py), тому повне
+# збереження об'єкта з форми не записує їх назад — інакше паралельна зміна загубиться
+class CounterFieldsMixin:
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            skipped = {*self.counter_fields, *self.get_deferred_fields()}
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+# М'яке видалення дошки чи списку: рядок одразу зникає з міксин доступу, а дерево під ним
+# пізніше видаляє пакетами команда purge_deleted (див. purge.py). Поле deleted_at — на моделі.
+class SoftDeleteMixin:
+    def soft_delete(self):
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["deleted_at"])
+
+
+# Поле лічильника завдань списку з цим статусом
+def status_count_field(status):
+    return f"{status}_count"
+
+
+class Dashboard(SoftDeleteMixin, CounterFieldsMixin, models.Model):
     title =  models.CharField(max_length = 200, verbose_name = "Назва") 
     description =  models.TextField(verbose_name = "Опис", blank = True) 
     created_at = models.DateTimeField(auto_now_add = True)
+    updated_at = models.DateTimeField(auto_now = True, verbose_name = "Оновлено в")
+    # Остання зміна будь-чого в дереві дошки: її самої, списків, завдань, коментарів, учасників (див. activity.py)
+    last_activity = models.DateTimeField(auto_now = True, verbose_name = "Остання активність")
     created_by = models.ForeignKey(User, on_delete = models.CASCADE, related_name='dashboards', verbose_name = "Автор")
     members = models.ManyToManyField(User, related_name="shared_dashboards", blank=True, verbose_name = "Учасники")
+    todolist_count = models.PositiveIntegerField(default = 0, editable = False, verbose_name = "Кількість списків")
+    deleted_at = models.DateTimeField(null = True, blank = True, editable = False, verbose_name = "Видалено в")
+
+    counter_fields = ("todolist_count",)
 
     def __str__(self):
         return self.title
+
+    # id нової дошки і шард, на якому вона житиме, видає каталог (див. shards.py)
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
+        from .shards import place_dashboard, use_shard
+        # Нова дошка пишеться на шард з каталогу, а не на той, що обрав роутер для create()
+        self.pk, kwargs["using"] = place_dashboard()
+        kwargs["force_insert"] = True
+        # Обробники сигналів збереження працюють із шардом дошки
+        with use_shard(kwargs["using"]):
+            super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Дошка"
         verbose_name_plural = "Дошки"
+        indexes = [
+            # Сторінки дошок показують лише невидалені, тож індекс порядку містить тільки їх
+            models.Index(fields=["created_at", "id"], condition=models.Q(deleted_at__isnull=True),
+                         name="dashboard_live_created_idx"),
+            models.Index(fields=["created_by", "created_at", "id"], name="dashboard_owner_created_idx"),
+            # Видалені дошки, які чекають на purge_deleted
+            models.Index(fields=["deleted_at"], condition=models.Q(deleted_at__isnull=False), name="dashboard_deleted_idx"),
+        ]
 
-class TodoList(models.Model):
+class TodoList(SoftDeleteMixin, CounterFieldsMixin, models.Model):
     dashboard = models.ForeignKey(Dashboard, on_delete = models.CASCADE, related_name= 'todolists', verbose_name = "Дошка")
     title =  models.CharField(max_length = 200, verbose_name = "Назва") 
     description =  models.TextField(verbose_name = "Опис", blank = True)
     created_at = models.DateTimeField(auto_now_add = True)
+    updated_at = models.DateTimeField(auto_now = True, verbose_name = "Оновлено в")
     important = models.BooleanField(default = False, verbose_name = "Важливість")
     created_by = models.ForeignKey(User, on_delete = models.CASCADE, related_name= 'todolists', verbose_name = "Автор")
+    # Кількість завдань у кожній колонці
+    draft_count = models.PositiveIntegerField(default = 0, editable = False)
+    in_progress_count = models.PositiveIntegerField(default = 0, editable = False)
+    completed_count = models.PositiveIntegerField(default = 0, editable = False)
+    archived_count = models.PositiveIntegerField(default = 0, editable = False)
+    deleted_at = models.DateTimeField(null = True, blank = True, editable = False, verbose_name = "Видалено в")
+
+    counter_fields = ("draft_count", "in_progress_count", "completed_count", "archived_count")
 
     def __str__(self):
         return self.title
+
+    def status_count(self, status):
+        return getattr(self, status_count_field(status))
+
+    @property
+    def task_count(self):
+        return sum(getattr(self, name) for name in self.counter_fields)
     
     class Meta:
         verbose_name = "Список завдань"
         verbose_name_plural = "Списки завдань"
+        indexes = [
+            models.Index(fields=["dashboard", "created_at", "id"], condition=models.Q(deleted_at__isnull=True),
+                         name="todolist_live_created_idx"),
+            models.Index(fields=["deleted_at"], condition=models.Q(deleted_at__isnull=False), name="todolist_deleted_idx"),
+        ]
 
 
-class Task(models.Model):
+class Task(CounterFieldsMixin, models.Model):
     todolist = models.ForeignKey(TodoList, on_delete = models.CASCADE, related_name= 'tasks', verbose_name = "Список завдань")
     title = models.CharField(max_length = 200, verbose_name = "Назва") 
     content = models.TextField(verbose_name = "Контент", blank = True)
@@ -53,19 +132,91 @@ class Task(models.Model):
     created_at = models.DateTimeField(auto_now_add = True, verbose_name = "Створено в")
     updated_at = models.DateTimeField(auto_now = True, verbose_name = "Оновлено в")
     created_by = models.ForeignKey(User, on_delete = models.CASCADE, related_name= 'tasks', verbose_name = "Автор")
-    
+    # Ключ ручного порядку в колонці (див. ranking.py)
+    position = models.CharField(max_length = 255, blank = True, default = "", editable = False, verbose_name = "Позиція")
+    comment_count = models.PositiveIntegerField(default = 0, editable = False, verbose_name = "Кількість коментарів")
+
+    counter_fields = ("comment_count",)
+
     def __str__(self):
         return self.title
+
+    # Скільки коментарів не вмістилось на картку: recent_comments підвантажує MainPageView
+    # не більше RECENT_COMMENTS_LIMIT, тож рахуємо від фактично завантажених
+    @property
+    def hidden_comment_count(self):
+        return max(self.comment_count - len(getattr(self, "recent_comments", ())), 0)
+
+    # Статус, з яким завдання прочитане з БД: зміна колонки переносить лічильник (див. counters.py)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    # Ключ для картки, що стає в кінець колонки
+    @staticmethod
+    def next_position(todolist_id, status):
+        last = Task.objects.filter(todolist_id=todolist_id, status=status).aggregate(last=models.Max("position"))["last"]
+        return rank_between(last, None)
+
+    # Те саме для пакета нових карток: один запит на всі колонки пакета.
+    # columns — (todolist_id, status) кожної картки, ключі повертаються в тому ж порядку
+    @staticmethod
+    def end_positions(columns):
+        last = {
+            (row["todolist_id"], row["status"]): row["last"]
+            for row in Task.objects.filter(todolist_id__in={todolist_id for todolist_id, _ in columns})
+            .values("todolist_id", "status").annotate(last=models.Max("position")).order_by()
+        }
+        positions = []
+        for column in columns:
+            last[column] = rank_between(last.get(column), None)
+            positions.append(last[column])
+        return positions
+
+    @staticmethod
+    def assign_end_positions(tasks):
+        positions = Task.end_positions([(task.todolist_id, task.status) for task in tasks])
+        for task, position in zip(tasks, positions):
+            task.position = position
+
+    # Картка стає в кінець колонки status. Статус, позиція і лічильники колонок (post_save)
+    # записуються в одній транзакції, тож збій лічильника не лишає картку в новій колонці
+    def move_to_end(self, status):
+        with transaction.atomic(using=self._state.db):
+            if self.status != status:
+                self.position = Task.next_position(self.todolist_id, status)
+            self.status = status
+            self.save(update_fields=["status", "position", "updated_at"])
+
+    def save(self, *args, **kwargs):
+        # Нова картка стає в кінець своєї колонки
+        update_fields = kwargs.get("update_fields")
+        if not self.position and self.todolist_id and (update_fields is None or "position" in update_fields):
+            self.position = Task.next_position(self.todolist_id, self.status)
+        super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "Завдання"
         verbose_name_plural = "Завдання"
+        indexes = [
+            models.Index(fields=["todolist", "created_at", "id"], name="task_todolist_created_idx"),
+            # Колонка дошки: список + статус, далі сортування за пріоритетом і дедлайном
+            models.Index(fields=["todolist", "status", "priority", "deadline"], name="task_column_idx"),
+            # Активні колонки без архіву, який росте найшвидше
+            models.Index(fields=["todolist", "status", "deadline"], condition=~models.Q(status="archived"),
+                         name="task_active_column_idx"),
+            # Ручний порядок карток у колонці
+            models.Index(fields=["todolist", "status", "position", "id"], name="task_column_rank_idx"),
+        ]
 
 class Comment(models.Model):
     task = models.ForeignKey(Task, on_delete = models.CASCADE, related_name = 'comments', verbose_name = 'Завдання')
     content = models.TextField(verbose_name = "Контент", blank = True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name = 'comments', verbose_name = 'Автор')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name = "Оновлено в")
 
     def __str__(self):
         return f"{self.created_by} → {self.task.title}"
@@ -73,3 +224,133 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "Коментар"
         verbose_name_plural = "Коментарі"
+        indexes = [
+            models.Index(fields=["task", "created_at", "id"], name="comment_task_created_idx"),
+        ]
+
+
+# Холодне сховище: старі завдання архівної колонки разом із коментарями (див. archive.py).
+# id збігаються з id гарячих рядків, тож відновлене завдання повертається під тим самим id.
+# Автоінкремент не видає id повторно, тому конфліктів при відновленні немає.
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key = True)
+    todolist = models.ForeignKey(TodoList, on_delete = models.CASCADE, related_name = 'archived_tasks', verbose_name = "Список завдань")
+    title = models.CharField(max_length = 200, verbose_name = "Назва")
+    content = models.TextField(verbose_name = "Контент", blank = True)
+    status = models.CharField(max_length = 20, verbose_name = "Статус", choices = Task._meta.get_field("status").choices)
+    priority = models.CharField(max_length = 10, verbose_name = "Приорітет", choices = Task._meta.get_field("priority").choices)
+    deadline = models.DateField(null = True, blank = True, verbose_name = "Дедлайн")
+    created_at = models.DateTimeField(verbose_name = "Створено в")
+    updated_at = models.DateTimeField(verbose_name = "Оновлено в")
+    created_by = models.ForeignKey(User, on_delete = models.CASCADE, related_name = '+', verbose_name = "Автор")
+    position = models.CharField(max_length = 255, blank = True, default = "", verbose_name = "Позиція")
+    archived_at = models.DateTimeField(verbose_name = "Архівовано в")
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        verbose_name = "Архівне завдання"
+        verbose_name_plural = "Архівні завдання"
+        indexes = [
+            models.Index(fields=["todolist", "archived_at", "id"], name="archived_task_todolist_idx"),
+        ]
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key = True)
+    task = models.ForeignKey(ArchivedTask, on_delete = models.CASCADE, related_name = 'comments', verbose_name = 'Завдання')
+    content = models.TextField(verbose_name = "Контент", blank = True)
+    created_by = models.ForeignKey(User, on_delete = models.CASCADE, related_name = '+', verbose_name = 'Автор')
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(verbose_name = "Оновлено в")
+
+    class Meta:
+        verbose_name = "Архівний коментар"
+        verbose_name_plural = "Архівні коментарі"
+        indexes = [
+            models.Index(fields=["task", "created_at", "id"], name="archived_comment_task_idx"),
+        ]
+
+
+# Документ повнотекстового пошуку: завдання або коментар разом із дошкою, до якої він належить.
+# Сам індекс — таблиця FTS5 у SQLite або стовпчик tsvector з GIN у PostgreSQL (див. search.py)
+class SearchDocument(models.Model):
+    kind = models.CharField(max_length = 10, choices = [("task", "Завдання"), ("comment", "Коментар")])
+    object_id = models.PositiveBigIntegerField()
+    dashboard = models.ForeignKey(Dashboard, on_delete = models.CASCADE, related_name = "+")
+    todolist = models.ForeignKey(TodoList, on_delete = models.CASCADE, related_name = "+")
+    task = models.ForeignKey(Task, on_delete = models.CASCADE, related_name = "+")
+    comment = models.ForeignKey(Comment, on_delete = models.CASCADE, null = True, blank = True, related_name = "+")
+    title = models.CharField(max_length = 200, blank = True)
+    body = models.TextField(blank = True)
+
+    class Meta:
+        verbose_name = "Пошуковий документ"
+        verbose_name_plural = "Пошукові документи"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="search_document_unique"),
+        ]
+
+
+# Журнал переходів завдань між колонками: лише додавання, рядок на кожну зміну статусу.
+# Статуси — компактні коди (див. flow.py); from_status None — завдання з'явилося на дошці
+# (створене, відновлене з архіву, імпортоване), to_status None — зникло з неї.
+# task_id без зовнішнього ключа: історія переживає видалення і архівування завдання.
+class TaskTransition(models.Model):
+    todolist = models.ForeignKey(TodoList, on_delete = models.CASCADE, related_name = "+")
+    task_id = models.PositiveBigIntegerField()
+    from_status = models.PositiveSmallIntegerField(null = True)
+    to_status = models.PositiveSmallIntegerField(null = True)
+    at = models.DateTimeField()
+    # Уже враховано у зведеннях (flow.rollup_batch); типове значення в БД — для вставок insert_rows
+    rolled_up = models.BooleanField(default = False, db_default = False)
+
+    class Meta:
+        verbose_name = "Перехід завдання"
+        verbose_name_plural = "Переходи завдань"
+        indexes = [
+            models.Index(fields=["task_id", "at"], name="transition_task_idx"),
+            # Ще не зведені переходи: зазвичай лише хвіст журналу
+            models.Index(fields=["id"], condition=models.Q(rolled_up=False), name="transition_pending_idx"),
+        ]
+
+
+# Щоденні зведення журналу: скільки завдань дошки увійшло в колонку і вийшло з неї за день
+class FlowDaily(models.Model):
+    dashboard = models.ForeignKey(Dashboard, on_delete = models.CASCADE, related_name = "+", db_index = False)
+    day = models.DateField()
+    status = models.PositiveSmallIntegerField()
+    entered = models.PositiveIntegerField(default = 0)
+    exited = models.PositiveIntegerField(default = 0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dashboard", "day", "status"], name="flow_daily_unique"),
+        ]
+
+
+# Час циклу кожного завершення: від першого входу в роботу до завершення, у секундах
+class CycleTime(models.Model):
+    dashboard = models.ForeignKey(Dashboard, on_delete = models.CASCADE, related_name = "+", db_index = False)
+    day = models.DateField()
+    task_id = models.PositiveBigIntegerField()
+    seconds = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["dashboard", "day"], name="cycle_time_dashboard_day_idx"),
+        ]
+
+
+# Один рядок на шард, який блокує зведення, щоб паралельні запуски йшли по черзі
+class FlowRollupState(models.Model):
+    pass
+
+
+# Глобальний каталог шардів (див. shards.py): рядок на кожну дошку, id рядка — id дошки,
+# тож id дошок не повторюються між шардами. moving — дошка переноситься на інший шард,
+# запис у неї тимчасово закритий.
+class DashboardShard(models.Model):
+    shard = models.CharField(max_length = 100)
+    moving = models.BooleanField(default = False)
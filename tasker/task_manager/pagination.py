@@ -0,0 +1,195 @@
+import base64
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+from .shards import fan_out
+
+
+# Порядок задається як список полів, "-" на початку означає спадання
+def parse_ordering(ordering):
+    return [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+
+
+def order_by_expressions(ordering):
+    return [F(name).desc() if descending else F(name).asc() for name, descending in parse_ordering(ordering)]
+
+
+# Умова "рядки після курсора" для довільного набору полів сортування
+def keyset_filter(ordering, values):
+    conditions = []
+    fields = parse_ordering(ordering)
+    for i, (name, descending) in enumerate(fields):
+        equal = {prev_name: values[j] for j, (prev_name, _) in enumerate(fields[:i])}
+        lookup = f"{name}__lt" if descending else f"{name}__gt"
+        conditions.append(Q(**equal) & Q(**{lookup: values[i]}))
+    return reduce(or_, conditions)
+
+
+# Рядок може бути об'єктом моделі або словником з values()
+def cursor_values(obj, ordering):
+    if isinstance(obj, dict):
+        return [obj[name] for name, _ in parse_ordering(ordering)]
+    return [getattr(obj, name) for name, _ in parse_ordering(ordering)]
+
+
+# DjangoJSONEncoder обрізає час до мілісекунд, а курсору потрібна точна межа
+class CursorJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+# Курсор для клієнта непрозорий: base64 від JSON зі значеннями полів сортування
+def encode_cursor(values):
+    raw = json.dumps(values, cls=CursorJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _field_for(queryset, name):
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    if name == "pk":
+        return queryset.model._meta.pk
+    return queryset.model._meta.get_field(name)
+
+
+def decode_cursor(token, queryset, ordering):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        fields = parse_ordering(ordering)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [_field_for(queryset, name).to_python(value) for (name, _), value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        raise BadRequest("Некоректний курсор.")
+
+
+# Типовий порядок для курсорної пагінації
+DEFAULT_ORDERING = ("created_at", "id")
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor=None, cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+        self.next_query = None
+        self.first_query = None
+
+    @classmethod
+    def from_rows(cls, rows, per_page, ordering=DEFAULT_ORDERING, cursor=None):
+        rows = list(rows)
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = encode_cursor(cursor_values(rows[-1], ordering))
+        return cls(rows, next_cursor, cursor)
+
+    # Сторінки одного запиту з кількох шардів у спільному порядку. Id унікальні між шардами,
+    # тож порядок повний, а курсор останнього рядка продовжує кожен шард з правильного місця.
+    @classmethod
+    def merged(cls, pages, per_page, ordering=DEFAULT_ORDERING, cursor=None):
+        pages = list(pages)
+        if len(pages) == 1:
+            return pages[0]
+        rows = [row for page in pages for row in page.object_list]
+        # Стійке сортування від останнього поля до першого
+        for name, descending in reversed(parse_ordering(ordering)):
+            rows.sort(key=lambda row: cursor_values(row, [name])[0], reverse=descending)
+        page = cls.from_rows(rows, per_page, ordering, cursor)
+        if not page.has_next and page.object_list and any(shard_page.has_next for shard_page in pages):
+            page.next_cursor = encode_cursor(cursor_values(page.object_list[-1], ordering))
+        return page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+# Курсорна (keyset) пагінація: глибока сторінка коштує стільки ж, скільки перша
+class KeysetPaginator:
+    def __init__(self, queryset, per_page, ordering=DEFAULT_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def page_queryset(self, cursor=None):
+        qs = self.queryset.order_by(*order_by_expressions(self.ordering))
+        if cursor:
+            qs = qs.filter(keyset_filter(self.ordering, decode_cursor(cursor, qs, self.ordering)))
+        return qs[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        return KeysetPage.from_rows(self.page_queryset(cursor), self.per_page, self.ordering, cursor)
+
+    async def apage(self, cursor=None):
+        rows = [row async for row in self.page_queryset(cursor)]
+        return KeysetPage.from_rows(rows, self.per_page, self.ordering, cursor)
+
+
+# Курсорна пагінація для ListView та сторінок зі списками
+class KeysetPaginationMixin:
+    paginate_by = 25
+    cursor_kwarg = "after"
+    keyset_ordering = DEFAULT_ORDERING
+
+    def get_cursor(self, cursor_kwarg=None):
+        return self.request.GET.get(cursor_kwarg or self.cursor_kwarg) or None
+
+    def get_keyset_paginator(self, queryset, per_page=None, ordering=None):
+        return KeysetPaginator(queryset, per_page or self.paginate_by, ordering or self.keyset_ordering)
+
+    def paginate_keyset(self, queryset, per_page=None, cursor_kwarg=None, ordering=None):
+        cursor_kwarg = cursor_kwarg or self.cursor_kwarg
+        paginator = self.get_keyset_paginator(queryset, per_page, ordering)
+        page = paginator.page(self.get_cursor(cursor_kwarg))
+        return paginator, self.link_page(page, cursor_kwarg)
+
+    # Та сама сторінка по всіх шардах (див. shards.fan_out): get_queryset викликається
+    # на кожному шарді окремо, бо набір доступних дошок у кожного свій
+    def paginate_keyset_across_shards(self, get_queryset, per_page=None, cursor_kwarg=None, ordering=None):
+        cursor_kwarg = cursor_kwarg or self.cursor_kwarg
+        per_page = per_page or self.paginate_by
+        ordering = tuple(ordering or self.keyset_ordering)
+        cursor = self.get_cursor(cursor_kwarg)
+        pages = fan_out(lambda: self.get_keyset_paginator(get_queryset(), per_page, ordering).page(cursor))
+        return self.link_page(KeysetPage.merged(pages, per_page, ordering, cursor), cursor_kwarg)
+
+    async def apaginate_keyset(self, queryset, per_page=None, cursor_kwarg=None, ordering=None):
+        cursor_kwarg = cursor_kwarg or self.cursor_kwarg
+        paginator = self.get_keyset_paginator(queryset, per_page, ordering)
+        page = await paginator.apage(self.get_cursor(cursor_kwarg))
+        return paginator, self.link_page(page, cursor_kwarg)
+
+    # Посилання на першу і наступну сторінки зі збереженням інших параметрів запиту
+    def link_page(self, page, cursor_kwarg):
+        query = self.request.GET.copy()
+        query.pop(cursor_kwarg, None)
+        page.first_query = query.urlencode()
+        if page.has_next:
+            query[cursor_kwarg] = page.next_cursor
+            page.next_query = query.urlencode()
+        return page
+
+    # Підміна стандартної OFFSET-пагінації ListView
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page = self.paginate_keyset(queryset, page_size)
+        return paginator, page, page.object_list, page.has_next or page.has_previous
@@ -0,0 +1,103 @@
+import time
+
+from django.db import connections, router, transaction
+from django.db.models import Q
+
+from .counters import counter_batch
+from .flow import rollup
+from .models import (Dashboard, TodoList, Task, Comment, ArchivedTask, ArchivedComment, SearchDocument,
+                     TaskTransition, FlowDaily, CycleTime, DashboardShard)
+from .shards import current_shard
+
+
+# Дошки і списки видаляються м'яко (SoftDeleteMixin), а їхні дерева прибирає purge().
+# Collector каскаду Django тримав би в пам'яті id кожного рядка і видаляв би все в одному
+# довгому запиті; тут кожен пакет — один DELETE ... WHERE id IN (SELECT ... LIMIT n)
+# у власній короткій транзакції, без сигналів і без читання рядків у Python.
+
+PURGE_BATCH_SIZE = 5000
+
+
+# М'яке видалення набору дошок чи списків (SoftDeleteMixin.soft_delete для кожного):
+# сигнали post_save оновлюють кеш фрагментів, активність дошки і лічильники
+def soft_delete(queryset):
+    with transaction.atomic(using=current_shard()), counter_batch():
+        objects = list(queryset.filter(deleted_at__isnull=True))
+        for obj in objects:
+            obj.soft_delete()
+    return len(objects)
+
+
+def deleted_dashboards():
+    return Dashboard.objects.filter(deleted_at__isnull=False)
+
+
+# Видалені списки і всі списки видалених дошок
+def deleted_todolists():
+    return TodoList.objects.filter(Q(deleted_at__isnull=False) | Q(dashboard__deleted_at__isnull=False))
+
+
+# Кроки видалення дерев списків todolists і дошок dashboards від листя до кореня: зовнішні
+# ключі перевіряються при коміті кожного пакета, тож на момент видалення рядка на нього
+# вже ніщо не посилається. Ними ж прибирається дошка, що переїхала на інший шард.
+def tree_steps(todolists, dashboards):
+    return [
+        ("search_documents", SearchDocument.objects.filter(Q(todolist__in=todolists) | Q(dashboard__in=dashboards))),
+        ("comments", Comment.objects.filter(task__todolist__in=todolists)),
+        ("tasks", Task.objects.filter(todolist__in=todolists)),
+        ("archived_comments", ArchivedComment.objects.filter(task__todolist__in=todolists)),
+        ("archived_tasks", ArchivedTask.objects.filter(todolist__in=todolists)),
+        ("transitions", TaskTransition.objects.filter(todolist__in=todolists)),
+        ("todolists", TodoList.objects.filter(pk__in=todolists)),
+        ("members", Dashboard.members.through.objects.filter(dashboard__in=dashboards)),
+        ("flow_daily", FlowDaily.objects.filter(dashboard__in=dashboards)),
+        ("cycle_times", CycleTime.objects.filter(dashboard__in=dashboards)),
+        ("dashboards", dashboards),
+    ]
+
+
+def purge_steps():
+    return tree_steps(deleted_todolists(), deleted_dashboards())
+
+
+# Без batch_size видаляє всі рядки набору одним запитом
+def delete_batch(queryset, batch_size=None):
+    using = router.db_for_write(queryset.model)
+    connection = connections[using]
+    meta = queryset.model._meta
+    table = connection.ops.quote_name(meta.db_table)
+    pk = connection.ops.quote_name(meta.pk.column)
+    queryset = queryset.order_by().values("pk")
+    sql, params = (queryset[:batch_size] if batch_size else queryset).query.get_compiler(using).as_sql()
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({sql})", params)
+        return cursor.rowcount
+
+
+def delete_steps(steps, batch_size=PURGE_BATCH_SIZE, pause=0.0, log=None):
+    deleted = {}
+    for name, queryset in steps:
+        deleted[name] = 0
+        while True:
+            count = delete_batch(queryset, batch_size)
+            deleted[name] += count
+            if count < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        if log and deleted[name]:
+            log(f"{name}: {deleted[name]}")
+    return deleted
+
+
+# Один прохід по всіх кроках на поточному шарді. pause — затримка між пакетами, щоб
+# не забирати базу в інших запитів. Повертає кількість видалених рядків на кожному кроці.
+# Переходи видалених списків спершу потрапляють у зведення дошки (flow.rollup), а рядки
+# каталогу видалених дошок прибираються разом із ними.
+def purge(batch_size=PURGE_BATCH_SIZE, pause=0.0, log=None):
+    rollup()
+    dashboard_ids = list(deleted_dashboards().values_list("pk", flat=True))
+    deleted = delete_steps(purge_steps(), batch_size, pause, log)
+    for start in range(0, len(dashboard_ids), batch_size):
+        DashboardShard.objects.filter(pk__in=dashboard_ids[start:start + batch_size]).delete()
+    return deleted
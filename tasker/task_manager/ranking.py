@@ -0,0 +1,87 @@
+# Ключі порядку карток. Ключ — рядок із цифр системи числення з основою 36:
+# фіксовані RANK_WIDTH символів цілої частини та необов'язковий дробовий хвіст.
+# Рядки порівнюються лексикографічно, тож між будь-якими двома ключами завжди є новий,
+# і переміщення картки змінює лише її власний рядок. Додавання в кінець чи на початок
+# змінює лише цілу частину, тому ключ не росте; росте лише хвіст при вставках між сусідами.
+# Лише цифри й малі літери: так порядок однаковий і в SQLite, і в локалях PostgreSQL.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+ZERO = DIGITS[0]
+RANK_WIDTH = 6
+MAX_INTEGER = BASE ** RANK_WIDTH - 1
+
+
+def _to_digits(value, length=RANK_WIDTH):
+    digits = []
+    for _ in range(length):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+def _split(key):
+    if len(key) < RANK_WIDTH or key[RANK_WIDTH:].endswith(ZERO) or any(c not in DIGITS for c in key):
+        raise ValueError(f"Некоректний ключ порядку: {key!r}")
+    return int(key[:RANK_WIDTH], BASE), key[:RANK_WIDTH], key[RANK_WIDTH:]
+
+
+# Дріб строго між a та b ("" означає 0, None — 1), без нулів у кінці
+def _midpoint(a, b):
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else ZERO) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+# Перший ключ у порожній колонці
+INITIAL_RANK = _to_digits(BASE ** RANK_WIDTH // 2)
+
+
+# Ключ строго між before і after; None або "" означає відсутність сусіда
+def rank_between(before=None, after=None):
+    before = before or None
+    after = after or None
+
+    if before is None and after is None:
+        return INITIAL_RANK
+
+    if after is None:
+        value, head, tail = _split(before)
+        if value < MAX_INTEGER:
+            return _to_digits(value + 1)
+        return head + _midpoint(tail, None)
+
+    if before is None:
+        value, head, tail = _split(after)
+        if tail:
+            return _to_digits(value) if value > 0 else head + _midpoint("", tail)
+        if value > 0:
+            return _to_digits(value - 1)
+        raise ValueError("Немає місця перед найменшим ключем")
+
+    if before >= after:
+        raise ValueError(f"Некоректний порядок ключів: {before!r} >= {after!r}")
+    low, low_head, low_tail = _split(before)
+    high, _, high_tail = _split(after)
+    if low == high:
+        return low_head + _midpoint(low_tail, high_tail)
+    if high - low > 1:
+        return _to_digits((low + high) // 2)
+    # Сусідні цілі: будь-який хвіст після before менший за after
+    return low_head + _midpoint(low_tail, None)
+
+
+# Рівномірно розподілені ключі для count карток (початкове заповнення і перебалансування)
+def rank_sequence(count):
+    step = (MAX_INTEGER + 1) // (count + 1)
+    return [_to_digits(step * (i + 1)) for i in range(count)]
@@ -0,0 +1,142 @@
+import time
+from functools import reduce
+from operator import add
+
+from django.db import connections, transaction
+from django.db.models import F, Sum
+
+from .bulk import insert_rows
+from .flow import TRANSITION_COLUMNS, rollup
+from .models import (Dashboard, TodoList, Task, Comment, ArchivedTask, ArchivedComment, SearchDocument,
+                     TaskTransition, FlowDaily, CycleTime, DashboardShard)
+from .purge import delete_steps, tree_steps
+from .shards import fan_out, shard_aliases, use_shard
+
+
+# Перенесення дошки між шардами без зупинки сервісу. Дошка позначається в каталозі як
+# moving: читання працюють зі старого шарду як завжди, а запис у неї ShardMiddleware
+# відхиляє з 503 і Retry-After. Після паузи grace (запити, що вже почали писати, встигають
+# завершитись) дерево копіюється пакетами під тими самими id — діапазони id шардів не
+# перетинаються. Далі каталог перемикається на новий шард, і старе дерево видаляється
+# пакетами, як у purge. Якщо копіювання впало, недокопійоване прибирається, а дошка
+# лишається на старому шарді.
+
+MOVE_BATCH_SIZE = 1000
+MOVE_GRACE = 2.0
+MAX_MOVES = 10
+
+
+# Рядки дерева від кореня до листя: на момент вставки рядка його батьки вже скопійовані
+def tree_querysets(dashboard_id):
+    return [
+        ("dashboards", Dashboard.objects.filter(pk=dashboard_id)),
+        ("members", Dashboard.members.through.objects.filter(dashboard_id=dashboard_id)),
+        ("todolists", TodoList.objects.filter(dashboard_id=dashboard_id)),
+        ("tasks", Task.objects.filter(todolist__dashboard_id=dashboard_id)),
+        ("comments", Comment.objects.filter(task__todolist__dashboard_id=dashboard_id)),
+        ("archived_tasks", ArchivedTask.objects.filter(todolist__dashboard_id=dashboard_id)),
+        ("archived_comments", ArchivedComment.objects.filter(task__todolist__dashboard_id=dashboard_id)),
+        ("search_documents", SearchDocument.objects.filter(dashboard_id=dashboard_id)),
+        ("flow_daily", FlowDaily.objects.filter(dashboard_id=dashboard_id)),
+        ("cycle_times", CycleTime.objects.filter(dashboard_id=dashboard_id)),
+    ]
+
+
+def dashboard_tree_steps(dashboard_id):
+    return tree_steps(TodoList.objects.filter(dashboard_id=dashboard_id), Dashboard.objects.filter(pk=dashboard_id))
+
+
+# Пакети рядків набору з бази source за первинним ключем, підготовлені для бази target
+def _batches(queryset, fields, source, target, batch_size):
+    connection = connections[target]
+    rows = queryset.using(source).order_by("pk").values_list("pk", *(field.attname for field in fields))
+    last_pk = None
+    while batch := list((rows if last_pk is None else rows.filter(pk__gt=last_pk))[:batch_size]):
+        last_pk = batch[-1][0]
+        yield [[field.get_db_prep_save(value, connection) for field, value in zip(fields, row[1:])] for row in batch]
+
+
+def copy_rows(queryset, source, target, batch_size=MOVE_BATCH_SIZE):
+    fields = queryset.model._meta.concrete_fields
+    copied = 0
+    for rows in _batches(queryset, fields, source, target, batch_size):
+        with transaction.atomic(using=target):
+            insert_rows(queryset.model, [field.name for field in fields], rows, returning=False, using=target)
+        copied += len(rows)
+    return copied
+
+
+# Журнал переходів отримує нові id разом із позначкою rolled_up: зведення дошки вже скопійовані,
+# тож новий шард зводить лише те, що не встиг звести старий
+def copy_transitions(queryset, source, target, batch_size=MOVE_BATCH_SIZE):
+    columns = (*TRANSITION_COLUMNS, "rolled_up")
+    fields = [TaskTransition._meta.get_field(name) for name in columns]
+    copied = 0
+    with transaction.atomic(using=target):
+        for rows in _batches(queryset, fields, source, target, batch_size):
+            insert_rows(TaskTransition, columns, rows, returning=False, using=target)
+            copied += len(rows)
+    return copied
+
+
+def move_dashboard(dashboard_id, target, batch_size=MOVE_BATCH_SIZE, grace=MOVE_GRACE, log=None):
+    source = DashboardShard.objects.get(pk=dashboard_id).shard
+    if source == target:
+        return {}
+    DashboardShard.objects.filter(pk=dashboard_id).update(moving=True)
+    copied = {}
+    try:
+        time.sleep(grace)
+        # Усі переходи дошки мають потрапити у зведення, що копіюються
+        with use_shard(source):
+            rollup()
+        for name, queryset in tree_querysets(dashboard_id):
+            copied[name] = copy_rows(queryset, source, target, batch_size)
+        copied["transitions"] = copy_transitions(TaskTransition.objects.filter(todolist__dashboard_id=dashboard_id),
+                                                 source, target, batch_size)
+    except BaseException:
+        with use_shard(target):
+            delete_steps(dashboard_tree_steps(dashboard_id), batch_size)
+        DashboardShard.objects.filter(pk=dashboard_id).update(moving=False)
+        raise
+    if log:
+        log(", ".join(f"{name}: {count}" for name, count in copied.items() if count))
+
+    DashboardShard.objects.filter(pk=dashboard_id).update(shard=target, moving=False)
+    with use_shard(source):
+        delete_steps(dashboard_tree_steps(dashboard_id), batch_size)
+    return copied
+
+
+# Планування
+
+# Вага дошки — кількість її завдань за лічильниками списків; порожні дошки не враховуються
+def dashboard_weights():
+    tasks = reduce(add, (F(name) for name in TodoList.counter_fields))
+    shards = fan_out(lambda: dict(
+        TodoList.objects.filter(deleted_at__isnull=True, dashboard__deleted_at__isnull=True)
+        .values("dashboard_id").annotate(weight=Sum(tasks)).filter(weight__gt=0).order_by()
+        .values_list("dashboard_id", "weight")
+    ))
+    return dict(zip(shard_aliases(), shards))
+
+
+# Жадібний план: з найважчого шарду на найлегший переїжджає дошка, після якої різниця
+# між ними стає найменшою; зупиняється, коли жодне перенесення різницю не зменшує.
+# Повертає [(дошка, звідки, куди, вага)].
+def plan_moves(weights, max_moves=MAX_MOVES):
+    weights = {alias: dict(dashboards) for alias, dashboards in weights.items()}
+    loads = {alias: sum(dashboards.values()) for alias, dashboards in weights.items()}
+    moves = []
+    while len(moves) < max_moves:
+        heavy, light = max(loads, key=loads.get), min(loads, key=loads.get)
+        gap = loads[heavy] - loads[light]
+        candidates = [(weight, pk) for pk, weight in weights[heavy].items() if 0 < weight < gap]
+        if not candidates:
+            break
+        weight, pk = min(candidates, key=lambda candidate: (abs(gap - 2 * candidate[0]), candidate[1]))
+        weights[light][pk] = weights[heavy].pop(pk)
+        loads[heavy] -= weight
+        loads[light] += weight
+        moves.append((pk, heavy, light, weight))
+    return moves
@@ -0,0 +1,99 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Читання з реплік. Репліки перелічені в REPLICA_DATABASES; middleware вмикає їх лише
+# для безпечних запитів (GET, HEAD), усі записи і решта коду йдуть у default.
+# Після запису користувач на REPLICA_PIN_SECONDS закріплюється за основною базою,
+# щоб наступна сторінка (зазвичай редірект після POST) бачила щойно змінене, хоч репліка й відстає.
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+PIN_COOKIE = "tasker_primary"
+PIN_SALT = "task_manager.replicas"
+
+# Репліка поточного запиту: одна на весь запит, щоб усі його читання бачили один знімок
+_replica = ContextVar("replica_alias", default=None)
+
+
+def replica_aliases():
+    return getattr(settings, "REPLICA_DATABASES", ())
+
+
+def pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 5)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        # Усередині транзакції на основній базі читаємо з неї ж: там видно власні записи
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    # Репліки — копії основної бази, тож зв'язки між їхніми об'єктами дозволені
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    # Схема потрапляє на репліки реплікацією, а не міграціями
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in replica_aliases()
+
+
+def is_pinned(request):
+    return request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_SALT, max_age=pin_seconds()) is not None
+
+
+def choose_replica(request):
+    aliases = replica_aliases()
+    if not aliases or request.method not in SAFE_METHODS or is_pinned(request):
+        return None
+    return random.choice(aliases)
+
+
+# Підпис cookie містить час, тож max_age перевіряється на сервері і клієнт не продовжить закріплення
+def pin_to_primary(request, response):
+    if replica_aliases() and request.method not in SAFE_METHODS:
+        response.set_signed_cookie(PIN_COOKIE, "1", salt=PIN_SALT, max_age=pin_seconds(),
+                                   httponly=True, samesite="Lax")
+    return response
+
+
+# Стоїть перед сесіями й автентифікацією, щоб і вони читалися з репліки
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _replica.set(choose_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return pin_to_primary(request, response)
+
+    async def __acall__(self, request):
+        token = _replica.set(choose_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return pin_to_primary(request, response)
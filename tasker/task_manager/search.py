@@ -0,0 +1,148 @@
+import re
+
+from django.db import connections, router
+
+from .access import accessible_dashboards_query
+from .after_commit import transaction_state
+from .models import Task, Comment, SearchDocument
+
+
+SEARCH_RESULTS_LIMIT = 20
+# Скільки слів із запиту враховується
+SEARCH_MAX_TERMS = 8
+# До цієї кількості доступних дошок обмеження входить у сам MATCH, далі — фільтр за підзапитом доступу
+SCOPE_MATCH_LIMIT = 200
+INDEX_BATCH_SIZE = 2000
+# Останнє слово запиту шукається як префікс, якщо воно не довше за найдовший префіксний
+# індекс FTS5; довші шукаються цілими словами, бо злиття списків без індексу повільне
+PREFIX_MAX_LENGTH = 6
+
+FTS_TABLE = "task_manager_search_fts"
+DOCUMENT_TABLE = SearchDocument._meta.db_table
+
+TERM_RE = re.compile(r"\w+")
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:SEARCH_MAX_TERMS]
+
+
+# Індексація
+
+def _upsert(documents):
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=INDEX_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["dashboard", "todolist", "task", "comment", "title", "body"],
+    )
+
+
+def index_task_rows(rows):
+    _upsert([
+        SearchDocument(kind="task", object_id=pk, dashboard_id=dashboard_id, todolist_id=todolist_id,
+                       task_id=pk, title=title, body=content)
+        for pk, title, content, todolist_id, dashboard_id in rows
+    ])
+
+
+def index_comment_rows(rows):
+    _upsert([
+        SearchDocument(kind="comment", object_id=pk, dashboard_id=dashboard_id, todolist_id=todolist_id,
+                       task_id=task_id, comment_id=pk, body=content)
+        for pk, content, task_id, todolist_id, dashboard_id in rows
+    ])
+
+
+def task_rows(qs):
+    return qs.values_list("id", "title", "content", "todolist_id", "todolist__dashboard_id")
+
+
+def comment_rows(qs):
+    return qs.values_list("id", "content", "task_id", "task__todolist_id", "task__todolist__dashboard_id")
+
+
+def index_tasks(task_ids):
+    if task_ids:
+        index_task_rows(task_rows(Task.objects.filter(pk__in=task_ids)))
+
+
+def index_comments(comment_ids):
+    if comment_ids:
+        index_comment_rows(comment_rows(Comment.objects.filter(pk__in=comment_ids)))
+
+
+def _index_pending(pending):
+    index_tasks(pending["task"])
+    index_comments(pending["comment"])
+
+
+# Поза транзакцією документ оновлюється одразу, інакше — одним пакетом після коміту.
+# Видаляти документи не треба: їх прибирає каскад зовнішніх ключів.
+def schedule_reindex(kind, pk):
+    pending = transaction_state("search-reindex", lambda: {"task": set(), "comment": set()}, _index_pending)
+    if pending is None:
+        (index_tasks if kind == "task" else index_comments)([pk])
+        return
+    pending[kind].add(pk)
+
+
+# Пошук. Результати — від найновіших: так запит із LIMIT зупиняється на перших
+# збігах і не рахує релевантність для всіх документів, що містять часте слово.
+
+def _is_prefix(term):
+    return len(term) <= PREFIX_MAX_LENGTH
+
+
+def _fts_match(terms, dashboard_ids=None):
+    words = [f'"{term}"' for term in terms]
+    if _is_prefix(terms[-1]):
+        words[-1] += "*"
+    match = "{title body} : (" + " ".join(words) + ")"
+    if dashboard_ids is not None:
+        match += " AND scope : (" + " OR ".join(f"d{pk}" for pk in sorted(dashboard_ids)) + ")"
+    return match
+
+
+def _search_sqlite(user, terms, dashboard_ids, limit):
+    if len(dashboard_ids) <= SCOPE_MATCH_LIMIT:
+        sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rowid DESC LIMIT %s"
+        params = [_fts_match(terms, dashboard_ids), limit]
+    else:
+        scope_sql, scope_params = accessible_dashboards_query(user).query.sql_with_params()
+        sql = (
+            f"SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.dashboard_id IN ({scope_sql}) ORDER BY {FTS_TABLE}.rowid DESC LIMIT %s"
+        )
+        params = [_fts_match(terms), *scope_params, limit]
+    with connections[router.db_for_read(SearchDocument)].cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_postgresql(user, terms, dashboard_ids, limit):
+    tsquery = " & ".join(f"'{term}'" for term in terms)
+    if _is_prefix(terms[-1]):
+        tsquery += ":*"
+    scope_sql, scope_params = accessible_dashboards_query(user).query.sql_with_params()
+    sql = (
+        f"SELECT id FROM {DOCUMENT_TABLE} WHERE vector @@ to_tsquery('simple', %s) "
+        f"AND dashboard_id IN ({scope_sql}) ORDER BY id DESC LIMIT %s"
+    )
+    with connections[router.db_for_read(SearchDocument)].cursor() as cursor:
+        cursor.execute(sql, [tsquery, *scope_params, limit])
+        return [row[0] for row in cursor.fetchall()]
+
+
+# Документи, доступні користувачу; dashboard_ids — уже відомий набір доступних дошок
+def search(user, query, dashboard_ids, limit=SEARCH_RESULTS_LIMIT):
+    terms = search_terms(query)
+    if not terms or not dashboard_ids:
+        return []
+
+    backend = _search_postgresql if connections[router.db_for_read(SearchDocument)].vendor == "postgresql" else _search_sqlite
+    ids = backend(user, terms, dashboard_ids, limit)
+    # Документи видаленого списку лишаються в індексі, доки їх не прибере purge_deleted
+    documents = SearchDocument.objects.filter(todolist__deleted_at__isnull=True).in_bulk(ids)
+    return [documents[pk] for pk in ids if pk in documents]
@@ -0,0 +1,39 @@
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+# Сесії в кеші з наскрізним записом у базу (cached_db): запит бере сесію з кешу, а до
+# таблиці сесій іде лише при промаху. Збереження пропускається, якщо дані не змінились від
+# завантаження: присвоєння того самого значення (повторний вхід, порожнє сховище
+# повідомлень) теж позначає сесію зміненою.
+class SessionStore(CachedDBStore):
+    # Стан, який востаннє прочитано з кешу чи бази або записано туди
+    _stored = None
+
+    def _state(self, data):
+        return self.session_key, self.serializer().dumps(data)
+
+    def _unchanged(self, must_create):
+        return (not must_create and self.session_key is not None and "_session_cache" in self.__dict__
+                and self._stored == self._state(self._session_cache))
+
+    def load(self):
+        data = super().load()
+        self._stored = self._state(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._stored = self._state(data)
+        return data
+
+    def save(self, must_create=False):
+        if self._unchanged(must_create):
+            return
+        super().save(must_create)
+        self._stored = self._state(self._session_cache)
+
+    async def asave(self, must_create=False):
+        if self._unchanged(must_create):
+            return
+        await super().asave(must_create)
+        self._stored = self._state(self._session_cache)
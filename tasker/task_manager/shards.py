@@ -0,0 +1,360 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, models
+from django.http import HttpResponse, JsonResponse
+
+from .bulk import advance_sequence
+from .models import DashboardShard
+from .replicas import SAFE_METHODS
+
+
+# Горизонтальне шардування дошок. Дошка з усім деревом (списки, завдання, коментарі, архів,
+# пошуковий індекс, журнал і зведення потоку) живе на одній базі з SHARD_DATABASES. Каталог
+# у default зберігає шард кожної дошки (DashboardShard) і видає id нових дошок; там же
+# користувачі, а на кожен інший шард вони дзеркаляться, щоб працювали зовнішні ключі.
+# ShardMiddleware обирає шард за дошкою з URL чи за об'єктами запиту, ShardRouter направляє
+# туди запити моделей task_manager; сторінки з кількома дошками опитують усі шарди паралельно
+# (fan_out).
+# Id рядків на шарді N починаються з N * SHARD_ID_SPAN, тож вони унікальні між шардами
+# і дошка переїжджає на інший шард під тими самими id (див. rebalance.py).
+
+SHARD_ID_SPAN = 10 ** 12
+FAN_OUT_WORKERS = 8
+# Через скільки секунд клієнту повторити запис у дошку, що саме переїжджає
+MOVE_RETRY_AFTER = 5
+
+# Шард поточного запиту чи команди; None — default
+_shard = ContextVar("shard_alias", default=None)
+
+
+def shard_aliases():
+    return list(getattr(settings, "SHARD_DATABASES", None) or [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def current_shard():
+    return _shard.get() or DEFAULT_DB_ALIAS
+
+
+# Чи обрано шард для запиту: інакше запит іде в default, а списки треба збирати з усіх шардів
+def shard_selected():
+    return _shard.get() is not None
+
+
+@contextmanager
+def use_shard(alias):
+    token = _shard.set(alias)
+    try:
+        yield
+    finally:
+        _shard.reset(token)
+
+
+# Для команд обслуговування: шарди по черзі, кожен поточний на час своєї ітерації
+def each_shard():
+    for alias in shard_aliases():
+        with use_shard(alias):
+            yield alias
+
+
+def _is_catalog(model):
+    return model._meta.app_label == "task_manager" and model._meta.model_name == "dashboardshard"
+
+
+# Моделі дерева дошки разом із проміжною таблицею учасників
+def sharded_models():
+    return [model for model in apps.get_app_config("task_manager").get_models(include_auto_created=True)
+            if not _is_catalog(model)]
+
+
+class ShardRouter:
+    def _db_for(self, model, hints):
+        if model._meta.app_label != "task_manager":
+            return None
+        if _is_catalog(model):
+            return DEFAULT_DB_ALIAS
+        if not is_sharded():
+            return None
+        # Пов'язані об'єкти читаються з бази, звідки прийшов їхній батько
+        instance = hints.get("instance")
+        if instance is not None and instance._meta.app_label == "task_manager" and instance._state.db:
+            return instance._state.db
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints)
+
+    # Користувач є на кожному шарді, тож автором чи учасником може бути будь-хто
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded() and (isinstance(obj1, User) or isinstance(obj2, User)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == "task_manager" and model_name == "dashboardshard":
+            return db == DEFAULT_DB_ALIAS
+        return None
+
+
+# Шард до кінця запиту чи команди; у запиті попередній повертає ShardMiddleware
+def set_shard(alias):
+    _shard.set(alias)
+
+
+# Каталог
+
+# id і шард нової дошки: шард обирається за id, тож дошки розходяться по шардах порівну
+def place_dashboard():
+    aliases = shard_aliases()
+    entry = DashboardShard.objects.create(shard=aliases[0])
+    if len(aliases) > 1:
+        entry.shard = aliases[entry.pk % len(aliases)]
+        entry.save(update_fields=["shard"])
+    return entry.pk, entry.shard
+
+
+# (шард, чи переїжджає дошка); з одним шардом каталог не читається
+def shard_for_dashboard(dashboard_id):
+    if not is_sharded():
+        return DEFAULT_DB_ALIAS, False
+    return DashboardShard.objects.filter(pk=dashboard_id).values_list("shard", "moving").first() or (DEFAULT_DB_ALIAS, False)
+
+
+# Шлях від рядка моделі до id його дошки
+DASHBOARD_FIELDS = {
+    "dashboard": "pk",
+    "todolist": "dashboard_id",
+    "task": "todolist__dashboard_id",
+    "comment": "task__todolist__dashboard_id",
+}
+
+
+# Шард не визначити за запитом: об'єкти з дошок на різних шардах або дошка саме переїжджає
+class ShardRoutingError(Exception):
+    def __init__(self, error, status=400, **extra):
+        super().__init__(error)
+        self.status = status
+        self.payload = {"success": False, "error": error, **extra}
+
+    def response(self):
+        response = JsonResponse(self.payload, status=self.status)
+        if self.status == 503:
+            response["Retry-After"] = str(MOVE_RETRY_AFTER)
+        return response
+
+
+# {id: id дошки} для рядків моделі. Id видає шард, на якому рядок створено (діапазони по
+# SHARD_ID_SPAN), тож спершу рядок шукається там; решту — після переїзду дошки — на всіх шардах.
+def dashboards_of(model, ids):
+    field = DASHBOARD_FIELDS[model._meta.model_name]
+    aliases = shard_aliases()
+    origins = {}
+    for pk in ids:
+        if pk // SHARD_ID_SPAN < len(aliases):
+            origins.setdefault(aliases[pk // SHARD_ID_SPAN], []).append(pk)
+    found = {}
+    for alias, group in origins.items():
+        found.update(model.objects.using(alias).filter(pk__in=group).values_list("pk", field))
+    rest = [pk for pk in ids if pk not in found]
+    if rest:
+        for rows in fan_out(lambda: list(model.objects.filter(pk__in=rest).values_list("pk", field))):
+            found.update(rows)
+    return found
+
+
+# (шард, чи переїжджає дошка) для об'єктів запиту за каталогом їхніх дошок; (None, False),
+# якщо таких об'єктів немає на жодному шарді — тоді view сама відповість 404
+def shard_for_objects(model, ids):
+    ids = set(ids)
+    dashboard_ids = ids if model._meta.model_name == "dashboard" else set(dashboards_of(model, ids).values())
+    entries = list(DashboardShard.objects.filter(pk__in=dashboard_ids).values_list("pk", "shard", "moving"))
+    groups = {}
+    for pk, alias, moving in entries:
+        groups.setdefault(alias, []).append(pk)
+    if len(groups) > 1:
+        raise ShardRoutingError("cross_shard", groups=sorted(sorted(pks) for pks in groups.values()))
+    if not groups:
+        return None, False
+    return next(iter(groups)), any(moving for _, _, moving in entries)
+
+
+# Обирає шард за об'єктами запиту; запис у дошку, що переїжджає, відхиляється з 503
+def route_to_objects(model, ids, write=False):
+    if not is_sharded():
+        return
+    alias, moving = shard_for_objects(model, ids)
+    if moving and write:
+        raise ShardRoutingError("dashboard_moving", status=503)
+    if alias is not None:
+        set_shard(alias)
+
+
+# Паралельні запити до шардів
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FAN_OUT_WORKERS, thread_name_prefix="shard")
+        return _executor
+
+
+# Потік пулу відкриває власні з'єднання; старі закриваються, як наприкінці запиту
+def _run_on(alias, function):
+    close_old_connections()
+    try:
+        with use_shard(alias):
+            return function()
+    finally:
+        close_old_connections()
+
+
+# Виконує function на кожному шарді і повертає результати в порядку шардів. Контекст
+# (поточний запит для PerformanceMiddleware, репліка) копіюється в потоки пулу.
+def fan_out(function, aliases=None):
+    aliases = shard_aliases() if aliases is None else list(aliases)
+    if len(aliases) == 1:
+        with use_shard(aliases[0]):
+            return [function()]
+    futures = [_pool().submit(copy_context().run, _run_on, alias, function) for alias in aliases]
+    return [future.result() for future in futures]
+
+
+# Користувачі на шардах
+
+USER_MIRROR_FIELDS = ("username", "first_name", "last_name", "email", "is_staff", "is_active", "is_superuser",
+                      "date_joined")
+MIRROR_BATCH_SIZE = 1000
+
+
+def mirror_aliases():
+    return [alias for alias in shard_aliases() if alias != DEFAULT_DB_ALIAS]
+
+
+# Копія користувача без пароля: вхід перевіряється лише в default
+def mirror_users(users, aliases=None):
+    mirrors = [User(pk=user.pk, password="!", **{name: getattr(user, name) for name in USER_MIRROR_FIELDS})
+               for user in users]
+    for alias in mirror_aliases() if aliases is None else aliases:
+        User.objects.using(alias).bulk_create(mirrors, batch_size=MIRROR_BATCH_SIZE, update_conflicts=True,
+                                              unique_fields=["id"], update_fields=USER_MIRROR_FIELDS)
+
+
+def unmirror_user(user_id):
+    for alias in mirror_aliases():
+        User.objects.using(alias).filter(pk=user_id).delete()
+
+
+# Після migrate на шарді: діапазон id шарду і всі користувачі
+def prepare_shard(alias):
+    aliases = shard_aliases()
+    if alias not in aliases or alias == DEFAULT_DB_ALIAS:
+        return
+    start = aliases.index(alias) * SHARD_ID_SPAN
+    for model in sharded_models():
+        if isinstance(model._meta.pk, models.AutoField):
+            advance_sequence(model, start, alias)
+    users = User.objects.using(DEFAULT_DB_ALIAS).order_by("pk")
+    last = 0
+    while batch := list(users.filter(pk__gt=last)[:MIRROR_BATCH_SIZE]):
+        mirror_users(batch, [alias])
+        last = batch[-1].pk
+
+
+# Middleware
+
+# Потокова відповідь читається вже після middleware, тож кожен шматок береться на шарді запиту
+def _stream_on(alias, content):
+    iterator = iter(content)
+    while True:
+        with use_shard(alias):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def _on_shard(response, alias):
+    if alias is not None and response.streaming and not response.is_async:
+        response.streaming_content = _stream_on(alias, response.streaming_content)
+    return response
+
+
+# Шард запиту — за об'єктами, які називає запит (shard_objects(request, view_kwargs) view повертає
+# модель і id; див. shard_for_objects), за дошкою з аргументу URL (shard_url_kwarg view, типово
+# dashboard_pk) або з параметра ?dashboard=. Запис у дошку, що переїжджає, відхиляється з 503;
+# об'єкти з різних шардів — 400.
+class ShardMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _shard.set(None)
+        try:
+            response = self.get_response(request)
+            alias = _shard.get()
+        finally:
+            _shard.reset(token)
+        return _on_shard(response, alias)
+
+    async def __acall__(self, request):
+        token = _shard.set(None)
+        try:
+            response = await self.get_response(request)
+            alias = _shard.get()
+        finally:
+            _shard.reset(token)
+        return _on_shard(response, alias)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not is_sharded():
+            return None
+        try:
+            alias, moving = self.route(request, getattr(view_func, "view_class", None), view_kwargs)
+        except ShardRoutingError as e:
+            return e.response()
+        if alias is None:
+            return None
+        if moving and request.method not in SAFE_METHODS:
+            response = HttpResponse("Дошка переноситься на інший сервер, повторіть за кілька секунд.", status=503)
+            response["Retry-After"] = str(MOVE_RETRY_AFTER)
+            return response
+        set_shard(alias)
+        return None
+
+    def route(self, request, view_class, view_kwargs):
+        shard_objects = getattr(view_class, "shard_objects", None)
+        target = shard_objects(request, view_kwargs) if shard_objects else None
+        if target:
+            return shard_for_objects(*target)
+        dashboard_id = str(view_kwargs.get(getattr(view_class, "shard_url_kwarg", "dashboard_pk"))
+                           or request.GET.get("dashboard") or "")
+        if not dashboard_id.isdigit():
+            return None, False
+        return shard_for_dashboard(int(dashboard_id))
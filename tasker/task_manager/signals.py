@@ -0,0 +1,282 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_migrate
+from django.dispatch import receiver
+
+from . import counters, flow
+from .activity import touch_dashboard, touch_todolist_dashboards
+from .after_commit import deleting, transaction_state
+from .auth import forget_user
+from .events import broker, queue_event, task_event_data
+from .fragments import bump_versions, version_key
+from .models import Dashboard, TodoList, Task, Comment
+from .search import schedule_reindex
+from .shards import mirror_aliases, mirror_users, prepare_shard, set_shard, shard_aliases, unmirror_user
+
+
+# bulk_create і bulk_update не шлють сигналів, а від post_save залежать
+# кеш фрагментів і активність дошки. У транзакції обробники самі прибирають повтори.
+def send_saved(model, objects, created, update_fields=None):
+    for obj in objects:
+        post_save.send(sender=model, instance=obj, created=created, update_fields=update_fields,
+                       raw=False, using=obj._state.db)
+
+
+# Користувачі, у чиїй бічній панелі є дошка: власник і учасники. У транзакції — один запит на дошку.
+def dashboard_audience(dashboard_id):
+    audiences = transaction_state("dashboard-audiences", dict)
+    if audiences is not None and dashboard_id in audiences:
+        return audiences[dashboard_id]
+
+    owners = Dashboard.objects.filter(pk=dashboard_id).values_list("created_by_id", flat=True)
+    members = Dashboard.members.through.objects.filter(dashboard_id=dashboard_id).values_list("user_id", flat=True)
+    audience = set(owners.union(members))
+    if audiences is not None:
+        audiences[dashboard_id] = audience
+    return audience
+
+
+def bump_users(user_ids):
+    bump_versions(*(version_key("user", user_id) for user_id in user_ids))
+
+
+@receiver(post_save, sender=Dashboard)
+def dashboard_saved(sender, instance, **kwargs):
+    bump_versions(version_key("dashboard", instance.pk))
+    bump_users(dashboard_audience(instance.pk))
+
+
+# Після видалення учасників уже не знайти, тому запам'ятовуємо їх заздалегідь
+@receiver(pre_delete, sender=Dashboard)
+def dashboard_deleting(sender, instance, **kwargs):
+    instance._fragment_audience = dashboard_audience(instance.pk)
+    deleted = deleting("dashboard")
+    if deleted is not None:
+        deleted[instance.pk] = None
+
+
+@receiver(post_delete, sender=Dashboard)
+def dashboard_deleted(sender, instance, **kwargs):
+    bump_versions(version_key("dashboard", instance.pk))
+    bump_users(getattr(instance, "_fragment_audience", {instance.created_by_id}))
+
+
+@receiver(m2m_changed, sender=Dashboard.members.through)
+def dashboard_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and not reverse:
+        instance._fragment_cleared_members = set(instance.members.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    # З боку користувача змінюється лише його бічна панель
+    if reverse:
+        bump_users([instance.pk])
+        for dashboard_id in pk_set or ():
+            touch_dashboard(dashboard_id)
+        return
+
+    if action == "post_clear":
+        bump_users(getattr(instance, "_fragment_cleared_members", ()))
+    else:
+        bump_users(pk_set)
+    touch_dashboard(instance.pk)
+
+
+@receiver(post_save, sender=TodoList)
+@receiver(post_delete, sender=TodoList)
+def todolist_changed(sender, instance, **kwargs):
+    bump_versions(version_key("todolist", instance.pk), version_key("dashboard", instance.dashboard_id))
+    # У бічній панелі показується кількість списків дошки
+    bump_users(dashboard_audience(instance.dashboard_id))
+    touch_dashboard(instance.dashboard_id)
+
+
+@receiver(pre_delete, sender=TodoList)
+def todolist_deleting(sender, instance, **kwargs):
+    deleted = deleting("todolist")
+    if deleted is not None:
+        deleted[instance.pk] = instance.dashboard_id
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    bump_versions(version_key("todolist", instance.todolist_id))
+    touch_todolist_dashboards(instance.todolist_id)
+
+
+# Каскад спершу шле pre_delete для всіх рядків, тож коментарі видаленого завдання
+# знаходять свій список тут без окремого запиту
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    deleted = deleting("task")
+    if deleted is not None:
+        deleted[instance.pk] = instance.todolist_id
+
+
+def comment_todolist_id(instance):
+    deleted = deleting("task")
+    if deleted is not None and instance.task_id in deleted:
+        return deleted[instance.task_id]
+    if Comment.task.is_cached(instance):
+        return instance.task.todolist_id
+    return Task.objects.filter(pk=instance.task_id).values_list("todolist_id", flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    todolist_id = comment_todolist_id(instance)
+    if todolist_id is not None:
+        bump_versions(version_key("todolist", todolist_id))
+        touch_todolist_dashboards(todolist_id)
+
+
+# Пошуковий індекс оновлюється лише коли змінився текст
+def _text_changed(update_fields, text_fields):
+    return update_fields is None or not text_fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=Task)
+def task_text_saved(sender, instance, update_fields=None, **kwargs):
+    if _text_changed(update_fields, {"title", "content"}):
+        schedule_reindex("task", instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_text_saved(sender, instance, update_fields=None, **kwargs):
+    if _text_changed(update_fields, {"content"}):
+        schedule_reindex("comment", instance.pk)
+
+
+# Живе оновлення відкритих дошок. Зміна лише статусу і позиції — переміщення картки,
+# інші зміни клієнт підтягує як оновлену картку.
+MOVE_FIELDS = frozenset({"status", "position", "updated_at"})
+
+
+@receiver(post_save, sender=Task)
+def task_event_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        event_type = "task.created"
+    elif update_fields is not None and MOVE_FIELDS.issuperset(update_fields):
+        event_type = "task.moved"
+    else:
+        event_type = "task.updated"
+    queue_event(instance.todolist_id, event_type, **task_event_data(instance))
+
+
+# Картки видаленого списку окремо не анонсуються
+@receiver(post_delete, sender=Task)
+def task_event_deleted(sender, instance, **kwargs):
+    deleted = deleting("todolist")
+    if deleted is None or instance.todolist_id not in deleted:
+        queue_event(instance.todolist_id, "task.deleted", task_id=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_event_saved(sender, instance, created, **kwargs):
+    if not created or not broker.has_subscribers():
+        return
+    todolist_id = comment_todolist_id(instance)
+    if todolist_id is not None:
+        queue_event(todolist_id, "comment.added", task_id=instance.task_id, comment_id=instance.pk)
+
+
+# Журнал переходів між колонками (див. flow.py). Підключений раніше за лічильники,
+# бо ті оновлюють _loaded_status, з якого береться попередній статус.
+@receiver(post_save, sender=Task)
+def task_transition_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        flow.task_added(instance)
+    elif update_fields is None or "status" in update_fields:
+        flow.task_moved(instance)
+
+
+@receiver(post_delete, sender=Task)
+def task_transition_deleted(sender, instance, **kwargs):
+    flow.task_removed(instance)
+
+
+@receiver(post_save, sender=TodoList)
+def todolist_transitions(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and "deleted_at" in update_fields and instance.deleted_at:
+        flow.todolist_removed(instance)
+
+
+# Денормалізовані лічильники (див. counters.py)
+@receiver(post_save, sender=TodoList)
+def todolist_counted(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        counters.todolist_added(instance)
+    # М'яко видалений список дошка вже не показує
+    elif update_fields is not None and "deleted_at" in update_fields and instance.deleted_at:
+        counters.todolist_removed(instance)
+
+
+@receiver(post_delete, sender=TodoList)
+def todolist_uncounted(sender, instance, **kwargs):
+    counters.todolist_removed(instance)
+
+
+@receiver(post_save, sender=Task)
+def task_counted(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        counters.task_added(instance)
+    elif update_fields is None or "status" in update_fields:
+        counters.task_moved(instance)
+
+
+@receiver(post_delete, sender=Task)
+def task_uncounted(sender, instance, **kwargs):
+    counters.task_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def comment_counted(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_uncounted(sender, instance, **kwargs):
+    counters.comment_removed(instance)
+
+
+# Кешований користувач сесії (див. auth.py). Скидається одразу і ще раз після коміту:
+# паралельний запит міг між ними покласти в кеш рядок, який транзакція ще не змінила.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+    transaction.on_commit(lambda: forget_user(instance.pk), using=kwargs["using"])
+
+
+# Шарди (див. shards.py). Користувачі дзеркаляться після коміту, коли рядок уже остаточний;
+# вхід змінює лише last_login, а пароль на шардах не зберігається.
+@receiver(post_save, sender=User)
+def user_mirrored(sender, instance, update_fields=None, **kwargs):
+    if not mirror_aliases() or (update_fields is not None and set(update_fields) <= {"last_login", "password"}):
+        return
+    transaction.on_commit(lambda: mirror_users([instance]), using=kwargs["using"])
+
+
+@receiver(post_delete, sender=User)
+def user_unmirrored(sender, instance, **kwargs):
+    if mirror_aliases():
+        transaction.on_commit(lambda: unmirror_user(instance.pk), using=kwargs["using"])
+
+
+# Міграції даних звертаються до моделей без using, тож на час migrate шардом стає база,
+# яку мігрують; після міграцій шард отримує свій діапазон id і користувачів
+@receiver(pre_migrate)
+def shard_migrating(sender, using, **kwargs):
+    if using in shard_aliases():
+        set_shard(using)
+
+
+@receiver(post_migrate)
+def shard_migrated(sender, using, **kwargs):
+    if sender.label == "task_manager":
+        prepare_shard(using)
+        set_shard(None)
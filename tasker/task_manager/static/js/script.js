@@ -36,14 +36,154 @@ document.addEventListener("DOMContentLoaded", () => {
 
   document.querySelectorAll('.task-card').forEach(attachDragHandlers);
 
-  document.querySelectorAll('.delete-form').forEach(function(form){
-    form.addEventListener('submit', function(e){
-      if (!confirm('Підтвердити видалення? Цю операцію не можна відмінити.')) {
-        e.preventDefault();
+  function findCard(taskId) {
+    return document.querySelector(`.task-card[data-task-id="${taskId}"]`);
+  }
+
+  // Лічильники в заголовках колонок: картка перейшла з колонки from у колонку to
+  function shiftCount(from, to) {
+    if (from === to) return;
+    [[from, -1], [to, 1]].forEach(([column, delta]) => {
+      const badge = column && column.querySelector('.column-count');
+      if (badge) badge.textContent = Math.max(0, Number(badge.textContent) + delta);
+    });
+  }
+
+  document.addEventListener('submit', function(e){
+    if (!e.target.classList.contains('delete-form')) return;
+    if (!confirm('Підтвердити видалення? Цю операцію не можна відмінити.')) {
+      e.preventDefault();
+    }
+  });
+
+  // Довантаження наступних карток колонки
+  document.addEventListener('click', async (e) => {
+    const button = e.target.closest('.load-more');
+    if (!button) return;
+    button.disabled = true;
+    try {
+      const resp = await fetch(button.dataset.url, { credentials: 'same-origin' });
+      if (!resp.ok) throw new Error(resp.status);
+      const template = document.createElement('template');
+      template.innerHTML = await resp.text();
+      template.content.querySelectorAll('.task-card').forEach(attachDragHandlers);
+      button.replaceWith(template.content);
+    } catch (err) {
+      console.error('Load more failed:', err);
+      button.disabled = false;
+    }
+  });
+
+  // Переміщення збираються в пакет і відправляються одним запитом
+  const MOVE_DEBOUNCE_MS = 400;
+  const pendingMoves = new Map();
+  let flushTimer = null;
+
+  function queueMove(card, column, originParent, originNextSibling) {
+    const taskId = card.dataset.taskId;
+    const previous = pendingMoves.get(taskId);
+    pendingMoves.set(taskId, {
+      card,
+      status: column.dataset.status,
+      // Для відкату пам'ятаємо місце картки до першого переміщення в пакеті
+      originParent: previous ? previous.originParent : originParent,
+      originNextSibling: previous ? previous.originNextSibling : originNextSibling,
+    });
+    clearTimeout(flushTimer);
+    flushTimer = setTimeout(flushMoves, MOVE_DEBOUNCE_MS);
+  }
+
+  function revertMoves(batch) {
+    Array.from(batch.values()).reverse().forEach(move => {
+      if (!move.originParent) return;
+      shiftCount(move.card.closest('.board-column'), move.originParent.closest('.board-column'));
+      if (move.originNextSibling && move.originNextSibling.parentElement === move.originParent) {
+        move.originParent.insertBefore(move.card, move.originNextSibling);
+      } else {
+        placeInColumn(move.originParent, move.card);
       }
     });
+  }
+
+  async function flushMoves() {
+    if (!pendingMoves.size) return;
+    const batch = new Map(pendingMoves);
+    pendingMoves.clear();
+
+    // Порядок документа: картка вище в колонці надсилається раніше, тож сервер
+    // уже знає її новий ключ, коли рахує ключ для картки під нею
+    const moves = Array.from(document.querySelectorAll('.board-column .task-card'))
+      .filter(card => batch.has(card.dataset.taskId))
+      .map(card => {
+        const prev = card.previousElementSibling;
+        let next = card.nextElementSibling;
+        // Нижня межа — найближча картка, яка в цьому пакеті не рухається
+        while (next && next.classList.contains('task-card') && batch.has(next.dataset.taskId)) {
+          next = next.nextElementSibling;
+        }
+        return {
+          task_id: Number(card.dataset.taskId),
+          status: batch.get(card.dataset.taskId).status,
+          prev_id: prev && prev.classList.contains('task-card') ? Number(prev.dataset.taskId) : null,
+          next_id: next && next.classList.contains('task-card') ? Number(next.dataset.taskId) : null,
+        };
+      });
+
+    // Адреса дошки містить її id, за яким сервер обирає шард
+    const board = document.querySelector('.board[data-move-url]');
+    try {
+      const resp = await fetch(board ? board.dataset.moveUrl : window.taskBatchMoveUrl, {
+        method: 'POST',
+        credentials: 'same-origin',
+        keepalive: true,
+        headers: {
+          'X-CSRFToken': csrftoken || '',
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ moves })
+      });
+
+      const data = await resp.json().catch(() => ({}));
+      if (!resp.ok || !data.success) {
+        console.error('Batch move failed', resp.status, data);
+        alert('Помилка при оновленні статусу (див. консоль).');
+        revertMoves(batch);
+        return;
+      }
+      // Нові ключі позицій потрібні, щоб ставити на місце картки з живих оновлень
+      data.tasks.forEach(task => {
+        const card = findCard(task.task_id);
+        if (card) card.dataset.position = task.position;
+      });
+    } catch (err) {
+      console.error('Fetch error:', err);
+      alert('Мережева помилка при оновленні статусу.');
+      revertMoves(batch);
+    }
+  }
+
+  window.addEventListener('pagehide', () => {
+    if (!pendingMoves.size) return;
+    clearTimeout(flushTimer);
+    flushMoves();
   });
 
+  // Перша картка колонки, середина якої нижче курсора — перед нею вставляємо перетягнуту
+  function cardBelowPointer(column, y, dragged) {
+    return Array.from(column.querySelectorAll(':scope > .task-card'))
+      .filter(card => card !== dragged)
+      .find(card => {
+        const box = card.getBoundingClientRect();
+        return y < box.top + box.height / 2;
+      }) || null;
+  }
+
+  function placeInColumn(column, card) {
+    const loadMore = column.querySelector(':scope > .load-more');
+    if (loadMore) column.insertBefore(card, loadMore);
+    else column.appendChild(card);
+  }
+
   document.querySelectorAll('.board-column').forEach(column => {
     column.addEventListener('dragover', e => {
       e.preventDefault();
@@ -54,7 +194,7 @@ document.addEventListener("DOMContentLoaded", () => {
       column.classList.remove('drag-over');
     });
 
-    column.addEventListener('drop', async (e) => {
+    column.addEventListener('drop', (e) => {
       e.preventDefault();
       column.classList.remove('drag-over');
 
@@ -65,56 +205,118 @@ document.addEventListener("DOMContentLoaded", () => {
       }
       if (!card) return;
 
-      column.appendChild(card);
-
-      const taskId = card.dataset.taskId;
-      const newStatus = column.dataset.status;
-      const body = new URLSearchParams({ task_id: taskId, status: newStatus });
-
-      try {
-        const updateUrl = window.taskUpdateUrl;
-
-        const resp = await fetch(updateUrl, {
-          method: 'POST',
-          credentials: 'same-origin',
-          headers: {
-            'X-CSRFToken': csrftoken || '',
-            'Content-Type': 'application/x-www-form-urlencoded'
-          },
-          body: body.toString()
-        });
-
-        if (!resp.ok) {
-          const text = await resp.text();
-          console.error('Status update failed', resp.status, text);
-          alert('Помилка при оновленні статусу (див. консоль).');
-          if (prevParent) {
-            if (prevNextSibling) prevParent.insertBefore(card, prevNextSibling);
-            else prevParent.appendChild(card);
-          }
-          return;
-        }
+      const from = card.closest('.board-column');
+      const below = cardBelowPointer(column, e.clientY, card);
+      if (below) column.insertBefore(card, below);
+      else placeInColumn(column, card);
+      shiftCount(from, column);
+      queueMove(card, column, prevParent, prevNextSibling);
+      prevParent = null;
+      prevNextSibling = null;
+    });
+  });
+
+  // Живе оновлення дошки: зміни інших учасників приходять через Server-Sent Events
+  const board = document.querySelector('.board[data-events-url]');
+  if (board && window.EventSource) {
+    const todolistId = Number(board.dataset.todolist);
+    const source = new EventSource(board.dataset.eventsUrl);
+
+    // Картки, які користувач зараз тягне або ще не відправив, не чіпаємо
+    function isLocal(taskId) {
+      const id = String(taskId);
+      return pendingMoves.has(id) || (draggedCard && draggedCard.dataset.taskId === id);
+    }
+
+    // Порядок колонки: ключ позиції, далі id
+    function isAfter(card, position, taskId) {
+      if (card.dataset.position !== position) return card.dataset.position > position;
+      return Number(card.dataset.taskId) > taskId;
+    }
+
+    // Картка за межами завантаженої частини колонки з'явиться після "Показати ще"
+    function placeByPosition(card, status, position) {
+      const column = board.querySelector(`.board-column[data-status="${status}"]`);
+      shiftCount(card.closest('.board-column'), column);
+      if (!column) {
+        card.remove();
+        return;
+      }
+      card.dataset.position = position;
+      const taskId = Number(card.dataset.taskId);
+      const below = Array.from(column.querySelectorAll(':scope > .task-card'))
+        .find(other => other !== card && isAfter(other, position, taskId));
+      if (below) column.insertBefore(card, below);
+      else if (column.querySelector(':scope > .load-more')) card.remove();
+      else column.appendChild(card);
+    }
+
+    async function fetchCard(taskId) {
+      const resp = await fetch(board.dataset.cardUrl + taskId, { credentials: 'same-origin' });
+      if (!resp.ok) return null;
+      const template = document.createElement('template');
+      template.innerHTML = await resp.text();
+      const card = template.content.querySelector('.task-card');
+      if (card) attachDragHandlers(card);
+      return card;
+    }
 
-        const data = await resp.json();
-        if (!data.success) {
-          console.error('Server returned error:', data);
-          alert('Сервер відкинув оновлення статусу.');
-          if (prevParent) {
-            if (prevNextSibling) prevParent.insertBefore(card, prevNextSibling);
-            else prevParent.appendChild(card);
-          }
+    // Свіжа картка з сервера замість поточної; розгорнуті коментарі лишаються розгорнутими
+    async function refreshCard(data, place) {
+      const fresh = await fetchCard(data.task_id);
+      const current = findCard(data.task_id);
+      if (!fresh) {
+        if (current) {
+          shiftCount(current.closest('.board-column'), null);
+          current.remove();
         }
-      } catch (err) {
-        console.error('Fetch error:', err);
-        alert('Мережева помилка при оновленні статусу.');
-        if (prevParent) {
-          if (prevNextSibling) prevParent.insertBefore(card, prevNextSibling);
-          else prevParent.appendChild(card);
+        return;
+      }
+      if (current && current.querySelector('.collapse.show')) {
+        fresh.querySelector('.collapse').classList.add('show');
+      }
+      if (current) current.replaceWith(fresh);
+      if (place) placeByPosition(fresh, data.status, data.position);
+    }
+
+    function applyTaskChange(data, refresh) {
+      if (isLocal(data.task_id)) return;
+      const card = findCard(data.task_id);
+      if (data.todolist_id !== todolistId) {
+        if (card) {
+          shiftCount(card.closest('.board-column'), null);
+          card.remove();
         }
-      } finally {
-        prevParent = null;
-        prevNextSibling = null;
+      } else if (card && !refresh) {
+        placeByPosition(card, data.status, data.position);
+      } else {
+        refreshCard(data, true);
       }
+    }
+
+    const handlers = {
+      'task.created': data => applyTaskChange(data, true),
+      'task.updated': data => applyTaskChange(data, true),
+      'task.moved': data => applyTaskChange(data, false),
+      'task.deleted': data => {
+        const card = findCard(data.task_id);
+        if (card && !isLocal(data.task_id)) {
+          shiftCount(card.closest('.board-column'), null);
+          card.remove();
+        }
+      },
+      'comment.added': data => {
+        if (findCard(data.task_id)) refreshCard(data, false);
+      },
+    };
+    Object.entries(handlers).forEach(([type, handler]) => {
+      source.addEventListener(type, e => handler(JSON.parse(e.data)));
     });
-  });
+
+    // Частину подій пропущено (перезапуск сервера чи повільне з'єднання)
+    source.addEventListener('reload', () => {
+      source.close();
+      window.location.reload();
+    });
+  }
 });
@@ -0,0 +1,35 @@
+from django import template
+
+from task_manager.fragments import fragment_key, get_fragment_cache, get_fragment_timeout, record_fragment_lookup
+
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        key = fragment_key(context["request"], self.name, [value.resolve(context) for value in self.vary_on])
+        cache = get_fragment_cache()
+        content = cache.get(key)
+        record_fragment_lookup(self.name, content is not None)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, get_fragment_timeout())
+        return content
+
+
+# {% fragment "назва" версія інші_значення... %} ... {% endfragment %}
+# Вміст рендериться лише при промаху, тож ледачі дані з контексту тоді й не читаються
+@register.tag("fragment")
+def do_fragment(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' потребує назви фрагмента")
+    nodelist = parser.parse(("endfragment",))
+    parser.delete_first_token()
+    return FragmentCacheNode(nodelist, bits[1].strip("\"'"), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -1,3 +1,1706 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import gzip
+import io
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.template.base import Template
+from django.templatetags.static import static
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve, reverse
+from django.utils import timezone
+from django.views import View
+
+from . import events, flow, views
+from . import urls as task_manager_urls
+from .access import (accessible_dashboards_query, dashboard_ids_for_user, get_accessible_dashboard_ids,
+                     reset_accessible_dashboard_ids)
+from .async_views import use_async_views
+from .bench import seed
+from .checks import check_shared_cache
+from .auth import CachedModelBackend
+from .counters import counter_batch
+from .export import export_dashboard
+
+from .fragments import bump_versions, fragment_stats, get_versions, reset_fragment_stats, version_key
+from .importer import import_board
+from .middleware import QueryBudgetExceeded
+from .models import (Dashboard, TodoList, Task, Comment, ArchivedTask, ArchivedComment, SearchDocument, TaskTransition,
+                     FlowDaily, DashboardShard)
+from .ranking import MAX_INTEGER, RANK_WIDTH, _to_digits, rank_between, rank_sequence
+from .rebalance import plan_moves
+from .replicas import PIN_COOKIE, ReplicaMiddleware, ReplicaRouter
+from .sessions import SessionStore
+from .shards import SHARD_ID_SPAN, prepare_shard
+
+
+class MainPageQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def add_tasks(self, count, comments_per_task):
+        start = Task.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_tasks(start, count, comments_per_task)
+
+    def create_tasks(self, start, count, comments_per_task):
+        for i in range(start, start + count):
+            task = Task.objects.create(todolist=self.todolist, title=f"Завдання {i}", content="Текст",
+                                       status=["draft", "in_progress", "completed", "archived"][i % 4],
+                                       created_by=self.user)
+            for j in range(comments_per_task):
+                author = User.objects.create_user(f"author_{i}_{j}")
+                Comment.objects.create(task=task, content=f"Коментар {j}", created_by=author)
+
+    def board_query_count(self):
+        url = reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={self.todolist.pk}"
+        # Користувач сесії вже в кеші, як у звичайному потоці запитів
+        CachedModelBackend().get_user(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_tasks_and_comments(self):
+        self.add_tasks(1, 1)
+        small = self.board_query_count()
+
+        self.add_tasks(12, 7)
+        with self.captureOnCommitCallbacks(execute=True):
+            TodoList.objects.create(dashboard=self.dashboard, title="Ще список", description="Опис", created_by=self.user)
+            Dashboard.objects.create(title="Ще дошка", description="Опис", created_by=self.user)
+        large = self.board_query_count()
+
+        self.assertEqual(small, large)
+
+    def test_card_shows_counts_and_recent_comments(self):
+        self.add_tasks(1, 7)
+        url = reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={self.todolist.pk}"
+        response = self.client.get(url)
+        task = response.context["columns"][0].tasks[0]
+        self.assertEqual(task.comment_count, 7)
+        self.assertEqual([c.content for c in task.recent_comments], [f"Коментар {j}" for j in range(5)])
+        self.assertContains(response, "… ще 2")
+
+    # Залишок на картці береться від ліміту view, а не записаний у шаблоні
+    @mock.patch.object(views, "RECENT_COMMENTS_LIMIT", 3)
+    def test_card_remainder_follows_comment_limit(self):
+        self.add_tasks(1, 7)
+        url = reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={self.todolist.pk}"
+        response = self.client.get(url)
+        self.assertEqual(len(response.context["columns"][0].tasks[0].recent_comments), 3)
+        self.assertContains(response, "… ще 4")
+
+    @mock.patch.object(views, "BOARD_COLUMN_LIMIT", 1)
+    def test_columns_are_sorted_and_capped_with_cursor(self):
+        self.add_tasks(8, 0)
+        first = Task.objects.filter(status="draft").order_by("position").first()
+        urgent = Task.objects.filter(status="draft").order_by("position").last()
+        urgent.position = rank_between(None, first.position)
+        with self.captureOnCommitCallbacks(execute=True):
+            urgent.save()
+        url = reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={self.todolist.pk}"
+
+        draft = self.client.get(url).context["columns"][0]
+        self.assertEqual(draft.tasks, [urgent])
+        self.assertIsNotNone(draft.next_cursor)
+
+        more = self.client.get(url + f"&column=draft&after={draft.next_cursor}")
+        self.assertTemplateUsed(more, "main/board_cards.html")
+        self.assertEqual(len(more.context["column"].tasks), 1)
+        self.assertNotEqual(more.context["column"].tasks[0], urgent)
+        self.assertIsNone(more.context["column"].next_cursor)
+
+
+class AccessTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.member = User.objects.create_user("member")
+        self.stranger = User.objects.create_user("stranger")
+        self.owned = Dashboard.objects.create(title="Своя", created_by=self.owner)
+        self.owned.members.add(self.member)
+        self.shared = Dashboard.objects.create(title="Спільна", created_by=self.member)
+        self.shared.members.add(self.owner)
+        # Власник і водночас учасник: дошка має потрапити в набір один раз
+        self.both = Dashboard.objects.create(title="Обидва", created_by=self.owner)
+        self.both.members.add(self.owner)
+
+    def test_owned_and_shared_dashboards_without_duplicates(self):
+        ids = list(accessible_dashboards_query(self.owner))
+        self.assertEqual(sorted(ids), [self.owned.pk, self.shared.pk, self.both.pk])
+        self.assertEqual(dashboard_ids_for_user(self.member), {self.owned.pk, self.shared.pk})
+        self.assertEqual(dashboard_ids_for_user(self.stranger), frozenset())
+
+    def test_ids_are_computed_once_per_request(self):
+        request = RequestFactory().get("/")
+        request.user = self.owner
+        view = views.TaskAccessMixin()
+        view.request = request
+        with self.assertNumQueries(1):
+            ids = get_accessible_dashboard_ids(request)
+            self.assertIs(get_accessible_dashboard_ids(request), ids)
+            views.DashboardAccessMixin.get_queryset(view).query
+            view.get_queryset().query
+
+        reset_accessible_dashboard_ids(request)
+        self.shared.members.remove(self.owner)
+        self.assertEqual(get_accessible_dashboard_ids(request), {self.owned.pk, self.both.pk})
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_fragment_stats()
+        self.user = User.objects.create_user("owner", password="pass", is_staff=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис", created_by=self.user)
+            self.task = Task.objects.create(todolist=self.todolist, title="Завдання", content="Текст", created_by=self.user)
+        self.client.force_login(self.user)
+        self.url = reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={self.todolist.pk}"
+
+    def get_board(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_second_visit_is_served_from_cache(self):
+        _, cold = self.get_board()
+        response, warm = self.get_board()
+
+        self.assertLess(warm, cold)
+        self.assertContains(response, "Завдання")
+        stats = self.client.get(reverse("fragment_cache_stats")).json()
+        self.assertEqual(stats["fragments"]["column"], {"hits": 4, "misses": 4})
+        self.assertEqual(stats["fragments"]["sidebar"], {"hits": 1, "misses": 1})
+
+    def test_writes_invalidate_fragments(self):
+        self.get_board()
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(task=self.task, content="Новий коментар", created_by=self.user)
+            TodoList.objects.create(dashboard=self.dashboard, title="Другий список", description="Опис", created_by=self.user)
+        response, _ = self.get_board()
+        self.assertContains(response, "Новий коментар")
+        self.assertContains(response, "Другий список")
+        self.assertContains(response, "2 списків")
+
+        # bulk_update не шле сигналів, тож колонки скидає саме пакетне переміщення
+        other, = Task.objects.bulk_create([
+            Task(todolist=self.todolist, title="Інше", content="Текст", created_by=self.user, position=rank_between())
+        ])
+        self.assertNotContains(self.get_board()[0], "Інше")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("task_batch_move"), {"moves": [{"task_id": other.pk, "status": "completed"}]},
+                             content_type="application/json")
+        self.assertContains(self.get_board()[0], "Інше")
+
+    def test_membership_change_refreshes_member_sidebar(self):
+        member = User.objects.create_user("member", password="pass")
+        self.client.force_login(member)
+        self.assertNotContains(self.client.get(reverse("main")), "Дошка")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard.members.add(member)
+        self.assertContains(self.client.get(reverse("main")), "Дошка")
+
+    def test_works_with_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+        }):
+            _, cold = self.get_board()
+            _, warm = self.get_board()
+            self.assertLess(warm, cold)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.task.title = "Перейменоване"
+                self.task.save()
+            self.assertContains(self.get_board()[0], "Перейменоване")
+
+    # Версію, підняту в одному процесі, бачить екземпляр кешу іншого процесу
+    def test_version_bumps_reach_other_cache_instances(self):
+        key = version_key("todolist", self.todolist.pk)
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+        }):
+            first, second = caches.create_connection("default"), caches.create_connection("default")
+            with mock.patch("task_manager.fragments.get_fragment_cache", return_value=first):
+                version, = get_versions(key)
+            with mock.patch("task_manager.fragments.get_fragment_cache", return_value=second), \
+                    self.captureOnCommitCallbacks(execute=True):
+                bump_versions(key)
+            with mock.patch("task_manager.fragments.get_fragment_cache", return_value=first):
+                self.assertGreater(get_versions(key)[0], version)
+
+            with override_settings(CACHE_SINGLE_PROCESS=False, FRAGMENT_CACHE_ALIAS="local", CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+                "local": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            }):
+                self.assertEqual([error.id for error in check_shared_cache(None)], ["task_manager.E001"])
+
+    # Відкат точки збереження скидає її стан, але не стан решти транзакції
+    def test_bumps_survive_savepoint_rollback(self):
+        first, second = version_key("todolist", self.todolist.pk), version_key("dashboard", self.dashboard.pk)
+        versions = get_versions(first, second)
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            try:
+                with transaction.atomic():
+                    bump_versions(first)
+                    raise ValueError
+            except ValueError:
+                pass
+            bump_versions(second)
+        self.assertEqual(get_versions(first, second)[0], versions[0])
+        self.assertGreater(get_versions(first, second)[1], versions[1])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис", created_by=self.user)
+            self.task = Task.objects.create(todolist=self.todolist, title="Завдання", content="Текст", created_by=self.user)
+            self.comment = Comment.objects.create(task=self.task, content="Коментар", created_by=self.user)
+        self.client.force_login(self.user)
+        self.urls = [
+            reverse("dashboard_detail", kwargs={"dashboard_pk": self.dashboard.pk}),
+            reverse("todolist_detail", kwargs={"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk}),
+            reverse("task_detail", kwargs={"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk,
+                                           "task_pk": self.task.pk}),
+            reverse("comment_detail", kwargs={"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk,
+                                              "task_pk": self.task.pk, "comment_pk": self.comment.pk}),
+        ]
+
+    def test_matching_etag_returns_304_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response["Last-Modified"])
+
+                with CaptureQueriesContext(connection) as queries:
+                    cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached.content, b"")
+                self.assertEqual(cached.templates, [])
+                self.assertEqual(cached["ETag"], response["ETag"])
+                # Сесія, користувач, доступні дошки і валідатор
+                self.assertLessEqual(len(queries), 4)
+
+    def test_child_write_changes_etag_of_whole_tree(self):
+        etags = [self.client.get(url)["ETag"] for url in self.urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(task=self.task, content="Ще коментар", created_by=self.user)
+
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_is_not_shared_between_users(self):
+        member = User.objects.create_user("member", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard.members.add(member)
+        etag = self.client.get(self.urls[0])["ETag"]
+
+        self.client.force_login(member)
+        self.assertEqual(self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_inaccessible_object_is_404(self):
+        stranger = User.objects.create_user("stranger", password="pass")
+        self.client.force_login(stranger)
+        self.assertEqual(self.client.get(self.urls[2]).status_code, 404)
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def send(self, method, name, payload, **kwargs):
+        return getattr(self.client, method)(reverse(name, kwargs=kwargs), json.dumps(payload),
+                                            content_type="application/json")
+
+    def test_sparse_fields_and_keyset_pages(self):
+        for i in range(3):
+            Task.objects.create(todolist=self.todolist, title=f"Завдання {i}", content="Текст", created_by=self.user)
+        url = reverse("api_tasks") + f"?todolist={self.todolist.pk}&fields=id,title&limit=2"
+
+        first = self.client.get(url).json()
+        self.assertEqual([set(row) for row in first["results"]], [{"id", "title"}] * 2)
+        second = self.client.get(url + f"&after={first['next']}").json()
+        self.assertEqual([row["title"] for row in second["results"]], ["Завдання 2"])
+        self.assertIsNone(second["next"])
+
+        self.assertEqual(self.client.get(reverse("api_tasks") + "?fields=password").status_code, 400)
+
+    def test_access_rules_match_html_views(self):
+        stranger = User.objects.create_user("stranger", password="pass")
+        self.client.force_login(stranger)
+        self.assertEqual(self.client.get(reverse("api_dashboards")).json()["results"], [])
+        self.assertEqual(self.client.get(reverse("api_dashboard", kwargs={"pk": self.dashboard.pk})).status_code, 404)
+        response = self.send("post", "api_tasks", {"items": [{"todolist": self.todolist.pk, "title": "Т", "content": "Т"}]})
+        self.assertEqual(response.status_code, 404)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("api_dashboards")).status_code, 401)
+
+    def test_bulk_create_is_one_insert_and_all_or_nothing(self):
+        items = [{"todolist": self.todolist.pk, "title": f"Нове {i}", "content": "Текст"} for i in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.send("post", "api_tasks", {"items": items})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sum(q["sql"].startswith('INSERT INTO "task_manager_task" ') for q in queries), 1)
+        created = list(Task.objects.order_by("position").values_list("title", flat=True))
+        self.assertEqual(created, ["Нове 0", "Нове 1", "Нове 2"])
+
+        items.append({"todolist": self.todolist.pk, "title": "", "content": "Текст"})
+        response = self.send("post", "api_tasks", {"items": items})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("3", response.json()["errors"])
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_bulk_update_validates_only_changed_fields(self):
+        overdue = Task.objects.create(todolist=self.todolist, title="Старе", content="Текст", created_by=self.user,
+                                      deadline=datetime.date(2000, 1, 1))
+        other = Task.objects.create(todolist=self.todolist, title="Інше", content="Текст", created_by=self.user)
+
+        response = self.send("patch", "api_tasks", {"items": [
+            {"id": overdue.pk, "status": "completed"},
+            {"id": other.pk, "title": "Перейменоване"},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=overdue.pk).status, "completed")
+        self.assertEqual(Task.objects.get(pk=other.pk).title, "Перейменоване")
+
+        response = self.send("patch", "api_task", {"deadline": "2000-01-01"}, pk=other.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("deadline", response.json()["errors"]["0"])
+
+    # Зміна статусу через API ставить картку в кінець нової колонки
+    def test_status_change_moves_card_to_column_end(self):
+        done = [Task.objects.create(todolist=self.todolist, title=f"Готове {i}", content="Текст", status="completed",
+                                    created_by=self.user) for i in range(2)]
+        task = Task.objects.create(todolist=self.todolist, title="Картка", content="Текст", created_by=self.user)
+        response = self.send("patch", "api_task", {"status": "completed"}, pk=task.pk)
+        self.assertEqual(response.status_code, 200)
+        column = Task.objects.filter(todolist=self.todolist, status="completed").order_by("position", "id")
+        self.assertEqual(list(column.values_list("pk", flat=True)), [done[0].pk, done[1].pk, task.pk])
+        self.assertEqual(TodoList.objects.get(pk=self.todolist.pk).completed_count, 3)
+
+    def test_bulk_delete_checks_every_id_first(self):
+        tasks = [Task.objects.create(todolist=self.todolist, title=f"Т {i}", content="Текст", created_by=self.user)
+                 for i in range(2)]
+        response = self.send("delete", "api_tasks", {"ids": [tasks[0].pk, 999999]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.count(), 2)
+
+        response = self.send("delete", "api_tasks", {"ids": [task.pk for task in tasks]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.exists())
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_login(self.user)
+
+    @mock.patch("task_manager.pagination.KeysetPaginationMixin.paginate_by", 2)
+    def test_dashboard_list_walks_all_pages_by_cursor(self):
+        created = [Dashboard.objects.create(title=f"Дошка {i}", description="Опис", created_by=self.user) for i in range(5)]
+
+        seen, query = [], ""
+        while True:
+            response = self.client.get(reverse("dashboard_list") + "?" + query)
+            page = response.context["page_obj"]
+            seen += list(response.context["dashboards"])
+            if not page.has_next:
+                break
+            query = page.next_query
+
+        self.assertEqual(seen, created)
+
+    def test_invalid_cursor_is_bad_request(self):
+        response = self.client.get(reverse("dashboard_list") + "?after=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskBatchMoveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        todolist = TodoList.objects.create(dashboard=dashboard, title="Список", description="Опис", created_by=self.user)
+        self.tasks = [Task.objects.create(todolist=todolist, title=f"Завдання {i}", content="Текст", created_by=self.user)
+                      for i in range(3)]
+        self.client.force_login(self.user)
+
+    def move(self, moves):
+        return self.client.post(reverse("task_batch_move"), {"moves": moves}, content_type="application/json")
+
+    def test_moves_are_applied_in_one_update(self):
+        moves = [{"task_id": task.pk, "status": "archived", "position": i} for i, task in enumerate(self.tasks)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(moves)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(q["sql"].startswith('UPDATE "task_manager_task"') for q in queries), 1)
+        # Лічильники колонок списку — ще один UPDATE на весь пакет
+        self.assertEqual(sum(q["sql"].startswith('UPDATE "task_manager_todolist"') for q in queries), 1)
+        self.assertEqual(set(Task.objects.values_list("status", flat=True)), {"archived"})
+        todolist = TodoList.objects.get()
+        self.assertEqual((todolist.draft_count, todolist.archived_count), (0, 3))
+
+    def test_moves_keep_manual_order_and_write_only_moved_rows(self):
+        first, second, third = self.tasks
+        # Третю картку ставимо між першою та другою
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move([{"task_id": third.pk, "status": "draft", "prev_id": first.pk, "next_id": second.pk}])
+        self.assertEqual(response.status_code, 200)
+        update = next(q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+        self.assertIn(f'IN ({third.pk})', update)
+
+        order = list(Task.objects.filter(status="draft").order_by("position", "id"))
+        self.assertEqual(order, [first, third, second])
+
+    def test_neighbours_must_be_in_target_column(self):
+        first, second, third = self.tasks
+        other = TodoList.objects.create(dashboard=first.todolist.dashboard, title="Інший", description="Опис",
+                                        created_by=self.user)
+        foreign_list = TodoList.objects.create(
+            dashboard=Dashboard.objects.create(title="Чужа", created_by=User.objects.create_user("stranger")),
+            title="Чужий", description="Опис", created_by=self.user,
+        )
+        elsewhere = Task.objects.create(todolist=other, title="Деінде", content="Текст", created_by=self.user)
+        foreign = Task.objects.create(todolist=foreign_list, title="Чуже", content="Текст", created_by=self.user)
+        positions = dict(Task.objects.values_list("pk", "position"))
+
+        for moves in ([{"task_id": third.pk, "status": "completed", "prev_id": first.pk}],
+                      [{"task_id": third.pk, "status": "draft", "next_id": elsewhere.pk}],
+                      [{"task_id": third.pk, "status": "draft", "prev_id": foreign.pk}],
+                      [{"task_id": third.pk, "status": "draft", "prev_id": third.pk}]):
+            response = self.move(moves)
+            self.assertEqual(response.status_code, 400, moves)
+            self.assertEqual(response.json()["error"], "invalid_neighbour")
+        self.assertEqual(dict(Task.objects.values_list("pk", "position")), positions)
+
+        # Сусід, якого той самий пакет переносить у цю колонку, підходить
+        response = self.move([{"task_id": first.pk, "status": "completed"},
+                              {"task_id": third.pk, "status": "completed", "prev_id": first.pk}])
+        self.assertEqual(response.status_code, 200)
+
+    # Цілий position з першої версії пакета: індекс картки в новій колонці
+    def test_integer_position_is_still_accepted(self):
+        first, second, third = self.tasks
+        response = self.move([{"task_id": third.pk, "status": "draft", "position": 1}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Task.objects.filter(status="draft").order_by("position", "id")), [first, third, second])
+
+        response = self.move([{"task_id": task.pk, "status": "archived", "position": 0} for task in self.tasks])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Task.objects.order_by("position", "id")), [third, second, first])
+
+    def test_invalid_status_rejects_whole_batch(self):
+        response = self.move([{"task_id": self.tasks[0].pk, "status": "archived"},
+                              {"task_id": self.tasks[1].pk, "status": "deleted"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(Task.objects.values_list("status", flat=True)), {"draft"})
+
+    def test_foreign_tasks_are_not_found(self):
+        stranger = User.objects.create_user("stranger")
+        self.client.force_login(stranger)
+        response = self.move([{"task_id": self.tasks[0].pk, "status": "archived"}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).status, "draft")
+
+
+class RankingTests(SimpleTestCase):
+    def assertBetween(self, key, before, after):
+        if before:
+            self.assertLess(before, key)
+        if after:
+            self.assertLess(key, after)
+        self.assertFalse(key[RANK_WIDTH:].endswith("0"))
+
+    def test_append_and_prepend_at_limits(self):
+        top = _to_digits(MAX_INTEGER)
+        self.assertEqual(rank_between("000000"), "000001")
+        self.assertEqual(rank_between(None, "000001"), "000000")
+        key = top
+        for _ in range(40):
+            key, before = rank_between(key), key
+            self.assertBetween(key, before, None)
+        self.assertTrue(key.startswith(top))
+
+        with self.assertRaises(ValueError):
+            rank_between(None, "000000")
+        key = "0000001"
+        for _ in range(40):
+            key, after = rank_between(None, key), key
+            self.assertBetween(key, "000000", after)
+
+    def test_between_adjacent_keys_and_long_tails(self):
+        for before, after in [("000001", "000002"), ("abcdef", "abcdef1"), ("abcdefzzzz", "abcdeg"),
+                              ("abcdef1", "abcdef11"), ("abcdef0001", "abcdef001"), ("000000", "0000001")]:
+            self.assertBetween(rank_between(before, after), before, after)
+
+        # Вставки щоразу одразу після before: хвіст росте, порядок зберігається
+        before, after = "abcdef", "abcdeg"
+        for _ in range(100):
+            after = rank_between(before, after)
+            self.assertBetween(after, before, None)
+
+    def test_malformed_keys_are_rejected(self):
+        for key in ["abc", "ABCDEF", "abcde!", "abcdef0", "abcdef10"]:
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                rank_between(key)
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                rank_between(None, key)
+        for before, after in [("abcdef", "abcdef"), ("abcdeg", "abcdef")]:
+            with self.subTest(before=before, after=after), self.assertRaises(ValueError):
+                rank_between(before, after)
+
+    def test_sequence_is_sorted_and_fixed_width(self):
+        self.assertEqual(rank_sequence(0), [])
+        for count in (1, 2, 1000):
+            keys = rank_sequence(count)
+            self.assertEqual(len(keys), count)
+            self.assertEqual(keys, sorted(set(keys)))
+            self.assertEqual({len(key) for key in keys}, {RANK_WIDTH})
+            self.assertBetween(rank_between(keys[-1]), keys[-1], None)
+
+
+class RebalancePositionsTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("owner", password="pass")
+        dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=user)
+        self.todolist = TodoList.objects.create(dashboard=dashboard, title="Список", description="Опис", created_by=user)
+        self.user = user
+
+    def column(self, status, positions):
+        return [Task.objects.create(todolist=self.todolist, title=f"Завдання {i}", content="Текст", status=status,
+                                    position=position, created_by=self.user).pk
+                for i, position in enumerate(positions)]
+
+    def order(self, status):
+        return list(Task.objects.filter(todolist=self.todolist, status=status).order_by("position", "id")
+                    .values_list("pk", "position"))
+
+    def test_rewrites_long_keys_and_keeps_column_order(self):
+        draft = self.column("draft", ["i00000zzzzzzzzzz1", "i00000", "i00000zzzzzzzzzz", "i00001", "i00000zzzzzzzzzzz"])
+        # Ключ без значення (рядки до появи порядку) стає першим
+        Task.objects.filter(pk=draft[3]).update(position="")
+        expected = [pk for pk, _ in self.order("draft")]
+        self.assertNotEqual(expected, draft)
+        completed = self.column("completed", ["100000", "200000"])
+        out = io.StringIO()
+        call_command("rebalance_positions", stdout=out)
+        self.assertIn("Оновлено ключів: 5", out.getvalue())
+
+        order = self.order("draft")
+        self.assertEqual([pk for pk, _ in order], expected)
+        self.assertEqual([position for _, position in order], rank_sequence(5))
+        # Колонки з короткими ключами не переписуються
+        self.assertEqual(self.order("completed"), [(completed[0], "100000"), (completed[1], "200000")])
+
+        call_command("rebalance_positions", "--all", stdout=io.StringIO())
+        self.assertEqual(self.order("completed"), list(zip(completed, rank_sequence(2))))
+        self.assertEqual([pk for pk, _ in self.order("draft")], expected)
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_login(self.user)
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис", created_by=self.user)
+        self.task = Task.objects.create(todolist=self.todolist, title="Завдання", content="Текст", created_by=self.user)
+        Comment.objects.create(task=self.task, content="Коментар", created_by=self.user)
+
+    def counts(self):
+        todolist = TodoList.objects.get(pk=self.todolist.pk)
+        return {
+            "todolists": Dashboard.objects.get(pk=self.dashboard.pk).todolist_count,
+            "columns": {status: todolist.status_count(status) for status in ("draft", "in_progress", "completed", "archived")},
+            "comments": Task.objects.get(pk=self.task.pk).comment_count,
+        }
+
+    def test_counters_follow_creates_moves_and_deletes(self):
+        self.assertEqual(self.counts(), {
+            "todolists": 1, "columns": {"draft": 1, "in_progress": 0, "completed": 0, "archived": 0}, "comments": 1,
+        })
+        kwargs = {"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk, "task_pk": self.task.pk}
+        self.client.post(reverse("task_update_status"), {"task_id": self.task.pk, "status": "completed"})
+        self.client.post(reverse("task_edit", kwargs=kwargs), {"title": "Завдання", "content": "Текст",
+                                                                "status": "in_progress", "priority": "low"})
+        self.client.post(reverse("comment_create", kwargs=kwargs), {"content": "Ще один"})
+        self.assertEqual(self.counts()["columns"], {"draft": 0, "in_progress": 1, "completed": 0, "archived": 0})
+        self.assertEqual(self.counts()["comments"], 2)
+
+        self.client.post(reverse("task_delete", kwargs=kwargs))
+        self.assertEqual(TodoList.objects.get(pk=self.todolist.pk).task_count, 0)
+
+    # Невідомий статус відхиляється до запису, тож картка і лічильники колонок не змінюються
+    def test_unknown_status_is_rejected(self):
+        response = self.client.post(reverse("task_update_status"), {"task_id": self.task.pk, "status": "bogus"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "invalid_status")
+        self.assertEqual(Task.objects.get(pk=self.task.pk).status, "draft")
+        self.assertEqual(self.counts()["columns"], {"draft": 1, "in_progress": 0, "completed": 0, "archived": 0})
+
+    def test_cascades_do_not_update_rows_being_deleted(self):
+        Task.objects.create(todolist=self.todolist, title="Друге", content="Текст", created_by=self.user)
+        with CaptureQueriesContext(connection) as queries, counter_batch():
+            self.todolist.delete()
+        self.assertEqual(Dashboard.objects.get(pk=self.dashboard.pk).todolist_count, 0)
+        counter_updates = [q["sql"] for q in queries if q["sql"].startswith(('UPDATE "task_manager_todolist"',
+                                                                             'UPDATE "task_manager_task"'))]
+        self.assertEqual(counter_updates, [])
+
+    def test_full_save_does_not_overwrite_counters(self):
+        stale = Dashboard.objects.get(pk=self.dashboard.pk)
+        TodoList.objects.create(dashboard=self.dashboard, title="Ще", description="Опис", created_by=self.user)
+        stale.title = "Нова назва"
+        stale.save()
+        self.assertEqual(self.counts()["todolists"], 2)
+
+    def test_recount_repairs_drift(self):
+        Task.objects.filter(pk=self.task.pk).update(comment_count=10)
+        TodoList.objects.filter(pk=self.todolist.pk).update(draft_count=0, archived_count=4)
+        out = io.StringIO()
+        call_command("recount", stdout=out)
+        self.assertIn("todolist: виправлено 1", out.getvalue())
+        self.assertEqual(self.counts()["comments"], 1)
+        self.assertEqual(self.counts()["columns"], {"draft": 1, "in_progress": 0, "completed": 0, "archived": 0})
+
+    def test_board_shows_counters_without_counting_queries(self):
+        url = reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={self.todolist.pk}"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual([column.count for column in response.context["columns"]], [1, 0, 0, 0])
+        self.assertFalse(any("COUNT(" in q["sql"] for q in queries))
+
+
+class BenchViewsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        self.dashboard.members.add(User.objects.create_user("member"))
+        todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис", created_by=self.user)
+        task = Task.objects.create(todolist=todolist, title="Завдання", content="Текст", created_by=self.user)
+        Comment.objects.create(task=task, content="Коментар", created_by=self.user)
+
+    def bench(self, *args):
+        call_command("bench_views", "--no-seed", "--only", "main,task_delete", "--repeat", "1", *args,
+                     stdout=io.StringIO())
+
+    def test_report_measures_views_without_changing_data(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = f"{tmp}/report.json"
+            self.bench("--output", report_path)
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+
+            self.assertEqual(set(report["views"]), {"main", "task_delete"})
+            main = report["views"]["main"]
+            self.assertEqual(main["status"], 200)
+            self.assertLess(main["queries_warm"], main["queries"])
+            self.assertGreater(main["render_ms"], 0)
+            self.assertEqual(report["views"]["task_delete"]["status"], 302)
+            self.assertTrue(Task.objects.exists())
+
+            self.bench("--baseline", report_path)
+            report["views"]["main"]["queries_warm"] -= 1
+            with open(report_path, "w") as report_file:
+                json.dump(report, report_file)
+            with self.assertRaisesMessage(CommandError, "main: queries_warm"):
+                self.bench("--baseline", report_path)
+
+
+# Плани запитів сторінок (explain_queries): навіть на малій базі потрібні індекси
+class QueryPlanTests(TestCase):
+    def test_pages_use_indexes(self):
+        seed(users=10, dashboards=20, todolists=60, tasks=500, comments=500)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        call_command("explain_queries", "--no-seed", stdout=io.StringIO())
+
+
+class SoftDeleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.member = User.objects.create_user("member")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.dashboard.members.add(self.member)
+            self.todolists = [
+                TodoList.objects.create(dashboard=self.dashboard, title=f"Список {i}", description="Опис",
+                                        created_by=self.user)
+                for i in range(2)
+            ]
+            for todolist in self.todolists:
+                for i in range(3):
+                    task = Task.objects.create(todolist=todolist, title=f"Завдання {i}", content="Квартальний звіт",
+                                               created_by=self.user)
+                    Comment.objects.create(task=task, content="Коментар", created_by=self.user)
+            self.other = Dashboard.objects.create(title="Інша", description="Опис", created_by=self.user)
+            other_todolist = TodoList.objects.create(dashboard=self.other, title="Список", description="Опис",
+                                                     created_by=self.user)
+            Task.objects.create(todolist=other_todolist, title="Лишається", content="Текст", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def urls(self, todolist):
+        kwargs = {"dashboard_pk": self.dashboard.pk, "todolist_pk": todolist.pk}
+        task = todolist.tasks.first()
+        return [
+            reverse("todolist_detail", kwargs=kwargs),
+            reverse("task_detail", kwargs={**kwargs, "task_pk": task.pk}),
+            reverse("comment_list", kwargs={**kwargs, "task_pk": task.pk}),
+            reverse("main") + f"?dashboard={self.dashboard.pk}&todolist={todolist.pk}",
+        ]
+
+    def purge(self, *args):
+        out = io.StringIO()
+        call_command("purge_deleted", *args, stdout=out)
+        return out.getvalue()
+
+    def test_deleted_todolist_is_hidden_until_purged(self):
+        deleted, kept = self.todolists
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("todolist_delete", kwargs={"dashboard_pk": self.dashboard.pk,
+                                                                            "todolist_pk": deleted.pk}))
+        self.assertEqual(response.status_code, 302)
+        # Дерево ще в базі, але його не видно
+        self.assertEqual(Task.objects.filter(todolist=deleted).count(), 3)
+        for url in self.urls(deleted):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+        self.assertEqual(self.client.get(self.urls(kept)[0]).status_code, 200)
+        response = self.client.get(reverse("dashboard_detail", kwargs={"dashboard_pk": self.dashboard.pk}))
+        self.assertEqual(list(response.context["todolists"]), [kept])
+        self.assertEqual(Dashboard.objects.get(pk=self.dashboard.pk).todolist_count, 1)
+        results = self.client.get(reverse("search"), {"q": "квартальний"}).context["results"]
+        self.assertEqual({doc.todolist_id for doc in results}, {kept.pk})
+
+        with CaptureQueriesContext(connection) as queries:
+            output = self.purge("--batch-size", "2")
+        self.assertIn("comments: 3", output)
+        self.assertIn("tasks: 3", output)
+        self.assertFalse(TodoList.objects.filter(pk=deleted.pk).exists())
+        self.assertFalse(Comment.objects.filter(task__todolist=deleted).exists())
+        self.assertEqual(Task.objects.filter(todolist=kept).count(), 3)
+        # Жодного SELECT рядків у Python: лише пакетні DELETE після зведення журналу переходів
+        statements = [q["sql"] for q in queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))]
+        statements = statements[next(i for i, sql in enumerate(statements) if sql.startswith("DELETE")):]
+        self.assertTrue(all(sql.startswith("DELETE") for sql in statements), statements)
+
+    def test_deleted_dashboard_is_hidden_from_every_access_path(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("dashboard_delete", kwargs={"dashboard_pk": self.dashboard.pk}))
+        response = self.client.get(reverse("dashboard_list"))
+        self.assertEqual(list(response.context["dashboards"]), [self.other])
+        self.assertEqual(self.client.get(reverse("dashboard_detail", kwargs={"dashboard_pk": self.dashboard.pk})).status_code, 404)
+        for url in self.urls(self.todolists[0]):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+        response = self.client.get(reverse("api_tasks"), {"todolist": self.todolists[0].pk})
+        self.assertEqual(response.json()["results"], [])
+        self.client.force_login(self.member)
+        self.assertEqual(list(self.client.get(reverse("dashboard_list")).context["dashboards"]), [])
+
+        self.purge()
+        self.assertEqual(list(Dashboard.objects.all()), [self.other])
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertFalse(Dashboard.members.through.objects.exists())
+        self.assertFalse(SearchDocument.objects.filter(dashboard=self.dashboard.pk).exists())
+
+    def test_api_delete_is_soft(self):
+        response = self.client.delete(reverse("api_todolist", kwargs={"pk": self.todolists[0].pk}))
+        self.assertEqual(response.json(), {"success": True, "deleted": {"task_manager.TodoList": 1}})
+        self.assertIsNotNone(TodoList.objects.get(pk=self.todolists[0].pk).deleted_at)
+        response = self.client.delete(reverse("api_todolist", kwargs={"pk": self.todolists[0].pk}))
+        self.assertEqual(response.status_code, 404)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис",
+                                                    created_by=self.user)
+            self.old = Task.objects.create(todolist=self.todolist, title="Старий звіт", content="Текст",
+                                           status="archived", created_by=self.user)
+            for text in ("Перший", "Другий"):
+                Comment.objects.create(task=self.old, content=f"{text} відгук", created_by=self.user)
+            self.recent = Task.objects.create(todolist=self.todolist, title="Свіжий", content="Текст",
+                                              status="archived", created_by=self.user)
+            self.active = Task.objects.create(todolist=self.todolist, title="Активний", content="Текст",
+                                              status="in_progress", created_by=self.user)
+        long_ago = timezone.now() - datetime.timedelta(days=200)
+        Task.objects.filter(pk__in=[self.old.pk, self.active.pk]).update(updated_at=long_ago)
+        self.client.force_login(self.user)
+        self.kwargs = {"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk}
+
+    def archive(self):
+        out = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_tasks", "--batch-size", "1", stdout=out)
+        return out.getvalue()
+
+    def search(self, query):
+        return [doc.object_id for doc in self.client.get(reverse("search"), {"q": query}).context["results"]]
+
+    def test_moves_old_archived_tasks_with_comments(self):
+        created_at = self.old.created_at
+        self.assertIn("Заархівовано завдань: 1, коментарів: 2", self.archive())
+
+        self.assertEqual(set(Task.objects.values_list("pk", flat=True)), {self.recent.pk, self.active.pk})
+        archived = ArchivedTask.objects.get(pk=self.old.pk)
+        self.assertEqual((archived.title, archived.created_at), ("Старий звіт", created_at))
+        self.assertEqual(ArchivedComment.objects.filter(task=archived).count(), 2)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(TodoList.objects.get(pk=self.todolist.pk).archived_count, 1)
+        self.assertEqual(self.search("звіт"), [])
+
+    def test_archive_page_streams_and_restore_returns_task(self):
+        self.archive()
+        url = reverse("todolist_archive", kwargs=self.kwargs)
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        page = b"".join(response.streaming_content).decode()
+        self.assertIn("Старий звіт", page)
+        self.assertIn("Другий відгук", page)
+        self.assertNotIn("Свіжий", page)
+        self.assertIn("csrftoken", response.cookies)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("task_restore", kwargs={**self.kwargs, "task_pk": self.old.pk}))
+        self.assertRedirects(response, reverse("task_detail", kwargs={**self.kwargs, "task_pk": self.old.pk}))
+        task = Task.objects.get(pk=self.old.pk)
+        self.assertEqual((task.status, task.position, task.created_at), ("archived", self.old.position, self.old.created_at))
+        self.assertEqual(task.comment_count, 2)
+        self.assertEqual(TodoList.objects.get(pk=self.todolist.pk).archived_count, 2)
+        self.assertFalse(ArchivedTask.objects.exists() or ArchivedComment.objects.exists())
+        self.assertEqual(self.search("звіт"), [self.old.pk])
+        # Щойно відновлене завдання не потрапляє в архів знову
+        self.assertIn("Заархівовано завдань: 0", self.archive())
+
+    def test_archive_is_limited_to_accessible_todolists(self):
+        self.archive()
+        self.client.force_login(User.objects.create_user("stranger"))
+        self.assertEqual(self.client.get(reverse("todolist_archive", kwargs=self.kwargs)).status_code, 404)
+        response = self.client.post(reverse("task_restore", kwargs={**self.kwargs, "task_pk": self.old.pk}))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(ArchivedTask.objects.filter(pk=self.old.pk).exists())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис, з комою",
+                                           created_by=self.user)
+        self.tasks = [Task.objects.create(todolist=todolist, title=f"Завдання {i}", content="Рядок\nдругий",
+                                          deadline=datetime.date(2026, 1, i + 1), created_by=self.user)
+                      for i in range(3)]
+        Comment.objects.create(task=self.tasks[0], content="Коментар \"в лапках\"", created_by=self.user)
+        hidden = TodoList.objects.create(dashboard=self.dashboard, title="Видалений", description="", created_by=self.user)
+        Task.objects.create(todolist=hidden, title="Приховане", content="", created_by=self.user)
+        hidden.soft_delete()
+        self.client.force_login(self.user)
+        self.url = reverse("dashboard_export", kwargs={"dashboard_pk": self.dashboard.pk})
+
+    def test_csv_stream(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["type"] for row in rows], ["todolist", "task", "task", "task", "comment"])
+        self.assertEqual(rows[0]["content"], "Опис, з комою")
+        self.assertEqual(rows[1]["content"], "Рядок\nдругий")
+        self.assertEqual((rows[1]["deadline"], rows[1]["created_by"]), ("2026-01-01", "owner"))
+        self.assertEqual(rows[4]["parent_id"], str(self.tasks[0].pk))
+        self.assertEqual(rows[4]["content"], 'Коментар "в лапках"')
+
+    def test_ndjson_is_gzipped_on_the_fly(self):
+        response = self.client.get(self.url, {"format": "ndjson"}, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record["type"] for record in records], ["todolist", "task", "task", "task", "comment"])
+        self.assertEqual(records[1]["title"], "Завдання 0")
+
+    def test_access_and_format_are_checked(self):
+        self.assertEqual(self.client.get(self.url, {"format": "xml"}).status_code, 400)
+        self.client.force_login(User.objects.create_user("stranger"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_command_writes_gzip_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/dashboard.ndjson.gz"
+            call_command("export_dashboard", self.dashboard.pk, "--format", "ndjson", "--output", path,
+                         "--chunk-size", "2", stderr=io.StringIO())
+            with gzip.open(path, "rt", encoding="utf-8") as dump:
+                self.assertEqual(len(dump.read().splitlines()), 5)
+        with self.assertRaises(CommandError):
+            call_command("export_dashboard", 999999)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Наявний", description="",
+                                                created_by=self.user)
+        self.client.force_login(self.user)
+
+    def run_import(self, text, import_format="csv", **kwargs):
+        return import_board(io.StringIO(text), import_format, self.dashboard, self.user, **kwargs)
+
+    def test_export_round_trip(self):
+        source = Dashboard.objects.create(title="Джерело", description="", created_by=self.user)
+        todolist = TodoList.objects.create(dashboard=source, title="Список", description="Опис, з комою",
+                                           created_by=self.user)
+        tasks = [Task.objects.create(todolist=todolist, title=f"Завдання {i}", content="Рядок\nдругий",
+                                     status="in_progress", created_by=self.user) for i in range(3)]
+        Comment.objects.create(task=tasks[1], content="Коментар", created_by=self.user)
+        dump = "".join(export_dashboard(source.pk))
+
+        report = self.run_import(dump, batch_size=2)
+        self.assertEqual(report["created"], {"todolist": 1, "task": 3, "comment": 1})
+        self.assertEqual(report["error_count"], 0)
+        imported = TodoList.objects.get(dashboard=self.dashboard, title="Список")
+        self.assertEqual((imported.description, imported.in_progress_count), ("Опис, з комою", 3))
+        titles = list(imported.tasks.order_by("position").values_list("title", flat=True))
+        self.assertEqual(titles, ["Завдання 0", "Завдання 1", "Завдання 2"])
+        task = imported.tasks.get(title="Завдання 1")
+        self.assertEqual((task.comment_count, task.comments.get().content), (1, "Коментар"))
+        self.assertEqual(SearchDocument.objects.filter(dashboard=self.dashboard).count(), 4)
+
+    def test_bad_rows_are_reported_without_aborting(self):
+        lines = [
+            {"type": "task", "id": "t1", "parent_id": self.todolist.pk, "title": "Добре", "content": "Текст"},
+            {"type": "task", "parent_id": self.todolist.pk, "title": "Статус", "content": "Текст", "status": "x"},
+            {"type": "task", "parent_id": 999999, "title": "Без списку", "content": "Текст"},
+            {"type": "task", "parent_id": self.todolist.pk, "title": "Минуле", "content": "Текст",
+             "deadline": "2000-01-01"},
+            {"type": "comment", "parent_id": "t1", "content": "До нового завдання"},
+            {"type": "comment", "parent_id": "t1", "content": "  "},
+            {"type": "board"},
+        ]
+        text = "\n".join(json.dumps(line) for line in lines[:3]) + "\n{зламаний\n" + \
+            "\n".join(json.dumps(line) for line in lines[3:]) + "\n"
+        report = self.run_import(text, "ndjson", batch_size=1)
+        self.assertEqual(report["created"], {"todolist": 0, "task": 1, "comment": 1})
+        errors = {error["line"]: set(error["errors"]) for error in report["errors"]}
+        self.assertEqual(errors, {2: {"status"}, 3: {"parent_id"}, 4: {"__all__"}, 5: {"deadline"},
+                                  7: {"content"}, 8: {"type"}})
+        self.todolist.refresh_from_db()
+        self.assertEqual(self.todolist.draft_count, 1)
+        self.assertEqual(Task.objects.get(title="Добре").comment_count, 1)
+
+    def test_upload_view(self):
+        url = reverse("dashboard_import", kwargs={"dashboard_pk": self.dashboard.pk})
+        upload = SimpleUploadedFile("tasks.csv", "title,content,parent_id\nЗ файлу,Текст,{}\n"
+                                    .format(self.todolist.pk).encode("utf-8-sig"))
+        response = self.client.post(url, {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"]["created"]["task"], 1)
+        self.assertTrue(Task.objects.filter(todolist=self.todolist, title="З файлу").exists())
+
+        response = self.client.post(url, {"file": SimpleUploadedFile("tasks.txt", b"title\n")})
+        self.assertIn("import_format", response.context["form"].errors)
+        self.client.force_login(User.objects.create_user("stranger"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_command_reads_gzip_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/tasks.csv.gz"
+            with gzip.open(path, "wt", encoding="utf-8", newline="") as dump:
+                dump.write("title,content\n" + "".join(f"Завдання {i},Текст\n" for i in range(5)))
+            output = io.StringIO()
+            call_command("import_dashboard", self.dashboard.pk, path, "--todolist", self.todolist.pk,
+                         "--batch-size", "2", stdout=output, stderr=io.StringIO())
+        self.assertIn("завдань: 5", output.getvalue())
+        self.assertEqual(self.todolist.tasks.count(), 5)
+        with self.assertRaises(CommandError):
+            call_command("import_dashboard", self.dashboard.pk, "tasks.txt")
+
+
+class FlowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис",
+                                                created_by=self.user)
+        self.client.force_login(self.user)
+
+    def transitions(self, task):
+        codes = {code: status for status, code in flow.STATUS_CODES.items()}
+        return [(codes.get(from_status), codes.get(to_status)) for from_status, to_status in
+                TaskTransition.objects.filter(task_id=task.pk).order_by("pk").values_list("from_status", "to_status")]
+
+    def test_every_status_change_is_logged(self):
+        task = Task.objects.create(todolist=self.todolist, title="Звіт", content="Текст", created_by=self.user)
+        self.client.post(reverse("task_update_status"), {"task_id": task.pk, "status": "in_progress"})
+        self.client.post(reverse("task_batch_move"), {"moves": [{"task_id": task.pk, "status": "completed"}]},
+                         content_type="application/json")
+        self.client.post(reverse("task_edit", kwargs={"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk,
+                                                      "task_pk": task.pk}),
+                         {"title": "Звіт", "content": "Інший текст", "status": "completed", "priority": "low"})
+        self.client.post(reverse("task_edit", kwargs={"dashboard_pk": self.dashboard.pk, "todolist_pk": self.todolist.pk,
+                                                      "task_pk": task.pk}),
+                         {"title": "Звіт", "content": "Текст", "status": "archived", "priority": "low"})
+        Task.objects.get(pk=task.pk).delete()
+        self.assertEqual(self.transitions(task), [(None, "draft"), ("draft", "in_progress"),
+                                                  ("in_progress", "completed"), ("completed", "archived"),
+                                                  ("archived", None)])
+
+    def test_rollups_are_incremental(self):
+        today = timezone.localdate()
+        start = timezone.now() - datetime.timedelta(days=3)
+        for index, days in enumerate((1, 2)):
+            pk = 1000 + index
+            flow.record(self.todolist.pk, pk, None, "draft", start)
+            flow.record(self.todolist.pk, pk, "draft", "in_progress", start)
+            flow.record(self.todolist.pk, pk, "in_progress", "completed", start + datetime.timedelta(days=days))
+        self.assertEqual(flow.rollup(batch_size=4), 6)
+        self.assertEqual(flow.rollup(), 0)
+
+        result = flow.dashboard_flow(self.dashboard.pk, days=7, today=today)
+        self.assertEqual(result["completed"], 2)
+        self.assertEqual(result["cumulative"]["completed"][-1], 2)
+        self.assertEqual(result["cumulative"]["in_progress"][-1], 0)
+        self.assertEqual(result["cycle_time"][50], 1.5)
+
+        flow.record(self.todolist.pk, 1000, "completed", "in_progress")
+        self.assertEqual(flow.rollup(), 1)
+        result = flow.dashboard_flow(self.dashboard.pk, days=7, today=today)
+        self.assertEqual((result["cumulative"]["completed"][-1], result["cumulative"]["in_progress"][-1]), (1, 1))
+        self.assertEqual(FlowDaily.objects.filter(dashboard=self.dashboard, day=today).count(), 2)
+
+    # У PostgreSQL перехід із меншим id може закомітитись після зведення більших
+    def test_rollup_counts_lower_id_committed_later(self):
+        flow.record(self.todolist.pk, 1000, None, "draft")
+        late = TaskTransition.objects.get()
+        late.delete()
+        flow.record(self.todolist.pk, 1001, None, "draft")
+        self.assertEqual(flow.rollup(), 1)
+        late.save(force_insert=True)
+        self.assertTrue(flow.has_pending())
+        self.assertEqual(flow.rollup(), 1)
+        self.assertFalse(flow.has_pending())
+        result = flow.dashboard_flow(self.dashboard.pk, days=7, today=timezone.localdate())
+        self.assertEqual(result["cumulative"]["draft"][-1], 2)
+
+    def test_page(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(todolist=self.todolist, title="Звіт", content="Текст", status="completed",
+                                created_by=self.user)
+        flow.rollup()
+        url = reverse("dashboard_flow", kwargs={"dashboard_pk": self.dashboard.pk})
+        response = self.client.get(url, {"days": 7})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["flow"]["completed"], 1)
+        self.assertEqual(len(response.context["bands"]), len(flow.STATUSES))
+        self.client.force_login(User.objects.create_user("stranger"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    # Сторінка лише читає зведення: нові переходи чекають на rollup_flow
+    def test_page_does_not_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(todolist=self.todolist, title="Звіт", content="Текст", status="completed",
+                                created_by=self.user)
+        url = reverse("dashboard_flow", kwargs={"dashboard_pk": self.dashboard.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"days": 7})
+        self.assertEqual(response.context["flow"]["completed"], 0)
+        self.assertFalse([q["sql"] for q in queries if not q["sql"].startswith("SELECT")])
+        self.assertTrue(flow.has_pending())
+
+        call_command("rollup_flow", stdout=io.StringIO())
+        self.assertEqual(self.client.get(url, {"days": 7}).context["flow"]["completed"], 1)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            todolist = TodoList.objects.create(dashboard=dashboard, title="Список", description="Опис", created_by=self.user)
+            self.task = Task.objects.create(todolist=todolist, title="Звіт для бухгалтерії", content="Квартальний",
+                                            created_by=self.user)
+            self.comment = Comment.objects.create(task=self.task, content="Чекаю на накладні", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def results(self, query):
+        response = self.client.get(reverse("search"), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [(doc.kind, doc.object_id) for doc in response.context["results"]]
+
+    def test_finds_tasks_and_comments_by_words_and_prefix(self):
+        self.assertEqual(self.results("бухгалтерії"), [("task", self.task.pk)])
+        self.assertEqual(self.results("кварт"), [("task", self.task.pk)])
+        self.assertEqual(self.results("накладні"), [("comment", self.comment.pk)])
+        self.assertEqual(self.results("звіт накладні"), [])
+
+    def test_results_are_limited_to_accessible_dashboards(self):
+        self.client.force_login(User.objects.create_user("stranger"))
+        self.assertEqual(self.results("бухгалтерії"), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.title = "Річний звіт"
+            self.task.save()
+        self.assertEqual(self.results("бухгалтерії"), [])
+        self.assertEqual(self.results("річний"), [("task", self.task.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        self.assertEqual(self.results("річний"), [])
+        self.assertEqual(self.results("накладні"), [])
+
+
+class LiveEventsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис",
+                                                    created_by=self.user)
+            self.task = Task.objects.create(todolist=self.todolist, title="Завдання", content="Текст",
+                                            created_by=self.user)
+        self.client.force_login(self.user)
+
+    def published(self, action):
+        with mock.patch.object(events.broker, "has_subscribers", return_value=True), \
+                mock.patch.object(events.broker, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        return [(call.args[0], call.args[1], call.args[2]) for call in publish.call_args_list]
+
+    def test_writes_publish_events_to_dashboard(self):
+        moved = self.published(lambda: self.client.post(reverse("task_update_status"),
+                                                        {"task_id": self.task.pk, "status": "archived"}))
+        task = Task.objects.get(pk=self.task.pk)
+        self.assertEqual(moved, [(self.dashboard.pk, "task.moved", {
+            "todolist_id": self.todolist.pk, "task_id": task.pk, "status": "archived", "position": task.position,
+        })])
+
+        commented = self.published(lambda: Comment.objects.create(task=task, content="Так", created_by=self.user))
+        self.assertEqual([(pk, kind) for pk, kind, _ in commented], [(self.dashboard.pk, "comment.added")])
+
+        batch = self.published(lambda: self.client.post(
+            reverse("task_batch_move"), {"moves": [{"task_id": task.pk, "status": "draft"}]},
+            content_type="application/json"))
+        self.assertEqual([kind for _, kind, _ in batch], ["task.moved"])
+
+    def test_deleted_todolist_does_not_announce_its_cards(self):
+        self.assertEqual(self.published(self.todolist.delete), [])
+
+    def test_card_fragment(self):
+        response = self.client.get(reverse("main"), {"dashboard": self.dashboard.pk, "todolist": self.todolist.pk,
+                                                     "card": self.task.pk})
+        self.assertTemplateUsed(response, "main/task_card.html")
+        self.assertContains(response, f'data-task-id="{self.task.pk}"', count=1)
+
+    async def test_stream_delivers_published_events(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse("dashboard_events", kwargs={"dashboard_pk": self.dashboard.pk})
+        response = await self.async_client.get(url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+
+        events.broker.publish(self.dashboard.pk, "task.deleted", {"task_id": 1})
+        message = (await asyncio.wait_for(anext(stream), 1)).decode()
+        self.assertIn("event: task.deleted", message)
+        event_id = message.split("\n")[0].removeprefix("id: ")
+
+        # Відключення клієнта: сервер скасовує очікування, підписка знімається
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertFalse(events.broker.has_subscribers())
+
+        # Після перепідключення пропущені події надсилаються повторно
+        subscription, missed = events.broker.subscribe(self.dashboard.pk, event_id)
+        self.assertEqual(missed, [])
+        events.broker.unsubscribe(subscription)
+        subscription, missed = events.broker.subscribe(self.dashboard.pk, "stale-1")
+        self.assertIsNone(missed)
+        events.broker.unsubscribe(subscription)
+
+    async def test_stream_requires_access(self):
+        stranger = await User.objects.acreate(username="stranger")
+        await self.async_client.aforce_login(stranger)
+        url = reverse("dashboard_events", kwargs={"dashboard_pk": self.dashboard.pk})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+
+# Ті самі маршрути з асинхронними варіантами сторінок, як під ASGI з TASKER_ASYNC_VIEWS=1
+class AsyncUrlConf:
+    urlpatterns = [path("", include(use_async_views(task_manager_urls.urlpatterns)))]
+
+
+@override_settings(ROOT_URLCONF=AsyncUrlConf)
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="pass")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+            self.todolist = TodoList.objects.create(dashboard=self.dashboard, title="Список", description="Опис",
+                                                    created_by=self.user)
+            self.task = Task.objects.create(todolist=self.todolist, title="Перше завдання", content="Текст",
+                                            created_by=self.user)
+            self.comment = Comment.objects.create(task=self.task, content="Коментар", created_by=self.user)
+
+    def detail_urls(self):
+        kwargs = {"dashboard_pk": self.dashboard.pk}
+        urls = [reverse("dashboard_detail", kwargs=kwargs)]
+        kwargs["todolist_pk"] = self.todolist.pk
+        urls.append(reverse("todolist_detail", kwargs=kwargs))
+        kwargs["task_pk"] = self.task.pk
+        urls.append(reverse("task_detail", kwargs=kwargs))
+        urls.append(reverse("comment_detail", kwargs={**kwargs, "comment_pk": self.comment.pk}))
+        return urls
+
+    async def test_pages_render_through_async_views(self):
+        self.assertTrue(resolve(reverse("main")).func.view_class.view_is_async)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("main"), {"dashboard": self.dashboard.pk,
+                                                                  "todolist": self.todolist.pk})
+        self.assertContains(response, "Перше завдання")
+        self.assertEqual(len(response.context["columns"]), len(Task._meta.get_field("status").choices))
+
+        for url in self.detail_urls():
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            # Умовний GET працює так само, як у синхронних view
+            repeat = await self.async_client.get(url, headers={"If-None-Match": response["ETag"]})
+            self.assertEqual(repeat.status_code, 304, url)
+
+    async def test_access_rules_match_sync_views(self):
+        response = await self.async_client.get(reverse("main"))
+        self.assertEqual(response.status_code, 302)
+
+        stranger = await User.objects.acreate(username="stranger")
+        await self.async_client.aforce_login(stranger)
+        for url in self.detail_urls():
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 404, url)
+        response = await self.async_client.get(reverse("main"), {"dashboard": self.dashboard.pk})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_status_update(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(reverse("task_update_status"),
+                                                {"task_id": self.task.pk, "status": "archived"})
+        self.assertEqual(response.status_code, 200)
+        task = await Task.objects.aget(pk=self.task.pk)
+        self.assertEqual(task.status, "archived")
+        self.assertGreater(task.position, "")
+
+        response = await self.async_client.post(reverse("task_update_status"),
+                                                {"task_id": self.task.pk, "status": "bogus"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((await Task.objects.aget(pk=self.task.pk)).status, "archived")
+
+
+# Сторінка, що читає дошки по одній у циклі — типовий N+1
+class DashboardLoopView(View):
+    query_budget = 10
+
+    def get(self, request):
+        titles = [Dashboard.objects.filter(pk=pk).values_list("title", flat=True).first()
+                  for pk in Dashboard.objects.values_list("pk", flat=True)]
+        return HttpResponse(", ".join(titles))
+
+
+class PerfUrlConf:
+    urlpatterns = [
+        path("loop/", DashboardLoopView.as_view(), name="loop"),
+        path("", include(task_manager_urls.urlpatterns)),
+    ]
+
+
+@override_settings(ROOT_URLCONF=PerfUrlConf)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="pass")
+        for i in range(6):
+            Dashboard.objects.create(title=f"Дошка {i}", description="Опис", created_by=self.user)
+        self.client.force_login(self.user)
+
+    def records(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    def test_server_timing_and_log_record(self):
+        with self.assertLogs("task_manager.perf", "INFO") as logs:
+            response = self.client.get(reverse("dashboard_list"))
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, app;dur=[\d.]+$')
+
+        record, = self.records(logs)
+        self.assertEqual(record["view"], "task_manager.views.DashboardListView")
+        self.assertEqual(record["route"], "dashboard_list")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["query_budget"], views.DashboardListView.query_budget)
+        self.assertIn(f'"{record["queries"]} queries"', timing)
+        self.assertGreater(record["template_ms"], 0)
+        self.assertFalse(record["n_plus_one"])
+        # Час шаблонів дає рушій з TEMPLATES, клас Template Django не підмінюється
+        self.assertEqual(Template.render.__module__, "django.template.base")
+
+    @override_settings(PERF_SERVER_TIMING=False)
+    def test_repeated_queries_are_reported_as_n_plus_one(self):
+        with self.assertLogs("task_manager.perf", "INFO") as logs:
+            response = self.client.get(reverse("loop"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(logs.records[0].levelname, "WARNING")
+        record, = self.records(logs)
+        self.assertTrue(record["n_plus_one"])
+        self.assertEqual(record["duplicate_queries"], 5)
+        self.assertIn('"task_manager_dashboard"', record["duplicates"][0]["sql"])
+        self.assertEqual(record["duplicates"][0]["count"], 6)
+
+    def test_query_budget(self):
+        with mock.patch.object(DashboardLoopView, "query_budget", 3):
+            with override_settings(QUERY_BUDGET_ACTION="raise"):
+                with self.assertRaisesMessage(QueryBudgetExceeded, "при бюджеті 3"):
+                    self.client.get(reverse("loop"))
+            with override_settings(QUERY_BUDGET_ACTION="warn"), self.assertLogs("task_manager.perf") as logs:
+                self.assertEqual(self.client.get(reverse("loop")).status_code, 200)
+            self.assertIn("при бюджеті 3", logs.output[-1])
+            with override_settings(QUERY_BUDGET_ACTION=None):
+                self.assertEqual(self.client.get(reverse("loop")).status_code, 200)
+
+
+@override_settings(REPLICA_DATABASES=["replica"], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        # View відповідає базою, з якої читала б модель
+        self.middleware = ReplicaMiddleware(lambda request: HttpResponse(ReplicaRouter().db_for_read(Task)))
+
+    def request(self, method, cookies=None):
+        request = getattr(self.factory, method)("/")
+        request.COOKIES.update(cookies or {})
+        return request, self.middleware(request)
+
+    def test_reads_go_to_replica_only_inside_safe_requests(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Task), "default")
+        _, response = self.request("get")
+        self.assertEqual(response.content, b"replica")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(router.db_for_read(Task), "default")
+        self.assertEqual(router.db_for_write(Task), "default")
+        self.assertFalse(router.allow_migrate("replica", "task_manager"))
+        self.assertTrue(router.allow_migrate("default", "task_manager"))
+
+    def test_write_pins_user_to_primary(self):
+        _, response = self.request("post")
+        self.assertEqual(response.content, b"default")
+        pin = response.cookies[PIN_COOKIE]
+        self.assertEqual(pin["max-age"], 5)
+
+        _, response = self.request("get", {PIN_COOKIE: pin.value})
+        self.assertEqual(response.content, b"default")
+        # Закінчення строку перевіряється за підписом, а не лише браузером
+        with mock.patch("django.core.signing.time.time", return_value=timezone.now().timestamp() + 6):
+            _, response = self.request("get", {PIN_COOKIE: pin.value})
+        self.assertEqual(response.content, b"replica")
+        _, response = self.request("get", {PIN_COOKIE: "підроблений"})
+        self.assertEqual(response.content, b"replica")
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_everything_uses_primary(self):
+        _, response = self.request("get")
+        self.assertEqual(response.content, b"default")
+        _, response = self.request("post")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+# Два шарди — дві бази SQLite; потоки fan_out бачать лише закомічені дані, тому TransactionTestCase
+@override_settings(SHARD_DATABASES=["default", "shard1"], QUERY_BUDGET_ACTION=None)
+class ShardingTests(TransactionTestCase):
+    databases = {"default", "shard1"}
+
+    def setUp(self):
+        cache.clear()
+        prepare_shard("shard1")
+        self.user = User.objects.create_user("owner", password="pass")
+        self.client.force_login(self.user)
+        # Шард обирається за id: дві дошки поспіль лягають на різні шарди
+        self.first = Dashboard.objects.create(title="Перша", created_by=self.user)
+        self.second = Dashboard.objects.create(title="Друга", created_by=self.user)
+        self.shards = {dashboard.pk: dashboard._state.db for dashboard in (self.first, self.second)}
+
+    def add_board(self, dashboard):
+        self.client.post(reverse("todolist_create", kwargs={"dashboard_pk": dashboard.pk}), {"title": "Список", "description": "Опис"})
+        todolist = TodoList.objects.using(self.shards[dashboard.pk]).get(dashboard_id=dashboard.pk)
+        kwargs = {"dashboard_pk": dashboard.pk, "todolist_pk": todolist.pk}
+        self.client.post(reverse("task_create", kwargs=kwargs),
+                         {"title": "Завдання", "content": "слон", "status": "draft", "priority": "medium"})
+        task = Task.objects.using(self.shards[dashboard.pk]).get(todolist=todolist)
+        self.client.post(reverse("task_batch_move"), json.dumps({"moves": [{"task_id": task.pk, "status": "completed"}]}),
+                         content_type="application/json")
+        self.client.post(reverse("comment_create", kwargs={**kwargs, "task_pk": task.pk}), {"content": "Коментар"})
+        return todolist, task
+
+    def test_boards_live_on_their_shard(self):
+        self.assertEqual(set(self.shards.values()), {"default", "shard1"})
+        self.assertEqual(dict(DashboardShard.objects.values_list("pk", "shard")), self.shards)
+        self.assertTrue(User.objects.using("shard1").filter(pk=self.user.pk, password="!").exists())
+
+        for dashboard in (self.first, self.second):
+            alias = self.shards[dashboard.pk]
+            todolist, task = self.add_board(dashboard)
+            self.assertEqual(Task.objects.using(alias).get(pk=task.pk).status, "completed")
+            self.assertEqual(Comment.objects.using(alias).filter(task=task).count(), 1)
+            self.assertEqual(todolist.completed_count, 0)
+            self.assertEqual(TodoList.objects.using(alias).get(pk=todolist.pk).completed_count, 1)
+            # Діапазони id шардів не перетинаються
+            self.assertEqual(task.pk >= SHARD_ID_SPAN, alias == "shard1")
+            response = self.client.get(reverse("dashboard_detail", kwargs={"dashboard_pk": dashboard.pk}))
+            self.assertContains(response, todolist.title)
+
+        # Сторінки з кількома дошками збирають їх з усіх шардів
+        response = self.client.get(reverse("dashboard_list"))
+        self.assertEqual([dashboard.pk for dashboard in response.context["dashboards"]], [self.first.pk, self.second.pk])
+        response = self.client.get(reverse("main"))
+        self.assertContains(response, "Перша")
+        self.assertContains(response, "Друга")
+        response = self.client.get(reverse("search"), {"q": "слон"})
+        self.assertEqual(len(response.context["results"]), 2)
+        response = self.client.get(reverse("api_dashboards"), {"limit": 1})
+        page = response.json()
+        self.assertEqual([row["id"] for row in page["results"]], [self.first.pk])
+        response = self.client.get(reverse("api_dashboards"), {"limit": 1, "after": page["next"]})
+        self.assertEqual([row["id"] for row in response.json()["results"]], [self.second.pk])
+
+    def test_move_dashboard_between_shards(self):
+        todolist, task = self.add_board(self.second)
+        source = self.shards[self.second.pk]
+        target = "default" if source == "shard1" else "shard1"
+        out = io.StringIO()
+        call_command("rebalance_shards", "--dashboard", self.second.pk, "--to", target, "--grace", "0", stdout=out)
+
+        self.assertEqual(DashboardShard.objects.get(pk=self.second.pk).shard, target)
+        self.assertFalse(Dashboard.objects.using(source).filter(pk=self.second.pk).exists())
+        self.assertFalse(TaskTransition.objects.using(source).filter(task_id=task.pk).exists())
+        moved = Task.objects.using(target).get(pk=task.pk)
+        self.assertEqual((moved.todolist_id, moved.comment_count), (todolist.pk, 1))
+        self.assertEqual(TaskTransition.objects.using(target).filter(task_id=task.pk).count(), 2)
+
+        # Зведення потоку перенесені, і новий шард не зводить ті самі переходи вдруге
+        response = self.client.get(reverse("dashboard_flow", kwargs={"dashboard_pk": self.second.pk}))
+        self.assertEqual(response.context["flow"]["completed"], 1)
+        kwargs = {"dashboard_pk": self.second.pk, "todolist_pk": todolist.pk}
+        response = self.client.post(reverse("task_create", kwargs=kwargs),
+                                    {"title": "Після переїзду", "content": "Нове", "status": "draft", "priority": "low"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Task.objects.using(target).filter(todolist=todolist).count(), 2)
+
+        # Id лишились з діапазону старого шарду, а картку все одно знаходить пошук по шардах
+        self.assertEqual(self.client.get(reverse("api_task", kwargs={"pk": task.pk})).json()["id"], task.pk)
+        response = self.client.post(reverse("task_update_status"), {"task_id": task.pk, "status": "draft"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.using(target).get(pk=task.pk).status, "draft")
+
+    # Запити, що називають лише картку, список чи коментар, знаходять шард за id
+    def test_routes_by_object_id(self):
+        dashboard, other = sorted((self.first, self.second), key=lambda item: self.shards[item.pk] != "shard1")
+        todolist, task = self.add_board(dashboard)
+        other_todolist, other_task = self.add_board(other)
+        self.assertEqual(Task.objects.using("shard1").get(pk=task.pk).status, "completed")
+
+        response = self.client.post(reverse("task_update_status"), {"task_id": task.pk, "status": "in_progress"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.using("shard1").get(pk=task.pk).status, "in_progress")
+
+        response = self.client.get(reverse("api_task", kwargs={"pk": task.pk}))
+        self.assertEqual(response.json()["status"], "in_progress")
+        response = self.client.get(reverse("api_tasks"), {"todolist": todolist.pk})
+        self.assertEqual([row["id"] for row in response.json()["results"]], [task.pk])
+        response = self.client.get(reverse("api_comments"), {"task": task.pk})
+        self.assertEqual(len(response.json()["results"]), 1)
+        response = self.client.patch(reverse("api_tasks"), json.dumps({"items": [{"id": task.pk, "title": "Нове"}]}),
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.using("shard1").get(pk=task.pk).title, "Нове")
+        response = self.client.post(reverse("api_tasks"), json.dumps({"items": [
+            {"todolist": todolist.pk, "title": "Через API", "content": "Текст", "status": "draft", "priority": "low"},
+        ]}), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Task.objects.using("shard1").filter(title="Через API").exists())
+
+        # Без батька список збирається з усіх шардів
+        response = self.client.get(reverse("api_todolists"))
+        self.assertEqual({row["id"] for row in response.json()["results"]}, {todolist.pk, other_todolist.pk})
+
+        # Пакет з карток різних шардів не розкласти на один шард
+        response = self.client.post(reverse("task_batch_move"), json.dumps({"moves": [
+            {"task_id": task.pk, "status": "draft"}, {"task_id": other_task.pk, "status": "draft"},
+        ]}), content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "cross_shard")
+        response = self.client.delete(reverse("api_tasks"), json.dumps({"ids": [task.pk, other_task.pk]}),
+                                      content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        # Картки, якої немає на жодному шарді, немає
+        self.assertEqual(self.client.get(reverse("api_task", kwargs={"pk": SHARD_ID_SPAN * 5})).status_code, 404)
+
+    def test_writes_wait_while_dashboard_moves(self):
+        DashboardShard.objects.filter(pk=self.first.pk).update(moving=True)
+        url = reverse("todolist_create", kwargs={"dashboard_pk": self.first.pk})
+        response = self.client.post(url, {"title": "Список", "description": "Опис"})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.client.get(reverse("dashboard_detail", kwargs={"dashboard_pk": self.first.pk})).status_code, 200)
+
+        todolist = TodoList.objects.using(self.shards[self.first.pk]).create(
+            dashboard_id=self.first.pk, title="Список", description="Опис", created_by=self.user)
+        response = self.client.patch(reverse("api_todolists"), json.dumps({"items": [{"id": todolist.pk, "title": "Нова"}]}),
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    def test_plan_moves_evens_out_shards(self):
+        weights = {"default": {1: 50, 2: 30, 3: 10}, "shard1": {4: 5}}
+        self.assertEqual(plan_moves(weights), [(1, "default", "shard1", 50), (4, "shard1", "default", 5)])
+        self.assertEqual(plan_moves({"default": {1: 10}, "shard1": {2: 10}}), [])
+
+
+class SessionAuthCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("owner", password="pass")
+        self.dashboard = Dashboard.objects.create(title="Дошка", description="Опис", created_by=self.user)
+        self.url = reverse("main") + f"?dashboard={self.dashboard.pk}"
+
+    # Новий клієнт: SessionMiddleware запам'ятовує рушій сесій при першому запиті
+    def warm_query_count(self):
+        self.client = self.client_class()
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return len(queries)
+
+    def test_session_and_user_come_from_cache(self):
+        with override_settings(SESSION_ENGINE="django.contrib.sessions.backends.db",
+                               AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.ModelBackend"]):
+            before = self.warm_query_count()
+        self.assertEqual(self.warm_query_count(), before - 2)
+
+    def test_password_change_ends_cached_sessions(self):
+        self.warm_query_count()
+        self.user.set_password("new")
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    # Кеш у пам'яті процесу не годиться, коли запити обслуговують кілька процесів
+    def test_check_requires_shared_cache(self):
+        with override_settings(CACHE_SINGLE_PROCESS=False):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["task_manager.E001"])
+            with override_settings(CACHES=self.shared_caches()):
+                self.assertEqual(check_shared_cache(None), [])
+
+    def shared_caches(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        return {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": root.name}}
+
+    def session_store(self, cache_instance, session_key=None):
+        store = SessionStore(session_key)
+        store._cache = cache_instance
+        return store
+
+    # Два процеси з окремими екземплярами спільного кешу: вихід і деактивація в одному
+    # видно в іншому
+    def test_invalidation_reaches_other_cache_instances(self):
+        with override_settings(CACHES=self.shared_caches()):
+            first, second = caches.create_connection("default"), caches.create_connection("default")
+            with mock.patch("task_manager.auth.user_cache", return_value=first):
+                self.assertEqual(CachedModelBackend().get_user(self.user.pk), self.user)
+                store = self.session_store(first)
+                store["answer"] = 42
+                store.save()
+                self.assertEqual(self.session_store(first, store.session_key)["answer"], 42)
+
+            with mock.patch("task_manager.auth.user_cache", return_value=second):
+                self.user.is_active = False
+                self.user.save()
+                self.session_store(second, store.session_key).delete()
+
+            with mock.patch("task_manager.auth.user_cache", return_value=first):
+                self.assertIsNone(CachedModelBackend().get_user(self.user.pk))
+            self.assertEqual(self.session_store(first, store.session_key).load(), {})
+
+    def test_unchanged_session_is_not_saved(self):
+        store = SessionStore()
+        store["answer"] = 42
+        store.save()
+
+        store = SessionStore(store.session_key)
+        store["answer"] = 42
+        with self.assertNumQueries(0):
+            store.save()
+        store["answer"] = 43
+        store.save()
+        # Нова сесія при зміні ключа отримує дані, хоч вони й не змінились від завантаження
+        store.cycle_key()
+        store.save()
+        cache.clear()
+        self.assertEqual(SessionStore(store.session_key)["answer"], 43)
+
+
+# Статика після collectstatic: імена з хешем, стиснені варіанти і довге кешування
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        storages = {**settings.STORAGES,
+                    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"}}
+        settings_override = override_settings(STATIC_ROOT=root.name, STORAGES=storages)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_hashed_files_are_compressed_and_immutable(self):
+        url = static("js/script.js")
+        self.assertRegex(url, r"^/static/js/script\.[0-9a-f]{12}\.js$")
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)),
+                         (settings.BASE_DIR / "task_manager" / "static" / "js" / "script.js").read_bytes())
+
+        # Без хешу файл може змінитись, тож кешується недовго
+        response = self.client.get("/static/js/script.js")
+        self.assertNotIn("immutable", response["Cache-Control"])
+        self.assertNotIn("Content-Encoding", response)
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.urls import path
 from .views import *
+from . import api
 
 urlpatterns = [
     #Основні
@@ -7,6 +9,23 @@ urlpatterns = [
     path("dashboard/<int:dashboard_pk>/members/", DashboardMembersView.as_view(), name="dashboard_members"),
     path("dashboard/<int:dashboard_pk>/members/<int:user_pk>/delete/", DashboardMemberDeleteView.as_view(), name="dashboard_member_delete" ),
     path("task/update-status/", TaskStatusUpdateView.as_view(), name="task_update_status"),
+    path("task/move/", TaskBatchMoveView.as_view(), name="task_batch_move"),
+    path("dashboard/<int:dashboard_pk>/events/", DashboardEventsView.as_view(), name="dashboard_events"),
+    path("dashboard/<int:dashboard_pk>/export/", DashboardExportView.as_view(), name="dashboard_export"),
+    path("dashboard/<int:dashboard_pk>/flow/", DashboardFlowView.as_view(), name="dashboard_flow"),
+    path("dashboard/<int:dashboard_pk>/import/", DashboardImportView.as_view(), name="dashboard_import"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("cache/stats/", FragmentCacheStatsView.as_view(), name="fragment_cache_stats"),
+
+    # JSON API
+    path(f"api/{api.API_VERSION}/dashboards/", api.DashboardApiView.as_view(), name="api_dashboards"),
+    path(f"api/{api.API_VERSION}/dashboards/<int:pk>/", api.DashboardApiView.as_view(), name="api_dashboard"),
+    path(f"api/{api.API_VERSION}/todolists/", api.TodoListApiView.as_view(), name="api_todolists"),
+    path(f"api/{api.API_VERSION}/todolists/<int:pk>/", api.TodoListApiView.as_view(), name="api_todolist"),
+    path(f"api/{api.API_VERSION}/tasks/", api.TaskApiView.as_view(), name="api_tasks"),
+    path(f"api/{api.API_VERSION}/tasks/<int:pk>/", api.TaskApiView.as_view(), name="api_task"),
+    path(f"api/{api.API_VERSION}/comments/", api.CommentApiView.as_view(), name="api_comments"),
+    path(f"api/{api.API_VERSION}/comments/<int:pk>/", api.CommentApiView.as_view(), name="api_comment"),
 
     # Авторизація
     path("", CustomLoginView.as_view(), name="login"),
@@ -23,6 +42,10 @@ urlpatterns = [
     path('dashboard/<int:dashboard_pk>/todolist/<int:todolist_pk>/task/<int:task_pk>/', TaskDetailView.as_view(), name = 'task_detail'),
     path('dashboard/<int:dashboard_pk>/todolist/<int:todolist_pk>/task/<int:task_pk>/comment/<int:comment_pk>/', CommentDetailView.as_view(), name = 'comment_detail'),
 
+    # Архів
+    path('dashboard/<int:dashboard_pk>/todolist/<int:todolist_pk>/archive/', TodoListArchiveView.as_view(), name = 'todolist_archive'),
+    path('dashboard/<int:dashboard_pk>/todolist/<int:todolist_pk>/archive/<int:task_pk>/restore/', TaskRestoreView.as_view(), name = 'task_restore'),
+
     # Створення
     path('dashboard/create/', DashboardCreateView.as_view(), name = 'dashboard_create'),
     path('dashboard/<int:dashboard_pk>/todolist/create/', TodoListCreateView.as_view(), name = 'todolist_create'),
@@ -41,3 +64,7 @@ urlpatterns = [
     path('dashboard/<int:dashboard_pk>/todolist/<int:todolist_pk>/task/<int:task_pk>/delete/', TaskDeleteView.as_view(), name = 'task_delete'),
     path('dashboard/<int:dashboard_pk>/todolist/<int:todolist_pk>/task/<int:task_pk>/comment/<int:comment_pk>/delete/', CommentDeleteView.as_view(), name = 'comment_delete'),
 ]
+
+if settings.ASYNC_VIEWS:
+    from .async_views import use_async_views
+    urlpatterns = use_async_views(urlpatterns)
@@ -1,52 +1,77 @@
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.views import LoginView, LogoutView
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
-from .models import Dashboard, TodoList, Task, Comment
-from .forms import DashboardCreateForm, TodoListCreateForm, TaskCreateForm, CommentCreateForm, AddMemberForm
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View, TemplateView
+from .models import Dashboard, TodoList, Task, Comment, ArchivedTask
+from .forms import DashboardCreateForm, TodoListCreateForm, TaskCreateForm, CommentCreateForm, AddMemberForm, DashboardImportForm
+from .access import ahas_dashboard_access, get_accessible_dashboard_ids
+from .pagination import KeysetPage, KeysetPaginationMixin, order_by_expressions
+from .ranking import rank_between
+from .activity import touch_todolist_dashboards
+from . import flow
+from .flow import FLOW_DAYS, cumulative_flow_bands, dashboard_flow, throughput_bars
+from .counters import counter_batch, task_moved
+from .conditional import ConditionalGetMixin
+from .search import SEARCH_RESULTS_LIMIT, search
+from .shards import current_shard, fan_out
+from .archive import archived_tasks, restore_tasks
+from .export import EXPORT_FORMATS, export_dashboard
+from .importer import import_board, import_format_for, open_import
+from .events import event_stream, queue_event, task_event_data
+from .fragments import bump_versions, fragment_stats, get_versions, version_key
 from django.urls import reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_POST
+from django.views.decorators.gzip import gzip_page
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth import login
-from django.http import JsonResponse
-from django.db.models import Q
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.db.models import Prefetch, F, Window
+from django.db.models.functions import RowNumber
+from django.core.exceptions import BadRequest
+import json
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
+from django.template.loader import render_to_string
+from django.middleware.csrf import get_token
+import functools
+from itertools import chain, zip_longest
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.edit import FormView
 from django.contrib.auth.models import User
 
 
 
-# Міксина до дошки
+# Міксина до дошки. Видалені дошки і списки (SoftDeleteMixin) не видно жодній міксині
 class DashboardAccessMixin:
+    def get_accessible_dashboard_ids(self):
+        return get_accessible_dashboard_ids(self.request)
+
+    # Набір доступних дошок уже без видалених; умова лишається, щоб запит брав частковий індекс
     def get_queryset(self):
-        return Dashboard.objects.filter(
-            Q(created_by=self.request.user) | Q(members=self.request.user)
-        ).distinct()
+        return Dashboard.objects.filter(pk__in=self.get_accessible_dashboard_ids(), deleted_at__isnull=True)
 
 
 # Міксина до списків завдань
 class TodoListAccessMixin(DashboardAccessMixin):
     def get_queryset(self):
-        return TodoList.objects.filter(
-            dashboard__in=DashboardAccessMixin.get_queryset(self)
-        ).distinct()
+        return TodoList.objects.filter(dashboard_id__in=self.get_accessible_dashboard_ids(), deleted_at__isnull=True)
 
 
 # Міксина до завдань
 class TaskAccessMixin(TodoListAccessMixin):
     def get_queryset(self):
-        return Task.objects.filter(
-            todolist__in=TodoListAccessMixin.get_queryset(self)
-        ).distinct()
+        return Task.objects.filter(todolist__dashboard_id__in=self.get_accessible_dashboard_ids(),
+                                   todolist__deleted_at__isnull=True)
 
 
 # Міксина до коментарів
 class CommentAccessMixin(TaskAccessMixin):
     def get_queryset(self):
-        return Comment.objects.filter(
-            task__in=TaskAccessMixin.get_queryset(self)
-        ).distinct()
+        return Comment.objects.filter(task__todolist__dashboard_id__in=self.get_accessible_dashboard_ids(),
+                                      task__todolist__deleted_at__isnull=True)
     
 """Логін, регестрація та вихід"""
 
@@ -79,19 +104,29 @@ class RegisterView(CreateView):
 
 
 #Список Дошок
-class DashboardListView(LoginRequiredMixin, DashboardAccessMixin, ListView):
+class DashboardListView(LoginRequiredMixin, DashboardAccessMixin, KeysetPaginationMixin, ListView):
     model = Dashboard
     template_name = 'dashboard/dashboard_list.html'
+    query_budget = 4
     context_object_name = 'dashboards'
 
+    def get_queryset(self):
+        return super().get_queryset().select_related("created_by")
+
+    # Дошки користувача можуть бути на різних шардах
+    def paginate_queryset(self, queryset, page_size):
+        page = self.paginate_keyset_across_shards(self.get_queryset, page_size)
+        return None, page, page.object_list, page.has_next or page.has_previous
+
 # Список коментарів конкретного завдання
-class CommentListView(LoginRequiredMixin, CommentAccessMixin, ListView):
+class CommentListView(LoginRequiredMixin, CommentAccessMixin, KeysetPaginationMixin, ListView):
     model = Comment
     template_name = 'comment/comment_list.html'
+    query_budget = 7
     context_object_name = 'comments'
 
     def get_queryset(self):
-        qs = super().get_queryset() 
+        qs = super().get_queryset().select_related("created_by")
         dashboard_pk = self.kwargs.get("dashboard_pk")
         todolist_pk = self.kwargs.get("todolist_pk")
         task_pk = self.kwargs.get("task_pk")
@@ -119,58 +154,84 @@ class CommentListView(LoginRequiredMixin, CommentAccessMixin, ListView):
 
 
 # Детальна сторінка дошки
-class DashboardDetailView(LoginRequiredMixin, DashboardAccessMixin, DetailView):
+class DashboardDetailView(LoginRequiredMixin, DashboardAccessMixin, ConditionalGetMixin, KeysetPaginationMixin, DetailView):
     model = Dashboard
     template_name = 'dashboard/dashboard_detail.html'
+    query_budget = 6
     context_object_name = 'dashboard'
     pk_url_kwarg = "dashboard_pk"
 
+    def get_object(self, queryset=None):
+        return super().get_object(self.get_queryset().select_related("created_by"))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        dashboard = self.get_object()
-        context["todolists"] = dashboard.todolists.all()
+        dashboard = self.object
+        _, context["page_obj"] = self.paginate_keyset(
+            dashboard.todolists.filter(deleted_at__isnull=True).select_related("created_by")
+        )
+        context["todolists"] = context["page_obj"].object_list
         return context
 
 
 # Детальна сторінка списку завдань
-class TodoListDetailView(LoginRequiredMixin, TodoListAccessMixin, DetailView):
+class TodoListDetailView(LoginRequiredMixin, TodoListAccessMixin, ConditionalGetMixin, KeysetPaginationMixin, DetailView):
     model = TodoList
     template_name = 'todolist/todolist_detail.html'
+    query_budget = 6
     context_object_name = 'todolist'
     pk_url_kwarg = "todolist_pk"
+    last_activity_lookup = "dashboard__last_activity"
+
+    def get_object(self, queryset=None):
+        return super().get_object(self.get_queryset().select_related("dashboard", "created_by"))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        todolist = self.get_object()
+        todolist = self.object
         context['dashboard'] = todolist.dashboard
-        context["tasks"] = todolist.tasks.all()
+        _, context["page_obj"] = self.paginate_keyset(todolist.tasks.select_related("created_by"))
+        context["tasks"] = context["page_obj"].object_list
         return context
 
 
 # Детальна сторінка завдання
-class TaskDetailView(LoginRequiredMixin, TaskAccessMixin, DetailView):
+class TaskDetailView(LoginRequiredMixin, TaskAccessMixin, ConditionalGetMixin, DetailView):
     model = Task
     template_name = 'task/task_detail.html'
+    query_budget = 6
     context_object_name = 'task'
     pk_url_kwarg = "task_pk"
+    last_activity_lookup = "todolist__dashboard__last_activity"
+
+    # Список, дошка, автори і коментарі, які читає шаблон, разом з об'єктом
+    def get_object(self, queryset=None):
+        return super().get_object(self.get_queryset().select_related("todolist__dashboard", "created_by").prefetch_related(
+            Prefetch("comments", queryset=Comment.objects.select_related("created_by"))
+        ))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        task = self.get_object()
+        task = self.object
         context['todolist'] = task.todolist
         context['dashboard'] = task.todolist.dashboard
         return context
     
 #Детальна сторінка коментаря
-class CommentDetailView(LoginRequiredMixin, CommentAccessMixin, DetailView):
+class CommentDetailView(LoginRequiredMixin, CommentAccessMixin, ConditionalGetMixin, DetailView):
     model = Comment
     template_name = 'comment/comment_detail.html'
+    query_budget = 5
     context_object_name = 'comment'
     pk_url_kwarg = "comment_pk"
+    last_activity_lookup = "task__todolist__dashboard__last_activity"
+
+    def get_object(self, queryset=None):
+        return super().get_object(self.get_queryset().select_related("task__todolist__dashboard", "created_by"))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        comment = self.get_object()
+        comment = self.object
         context['task'] = comment.task
         context['todolist'] = comment.task.todolist
         context['dashboard'] = comment.task.todolist.dashboard
@@ -346,14 +407,22 @@ class CommentUpdateView(LoginRequiredMixin, CommentAccessMixin, UpdateView):
 """СТОРІНКА ВИДАЛЕННЯ"""
 
 
+# Дошка чи список лише позначаються видаленими, дерево під ними прибирає purge_deleted
+class SoftDeleteViewMixin:
+    def form_valid(self, form):
+        success_url = self.get_success_url()
+        self.object.soft_delete()
+        return HttpResponseRedirect(success_url)
+
+
 #Видалення дошки
-class DashboardDeleteView(LoginRequiredMixin, DashboardAccessMixin, DeleteView):
+class DashboardDeleteView(LoginRequiredMixin, DashboardAccessMixin, SoftDeleteViewMixin, DeleteView):
     model = Dashboard
     success_url = reverse_lazy("dashboard_list")
     pk_url_kwarg = "dashboard_pk"
 
 #Видалення списка завдань
-class TodoListDeleteView(LoginRequiredMixin, TodoListAccessMixin, DeleteView):
+class TodoListDeleteView(LoginRequiredMixin, TodoListAccessMixin, SoftDeleteViewMixin, DeleteView):
     model = TodoList
     pk_url_kwarg = "todolist_pk"
 
@@ -388,11 +457,56 @@ class CommentDeleteView(LoginRequiredMixin, CommentAccessMixin, DeleteView):
 
 """ОСНОВНІ СТОРІНКИ САЙТУ"""
 
+# Скільки коментарів показувати на картці завдання
+RECENT_COMMENTS_LIMIT = 5
+
+# Скільки карток показувати в колонці до кнопки "Показати ще"
+BOARD_COLUMN_LIMIT = 50
+
+# Скільки дошок і списків показувати на головній до кнопки "Показати ще"
+SIDEBAR_LIMIT = 25
+
+# Порядок карток у колонці: ручний ключ позиції, далі id
+BOARD_COLUMN_ORDERING = ("position", "id")
+
 #Основна сторінка
-class MainPageView(TaskAccessMixin ,LoginRequiredMixin, ListView):
+# Колонка дошки. Завдання вибираються лише тоді, коли шаблон їх читає,
+# тобто при промаху кешу фрагмента; всі колонки поділяють один запит.
+class BoardColumn:
+    def __init__(self, key, title, count, load_pages):
+        self.key = key
+        self.title = title
+        # Кількість усіх завдань колонки з лічильника списку
+        self.count = count
+        self._load_pages = load_pages
+
+    @property
+    def page(self):
+        return self._load_pages()[self.key]
+
+    @property
+    def tasks(self):
+        return self.page.object_list
+
+    @property
+    def next_cursor(self):
+        return self.page.next_cursor
+
+
+class MainPageView(TaskAccessMixin ,LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Task
     template_name = "main/main.html"
+    query_budget = 9
     context_object_name = "tasks"
+    paginate_by = None
+
+    def get_template_names(self):
+        # Довантаження однієї колонки віддає лише картки, живе оновлення — одну картку
+        if self.request.GET.get("column"):
+            return ["main/board_cards.html"]
+        if self.request.GET.get("card"):
+            return ["main/task_card.html"]
+        return super().get_template_names()
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -405,43 +519,137 @@ class MainPageView(TaskAccessMixin ,LoginRequiredMixin, ListView):
         if todolist_pk:
             qs = qs.filter(todolist_id=todolist_pk)
 
-        return qs
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-
-        dashboards_qs = Dashboard.objects.filter(
-            Q(created_by=self.request.user) | Q(members=self.request.user)
-        ).distinct()
-        context["dashboards"] = dashboards_qs
-
+        # Перші п'ять коментарів з авторами одним запитом; їх кількість — лічильник завдання
+        recent_comments = Comment.objects.select_related("created_by").order_by("created_at", "id")
+        return qs.prefetch_related(
+            Prefetch("comments", queryset=recent_comments[:RECENT_COMMENTS_LIMIT], to_attr="recent_comments")
+        )
+
+    # Не більше ліміту (+1, щоб знати про наступну сторінку) на кожну колонку
+    def get_board_queryset(self):
+        return self.object_list.annotate(column_row=Window(
+            RowNumber(),
+            partition_by=F("status"),
+            order_by=order_by_expressions(BOARD_COLUMN_ORDERING),
+        )).filter(column_row__lte=BOARD_COLUMN_LIMIT + 1).order_by(*order_by_expressions(BOARD_COLUMN_ORDERING))
+
+    # Розкладання завдань по колонках за один прохід
+    def get_column_pages(self):
+        statuses = Task._meta.get_field("status").choices
+
+        column_key = self.request.GET.get("column")
+        if column_key:
+            _, page = self.paginate_keyset(self.object_list.filter(status=column_key), BOARD_COLUMN_LIMIT,
+                                           ordering=BOARD_COLUMN_ORDERING)
+            return {column_key: page}
+
+        buckets = {key: [] for key, _ in statuses}
+        for task in self.get_board_queryset():
+            bucket = buckets.get(task.status)
+            if bucket is not None:
+                bucket.append(task)
+        return {key: KeysetPage.from_rows(rows, BOARD_COLUMN_LIMIT, BOARD_COLUMN_ORDERING) for key, rows in buckets.items()}
+
+    def get_columns(self, todolist):
+        statuses = Task._meta.get_field("status").choices
+
+        column_key = self.request.GET.get("column")
+        if column_key:
+            statuses = [(key, title) for key, title in statuses if key == column_key]
+            if not statuses:
+                raise BadRequest("Невідома колонка.")
+
+        load_pages = functools.cache(self.get_column_pages)
+        return [BoardColumn(key, title, todolist.status_count(key), load_pages) for key, title in statuses]
+
+    def get_card_pk(self):
+        card_pk = self.request.GET.get("card")
+        if card_pk and (not self.request.GET.get("todolist") or not card_pk.isdigit()):
+            raise BadRequest("Невідома картка.")
+        return card_pk
+
+    # Дошка, список і картка, обрані параметрами запиту
+    def get_selection(self):
         dashboard_pk = self.request.GET.get("dashboard")
         todolist_pk = self.request.GET.get("todolist")
+        card_pk = self.get_card_pk()
+        return {
+            "dashboard": get_object_or_404(DashboardAccessMixin.get_queryset(self), pk=dashboard_pk) if dashboard_pk else None,
+            "todolist": get_object_or_404(TodoListAccessMixin.get_queryset(self), pk=todolist_pk) if todolist_pk else None,
+            "card": get_object_or_404(self.object_list, pk=card_pk) if card_pk else None,
+        }
 
-        if dashboard_pk:
-            dashboard = get_object_or_404(dashboards_qs, pk=dashboard_pk)
-            context["selected_dashboard"] = dashboard
-            context["todolists"] = dashboard.todolists.all()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        selection = self.get_selection()
+
+        # Бічна панель, рядок списків і колонки читаються з БД лише при промаху кешу фрагментів
+        dashboards_page = SimpleLazyObject(lambda: self.paginate_keyset_across_shards(
+            lambda: DashboardAccessMixin.get_queryset(self), SIDEBAR_LIMIT, "dashboards_after"
+        ))
+        context["dashboards_page"] = dashboards_page
+        context["dashboards"] = SimpleLazyObject(lambda: dashboards_page.object_list)
+        version_keys = {"user": version_key("user", self.request.user.pk)}
+
+        dashboard = context["selected_dashboard"] = selection["dashboard"]
+        if dashboard:
+            todolists_page = SimpleLazyObject(
+                lambda: self.paginate_keyset(dashboard.todolists.filter(deleted_at__isnull=True), SIDEBAR_LIMIT,
+                                             "todolists_after")[1]
+            )
+            context["todolists_page"] = todolists_page
+            context["todolists"] = SimpleLazyObject(lambda: todolists_page.object_list)
+            version_keys["dashboard"] = version_key("dashboard", dashboard.pk)
         else:
-            context["selected_dashboard"] = None
             context["todolists"] = []
 
-        if todolist_pk:
-            todolist = get_object_or_404(
-                TodoList.objects.filter(dashboard__in=dashboards_qs),
-                pk=todolist_pk
-            )
-            context["selected_todolist"] = todolist
+        todolist = context["selected_todolist"] = selection["todolist"]
+        if todolist:
+            version_keys["todolist"] = version_key("todolist", todolist.pk)
+
+        context["fragment_versions"] = dict(zip(version_keys, get_versions(*version_keys.values())))
+
+        if selection["card"]:
+            context["task"] = selection["card"]
+            context["columns"] = []
+            return context
+
+        # Колонки потрібні лише коли обрано список
+        if dashboard and todolist:
+            context["columns"] = self.get_columns(todolist)
+            if self.request.GET.get("column"):
+                context["column"] = context["columns"][0]
         else:
-            context["selected_todolist"] = None
+            context["columns"] = []
 
-        context["columns"] = {
-            "draft": "Чернетка",
-            "in_progress": "В процесі",
-            "completed": "Завершено",
-            "archived": "Архів"
-        }
+        return context
+
+# Повнотекстовий пошук у доступних дошках
+class SearchView(LoginRequiredMixin, DashboardAccessMixin, TemplateView):
+    template_name = "main/search.html"
+    query_budget = 6
+
+    def search_shard(self, query):
+        results = search(self.request.user, query, self.get_accessible_dashboard_ids())
+
+        # Назви завдань для коментарів одним запитом
+        task_ids = {result.task_id for result in results if result.kind == "comment"}
+        titles = dict(Task.objects.filter(pk__in=task_ids).values_list("id", "title")) if task_ids else {}
+        for result in results:
+            result.task_title = titles.get(result.task_id, "")
+        return results
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        # Кожен шард шукає у своїх дошках; результати чергуються, щоб жоден шард не витіснив інші
+        results = []
+        if query:
+            shards = fan_out(lambda: self.search_shard(query))
+            results = [result for result in chain(*zip_longest(*shards)) if result is not None][:SEARCH_RESULTS_LIMIT]
+
+        context["query"] = query
+        context["results"] = results
         return context
 
 #Учасники дошки
@@ -498,23 +706,324 @@ class DashboardMemberDeleteView(LoginRequiredMixin, DashboardAccessMixin, View):
 
         return redirect("dashboard_members", dashboard_pk=dashboard.pk)
 
+TASK_STATUSES = frozenset(value for value, _ in Task._meta.get_field("status").choices)
+
+
 #Зміна статусу перетягуванням
 @method_decorator(require_POST, name='dispatch')
 class TaskStatusUpdateView(LoginRequiredMixin, TaskAccessMixin, View):
+    query_budget = 10
+
+    # Шард — за карткою з тіла запиту (див. ShardMiddleware)
+    @classmethod
+    def shard_objects(cls, request, view_kwargs):
+        task_id = request.POST.get("task_id", "")
+        return (Task, [int(task_id)]) if task_id.isdigit() else None
+
     def post(self, request, *args, **kwargs):
         task_id = request.POST.get("task_id")
         new_status = request.POST.get("status")
 
         if not task_id or new_status is None:
             return JsonResponse({"success": False, "error": "missing_params"}, status=400)
-        
-        qs = self.get_queryset() 
-        task = get_object_or_404(qs, pk=task_id)
-        
-        try:
-            task.status = new_status
-            task.save(update_fields=["status"])
-        except Exception as e:
-            return JsonResponse({"success": False, "error": str(e)}, status=500)
+        if new_status not in TASK_STATUSES:
+            return JsonResponse({"success": False, "error": "invalid_status"}, status=400)
 
+        task = get_object_or_404(self.get_queryset(), pk=task_id)
+        task.move_to_end(new_status)
         return JsonResponse({"success": True, "task_id": task.id, "status": task.status})
+
+
+
+# Найбільша кількість переміщень в одному пакеті
+BATCH_MOVE_LIMIT = 500
+
+#Пакетна зміна статусу перетягуванням
+@method_decorator(require_POST, name='dispatch')
+class TaskBatchMoveView(LoginRequiredMixin, TaskAccessMixin, View):
+    query_budget = 10
+
+    # Шард — за картками пакета (див. ShardMiddleware); некоректний пакет відхиляє post()
+    @classmethod
+    def shard_objects(cls, request, view_kwargs):
+        try:
+            moves = json.loads(request.body)["moves"]
+            ids = [_parse_id(move.get("task_id")) for move in moves[:BATCH_MOVE_LIMIT]]
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+        ids = [pk for pk in ids if pk is not None]
+        return (Task, ids) if ids else None
+
+    def post(self, request, *args, **kwargs):
+        try:
+            payload = json.loads(request.body)
+            moves = payload["moves"]
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({"success": False, "error": "invalid_json"}, status=400)
+
+        if not isinstance(moves, list) or not moves or len(moves) > BATCH_MOVE_LIMIT:
+            return JsonResponse({"success": False, "error": "invalid_moves"}, status=400)
+
+        # Якщо картку перетягнули кілька разів, діє останнє переміщення
+        targets = {}
+        for move in moves:
+            if not isinstance(move, dict):
+                return JsonResponse({"success": False, "error": "invalid_moves"}, status=400)
+            try:
+                task_id, prev_id, next_id = (_parse_id(move.get(key)) for key in ("task_id", "prev_id", "next_id"))
+            except ValueError:
+                return JsonResponse({"success": False, "error": "invalid_task_id"}, status=400)
+            if task_id is None:
+                return JsonResponse({"success": False, "error": "invalid_task_id"}, status=400)
+            status = move.get("status")
+            if status not in TASK_STATUSES:
+                return JsonResponse({"success": False, "error": "invalid_status", "task_id": task_id}, status=400)
+            # Старі клієнти передають position — індекс картки в новій колонці
+            index = move.get("position")
+            if index is not None and (not isinstance(index, int) or isinstance(index, bool) or index < 0):
+                return JsonResponse({"success": False, "error": "invalid_position", "task_id": task_id}, status=400)
+            # prev_id / next_id — сусідні картки в новій колонці після перетягування
+            targets.pop(task_id, None)
+            targets[task_id] = (status, prev_id, next_id, index if prev_id is None and next_id is None else None)
+
+        neighbour_ids = {pk for _, prev_id, next_id, _ in targets.values() for pk in (prev_id, next_id) if pk}
+        # Доступ до всього пакета і позиції сусідів перевіряються одним запитом
+        fields = ("id", "todolist_id", "status", "position", "updated_at")
+        rows = {task.pk: task for task in self.get_queryset().filter(pk__in=set(targets) | neighbour_ids).only(*fields)}
+        missing = sorted(set(targets) - set(rows))
+        if missing:
+            return JsonResponse({"success": False, "error": "not_found", "missing": missing}, status=404)
+
+        self.resolve_indexes(targets, rows, fields)
+
+        # Сусіди мають бути доступними картками тієї колонки, куди переміщується картка
+        def column(pk):
+            return rows[pk].todolist_id, targets[pk][0] if pk in targets else rows[pk].status
+
+        for task_id, (status, prev_id, next_id, _) in targets.items():
+            for pk in (prev_id, next_id):
+                if pk and (pk == task_id or pk not in rows or column(pk) != (rows[task_id].todolist_id, status)):
+                    return JsonResponse({"success": False, "error": "invalid_neighbour", "task_id": task_id,
+                                         "neighbour_id": pk}, status=400)
+
+        # Переміщення застосовуються по черзі, тож сусід, переміщений раніше в пакеті, вже має новий ключ
+        positions = {pk: task.position for pk, task in rows.items()}
+        now = timezone.now()
+        tasks = []
+        for task_id, (status, prev_id, next_id, _) in targets.items():
+            before, after = positions.get(prev_id), positions.get(next_id)
+            if before and after and before >= after:
+                after = None
+            task = rows[task_id]
+            task.status = status
+            task.position = rank_between(before, after)
+            task.updated_at = now
+            positions[task_id] = task.position
+            tasks.append(task)
+
+        with transaction.atomic(using=current_shard()), counter_batch():
+            Task.objects.bulk_update(tasks, ["status", "position", "updated_at"])
+            for task in tasks:
+                flow.task_moved(task)
+                task_moved(task)
+            # bulk_update не шле сигналів, тому кеш колонок і активність дошки оновлюються тут
+            todolist_ids = {task.todolist_id for task in tasks}
+            bump_versions(*(version_key("todolist", pk) for pk in todolist_ids))
+            touch_todolist_dashboards(*todolist_ids)
+            for task in tasks:
+                queue_event(task.todolist_id, "task.moved", **task_event_data(task))
+
+        return JsonResponse({
+            "success": True,
+            "tasks": [{"task_id": task.pk, "status": task.status, "position": task.position} for task in tasks],
+        })
+
+    # Індекс position перекладається в сусідів: колонки читаються одним запитом на колонку,
+    # далі переміщення пакета по черзі застосовуються до них у пам'яті
+    def resolve_indexes(self, targets, rows, fields):
+        indexed = [(task_id, status, index) for task_id, (status, _, _, index) in targets.items() if index is not None]
+        if not indexed:
+            return
+        limit = max(index for _, _, index in indexed) + len(targets) + 1
+        columns = {}
+        for task_id, status, index in indexed:
+            key = (rows[task_id].todolist_id, status)
+            if key not in columns:
+                cards = self.get_queryset().filter(todolist_id=key[0], status=status).order_by(*BOARD_COLUMN_ORDERING)
+                columns[key] = []
+                for task in cards.only(*fields)[:limit]:
+                    rows.setdefault(task.pk, task)
+                    columns[key].append(task.pk)
+            for cards in columns.values():
+                if task_id in cards:
+                    cards.remove(task_id)
+            cards = columns[key]
+            index = min(index, len(cards))
+            cards.insert(index, task_id)
+            prev_id = cards[index - 1] if index > 0 else None
+            next_id = cards[index + 1] if index + 1 < len(cards) else None
+            targets[task_id] = (status, prev_id, next_id, index)
+
+
+# Скільки архівних завдань читається і рендериться за раз
+ARCHIVE_STREAM_CHUNK = 200
+# Місце в шаблоні сторінки, куди потоком вставляються рядки архіву
+ARCHIVE_ROWS_MARKER = mark_safe("<!-- archive-rows -->")
+
+
+# Архів списку лише для читання. Архів може бути великим, тож сторінка віддається потоком:
+# шапка, далі рядки пакетами з iterator(chunk_size), без пагінації і без усього архіву в пам'яті
+class TodoListArchiveView(LoginRequiredMixin, TodoListAccessMixin, SingleObjectMixin, View):
+    model = TodoList
+    pk_url_kwarg = "todolist_pk"
+    template_name = "todolist/todolist_archive.html"
+    rows_template_name = "todolist/archive_rows.html"
+    query_budget = 4
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        # Кука CSRF для форм відновлення ставиться до того, як почнеться потік
+        get_token(request)
+        return StreamingHttpResponse(self.stream(), content_type="text/html; charset=utf-8")
+
+    def render_rows(self, tasks):
+        return render_to_string(self.rows_template_name, {"todolist": self.object, "tasks": tasks}, self.request)
+
+    def stream(self):
+        page = render_to_string(self.template_name, {"todolist": self.object, "rows": ARCHIVE_ROWS_MARKER}, self.request)
+        head, tail = page.split(ARCHIVE_ROWS_MARKER)
+        yield head
+        chunk, streamed = [], False
+        for task in archived_tasks(self.object).iterator(chunk_size=ARCHIVE_STREAM_CHUNK):
+            chunk.append(task)
+            if len(chunk) == ARCHIVE_STREAM_CHUNK:
+                yield self.render_rows(chunk)
+                chunk, streamed = [], True
+        if chunk or not streamed:
+            yield self.render_rows(chunk)
+        yield tail
+
+
+# Вивантаження дошки потоком у CSV або NDJSON (?format=). gzip_page стискає потік на льоту,
+# якщо клієнт його приймає; сам потік читає базу пакетами (див. export.py)
+@method_decorator(gzip_page, name='dispatch')
+class DashboardExportView(LoginRequiredMixin, DashboardAccessMixin, SingleObjectMixin, View):
+    model = Dashboard
+    pk_url_kwarg = "dashboard_pk"
+    query_budget = 4
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise BadRequest("Невідомий формат")
+        dashboard = self.get_object()
+        response = StreamingHttpResponse(export_dashboard(dashboard.pk, export_format),
+                                         content_type=EXPORT_FORMATS[export_format])
+        response["Content-Disposition"] = f'attachment; filename="dashboard-{dashboard.pk}.{export_format}"'
+        return response
+
+
+# Аналітика потоку дошки за останні ?days= днів: пропускна здатність, перцентилі часу циклу
+# і накопичувальний потік. Лише читає щоденні зведення (див. flow.py): безпечний запит може піти
+# на репліку, тож зведення оновлює фоновий rollup_flow --interval, а не сторінка.
+class DashboardFlowView(LoginRequiredMixin, DashboardAccessMixin, DetailView):
+    model = Dashboard
+    template_name = "dashboard/dashboard_flow.html"
+    context_object_name = "dashboard"
+    pk_url_kwarg = "dashboard_pk"
+    query_budget = 8
+    days_choices = (7, 30, 90, 365)
+
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get("days", FLOW_DAYS))
+        except ValueError:
+            return FLOW_DAYS
+        return days if days in self.days_choices else FLOW_DAYS
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["days"] = self.get_days()
+        context["days_choices"] = self.days_choices
+        context["flow"] = flow = dashboard_flow(self.object.pk, context["days"])
+        context["bands"] = cumulative_flow_bands(flow)
+        context["bars"] = throughput_bars(flow)
+        context["status_labels"] = dict(Task._meta.get_field("status").choices)
+        return context
+
+
+# Імпорт списків, завдань і коментарів у дошку з файлу CSV або NDJSON. Великий файл Django
+# тримає у тимчасовому файлі, а import_board читає його потоково і пише пакетами;
+# помилкові рядки пропускаються і показуються у звіті.
+class DashboardImportView(LoginRequiredMixin, DashboardAccessMixin, SingleObjectMixin, FormView):
+    model = Dashboard
+    template_name = "dashboard/dashboard_import.html"
+    context_object_name = "dashboard"
+    pk_url_kwarg = "dashboard_pk"
+    form_class = DashboardImportForm
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().post(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        import_format = form.cleaned_data["import_format"] or import_format_for(upload.name)
+        if import_format is None:
+            form.add_error("import_format", "Не вдалося визначити формат файлу, оберіть його.")
+            return self.form_invalid(form)
+        report = import_board(open_import(upload, upload.name), import_format, self.object, self.request.user)
+        return self.render_to_response(self.get_context_data(form=self.get_form_class()(), report=report))
+
+
+# Повернення завдання з архіву в список
+@method_decorator(require_POST, name='dispatch')
+class TaskRestoreView(LoginRequiredMixin, TodoListAccessMixin, View):
+    def post(self, request, *args, **kwargs):
+        todolist = get_object_or_404(self.get_queryset(), pk=kwargs["todolist_pk"])
+        task = get_object_or_404(ArchivedTask, pk=kwargs["task_pk"], todolist=todolist)
+        restore_tasks([task.pk])
+        return redirect("task_detail", dashboard_pk=todolist.dashboard_id, todolist_pk=todolist.pk, task_pk=task.pk)
+
+
+# Потік живих оновлень дошки (Server-Sent Events). Розрахований на ASGI (tasker/asgi.py):
+# відкрите з'єднання — корутина, що чекає на черзі, а не зайнятий потік.
+class DashboardEventsView(View):
+    async def get(self, request, dashboard_pk):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"success": False, "error": "not_authenticated"}, status=401)
+        if not await ahas_dashboard_access(user, dashboard_pk):
+            raise Http404
+
+        response = StreamingHttpResponse(
+            event_stream(dashboard_pk, request.headers.get("Last-Event-ID")),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # nginx не повинен буферизувати потік
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+def _parse_id(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError(value)
+
+
+# Лічильники кешу фрагментів поточного процесу, лише для персоналу
+class FragmentCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(fragment_stats())
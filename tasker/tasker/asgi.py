@@ -3,6 +3,10 @@ ASGI config for tasker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Live board updates (Server-Sent Events) need an ASGI server, e.g.
+``uvicorn tasker.asgi:application``: each open stream is a coroutine
+rather than a worker thread.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -43,6 +43,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # runserver теж віддає статику через WhiteNoise, з тими самими заголовками
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'task_manager',
     'widget_tweaks',
@@ -50,6 +52,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Статика до решти middleware: без сесій, автентифікації і обліку запитів
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Час SQL і шаблонів кожного запиту; стоїть рано, щоб враховувати запити сесії й автентифікації
+    'task_manager.middleware.PerformanceMiddleware',
+    # Безпечні запити читають з реплік (task_manager/replicas.py)
+    'task_manager.replicas.ReplicaMiddleware',
+    # Шард дошки з URL (task_manager/shards.py)
+    'task_manager.shards.ShardMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +73,8 @@ ROOT_URLCONF = 'tasker.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Звичайний DjangoTemplates, що додатково міряє час рендерингу для PerformanceMiddleware
+        'BACKEND': 'task_manager.middleware.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,18 +88,105 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'tasker.wsgi.application'
+ASGI_APPLICATION = 'tasker.asgi.application'
+
+# Під ASGI сторінки для читання і зміну статусу можна віддати асинхронним view
+ASYNC_VIEWS = os.environ.get("TASKER_ASYNC_VIEWS") == "1"
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# TASKER_DB_PATH підміняє файл бази (наприклад, для навантажувального тесту)
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get("TASKER_DB_PATH") or BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Репліки для читання. TASKER_REPLICA_DB_PATHS — файли SQLite через кому, що локально стоять
+# замість реплік; оновлюються командою sync_replicas.
+REPLICA_DATABASES = []
+replica_paths = os.environ.get("TASKER_REPLICA_DB_PATHS", "").split(",")
+for index, path in enumerate(filter(None, replica_paths), 1):
+    DATABASES[f'replica{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    REPLICA_DATABASES.append(f'replica{index}')
+
+# Шарди дошок (task_manager/shards.py). default — каталог і перший шард; TASKER_SHARD_DB_PATHS —
+# файли SQLite інших шардів через кому. Після додавання шарду: migrate --database shardN.
+SHARD_DATABASES = ['default']
+shard_paths = os.environ.get("TASKER_SHARD_DB_PATHS", "").split(",")
+for index, path in enumerate(filter(None, shard_paths), 1):
+    DATABASES[f'shard{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    SHARD_DATABASES.append(f'shard{index}')
+
+DATABASE_ROUTERS = ['task_manager.shards.ShardRouter', 'task_manager.replicas.ReplicaRouter']
+# Скільки секунд після запису користувач читає з основної бази
+REPLICA_PIN_SECONDS = 5
+
+
+# Кеш фрагментів головної сторінки. Типово — пам'ять процесу, що годиться лише для одного
+# процесу; TASKER_CACHE_DIR вмикає файловий кеш, спільний для кількох процесів.
+if os.environ.get("TASKER_CACHE_DIR"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ["TASKER_CACHE_DIR"],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'tasker',
+        }
+    }
+
+# Кеш у пам'яті процесу не спільний для кількох процесів; поза DEBUG система перевірок
+# (task_manager/checks.py) вимагає спільного кешу, якщо запити обслуговує не один процес
+CACHE_SINGLE_PROCESS = DEBUG
+
+FRAGMENT_CACHE_ALIAS = 'default'
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Сесії і користувач сесії з того самого кешу (task_manager/sessions.py, task_manager/auth.py).
+# Кеш у пам'яті процесу не бачить виходу з системи в інших процесах, тож для кількох
+# процесів потрібен TASKER_CACHE_DIR або інший спільний кеш (див. CACHE_SINGLE_PROCESS).
+SESSION_ENGINE = 'task_manager.sessions'
+SESSION_CACHE_ALIAS = 'default'
+AUTHENTICATION_BACKENDS = ['task_manager.auth.CachedModelBackend']
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = 60 * 5
+
+
+# Інструментування запитів (task_manager/middleware.py): заголовок Server-Timing
+# і дія, коли view перевищує свій query_budget — None, "warn" або "raise"
+PERF_SERVER_TIMING = DEBUG
+QUERY_BUDGET_ACTION = "warn"
+
+# JSON-рядок на кожен запит у журналі task_manager.perf; TASKER_PERF_LOG змінює рівень
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'task_manager.perf': {
+            'handlers': ['console'],
+            'level': os.environ.get("TASKER_PERF_LOG") or ("INFO" if DEBUG else "WARNING"),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,6 +224,19 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# collectstatic додає до імен файлів хеш вмісту і кладе поруч стиснені .gz і .br (з пакетом Brotli).
+# WhiteNoiseMiddleware віддає файли з хешем із Cache-Control: immutable на 10 років і стиснений
+# варіант за Accept-Encoding; файл передається через wsgi.file_wrapper (sendfile у gunicorn).
+# Без collectstatic немає маніфесту, тож тести (tasker/test_settings.py) беруть StaticFilesStorage.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
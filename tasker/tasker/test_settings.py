@@ -0,0 +1,32 @@
+# Налаштування для тестів: manage.py test бере їх замість tasker.settings
+from .settings import *  # noqa: F401,F403
+
+# Тести працюють з однією базою без реплік і з двома шардами. Тести, яким потрібен
+# другий шард, вмикають shard1 через override_settings(SHARD_DATABASES=...).
+DATABASES = {
+    'default': DATABASES['default'],
+    'shard1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'shard1.sqlite3',
+    },
+}
+REPLICA_DATABASES = []
+SHARD_DATABASES = ['default']
+
+# Тести йдуть в одному процесі, тож кеш у пам'яті процесу їм підходить
+CACHE_SINGLE_PROCESS = True
+
+# Перевищений query_budget у тестах — помилка
+QUERY_BUDGET_ACTION = "raise"
+LOGGING['loggers']['task_manager.perf']['level'] = os.environ.get("TASKER_PERF_LOG") or "ERROR"
+
+# Тести не запускають collectstatic: без маніфесту, а WhiteNoise шукає файли через finders
+# і не сканує STATIC_ROOT під час запуску
+STORAGES = {
+    **STORAGES,
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+WHITENOISE_AUTOREFRESH = True
+WHITENOISE_USE_FINDERS = True